@@ -0,0 +1,42 @@
+import copy
+
+def build_actuator_entry(template_name, template_data, template_hash, actuator_number, actuator_name):
+    """Build one generated actuator entry (the template components bound to a number and name)"""
+    return {
+        'actuator_number': actuator_number,
+        'actuator_name': actuator_name,
+        'template_name': template_name,
+        'template_hash': template_hash,
+        'actuators': copy.deepcopy(template_data['actuators'])
+    }
+
+def actuator_number_order(actuator_data):
+    """Sort key of a generated actuator: its number, numerically"""
+    number = str(actuator_data['actuator_number']).lstrip("_")
+    return int(number) if number.isdigit() else float("inf")
+
+def build_mixed_batch(template_manager, entries):
+    """Build (template, number, name) entries of several templates in one pass
+    
+    Each template, its hash and the copy of its components are made once,
+    however many actuators use it; the entries of one template share that
+    copy (generated entries are never changed in place). Returns the
+    actuators sorted by number (one stream for any exporter or insert);
+    raises ValueError for an unknown template.
+    """
+    # template name -> its first entry
+    first_entries = {}
+    generated_data = []
+    for template_name, number, name in entries:
+        first = first_entries.get(template_name)
+        if first is None:
+            template_data = template_manager.get_template(template_name)
+            if not template_data:
+                raise ValueError(f"Template '{template_name}' not found")
+            entry = first_entries[template_name] = build_actuator_entry(
+                template_name, template_data, template_manager.get_template_hash(template_name), number, name)
+        else:
+            entry = dict(first, actuator_number=number, actuator_name=name)
+        generated_data.append(entry)
+    generated_data.sort(key=actuator_number_order)
+    return generated_data
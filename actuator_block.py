@@ -0,0 +1,165 @@
+"""Rules for locating the actuator block in a sheet and planning changes to it.
+
+The functions take a ``get_value(row)`` callable returning the value of
+column A (1-based rows) or plain lists of values, so the COM and offline
+(openpyxl) backends share exactly the same rules. The block is searched
+down to the last used row of the sheet, however long it is.
+"""
+from bisect import bisect_right
+
+# Rows searched for the "Actuator" header marker
+ACTUATOR_MARKER_SEARCH_ROWS = 100
+
+def find_actuator_row(get_value):
+    """Find the row containing 'Actuator' in the first column"""
+    for row in range(1, ACTUATOR_MARKER_SEARCH_ROWS + 1):
+        cell_value = str(get_value(row)).strip()
+        if cell_value.lower() == "actuator":
+            return row
+    return None
+
+def find_actuator_end_row(get_value, actuator_row, last_row):
+    """Find the 'Actuator End' marker between the header and last_row, or None"""
+    for row in range(actuator_row + 1, last_row + 1):
+        cell_value = str(get_value(row)).strip().lower()
+        if cell_value == "actuator end":
+            return row
+    return None
+
+def find_insertion_point(get_value, actuator_row, last_row):
+    """Find the best insertion point (before 'Actuator End' or after last data)
+    
+    last_row is the last used row of the sheet.
+    """
+    end_row = find_actuator_end_row(get_value, actuator_row, last_row)
+    if end_row is not None:
+        return end_row  # Insert before "Actuator End"
+    
+    # If no "Actuator End" found, find last non-empty row after actuator header
+    last_data_row = actuator_row + 1
+    for row in range(actuator_row + 1, last_row + 1):
+        cell_value = get_value(row)
+        if cell_value is None or str(cell_value).strip() == "":
+            break
+        last_data_row = row + 1
+    
+    return last_data_row
+
+# How generated rows are combined with rows already in the block
+INSERT_APPEND = "append"      # insert every generated row
+INSERT_SKIP = "skip"          # insert only rows whose (Actuator, Name) is not in the block
+INSERT_UPSERT = "upsert"      # like skip, and update changed existing rows in place
+INSERT_MODES = (INSERT_APPEND, INSERT_SKIP, INSERT_UPSERT)
+
+def normalize_cell(value):
+    """Normalize a cell value so sheet values and generated values compare equal"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    # Excel stores line breaks as \n while templates may contain \r\n
+    return str(value).replace("\r\n", "\n").strip()
+
+def row_key(row):
+    """Identity of a row in the actuator block: (Actuator, Name)"""
+    return (normalize_cell(row[0]), normalize_cell(row[1]) if len(row) > 1 else "")
+
+def build_row_index(existing_rows, first_row):
+    """Hash index of the existing block: (Actuator, Name) -> (sheet row, normalized values)"""
+    index = {}
+    for offset, row in enumerate(existing_rows):
+        key = row_key(row)
+        if key[0] and key not in index:
+            index[key] = (first_row + offset, tuple(normalize_cell(value) for value in row))
+    return index
+
+def plan_upsert(index, rows, mode):
+    """Split generated rows into new rows and in-place updates against the block index"""
+    plan = {'new_rows': [], 'updates': [], 'unchanged': 0, 'skipped': 0}
+    seen = set()
+    
+    for row in rows:
+        key = row_key(row)
+        existing = index.get(key)
+        if existing is None:
+            # Repeated keys inside the generated batch are inserted once
+            if key not in seen:
+                seen.add(key)
+                plan['new_rows'].append(row)
+            continue
+        
+        sheet_row, existing_values = existing
+        values = tuple(normalize_cell(value) for value in row)
+        padded = existing_values[:len(values)] + ("",) * (len(values) - len(existing_values))
+        if padded == values:
+            plan['unchanged'] += 1
+        elif mode == INSERT_UPSERT:
+            plan['updates'].append((sheet_row, row))
+        else:
+            plan['skipped'] += 1
+    
+    return plan
+
+def describe_upsert(plan):
+    """Summary of an upsert plan for messages"""
+    text = f"added {len(plan['new_rows'])}, updated {len(plan['updates'])}, unchanged {plan['unchanged']}"
+    if plan.get('removed'):
+        text += f", removed {plan['removed']}"
+    if plan['skipped']:
+        text += f", skipped {plan['skipped']} changed"
+    return text
+
+# Where new rows go inside the block
+ORDER_END = "end"          # one block just above "Actuator End"
+ORDER_SORTED = "sorted"    # each actuator group at its actuator-number position
+INSERT_ORDERS = (ORDER_END, ORDER_SORTED)
+
+def actuator_number_key(value):
+    """Numeric actuator number of a column A value like '_138', or None"""
+    text = normalize_cell(value).lstrip("_")
+    return int(text) if text.isdigit() else None
+
+def group_rows_by_actuator(rows):
+    """Split rows into consecutive groups sharing the same Actuator value"""
+    groups = []
+    for row in rows:
+        if groups and groups[-1][0] == row[0]:
+            groups[-1][1].append(row)
+        else:
+            groups.append((row[0], [row]))
+    return groups
+
+def plan_sorted_insertion(existing_values, first_row, rows):
+    """Plan where each generated actuator group goes in a block sorted by actuator number.
+    
+    existing_values are the column A values of the block starting at first_row.
+    Returns [(sheet_row, rows)] in ascending sheet_row order, with sheet rows in
+    the coordinates of the unmodified sheet and groups sharing a position
+    merged into one block. An existing row moves down by the rows of every
+    block at or above it.
+    """
+    # Running maximum of the existing numbers keeps the keys sorted for bisect even
+    # when the block is only partly ordered; rows without a number keep the previous key
+    keys = []
+    previous_key = -1
+    for value in existing_values:
+        key = actuator_number_key(value)
+        if key is None or key < previous_key:
+            key = previous_key
+        keys.append(key)
+        previous_key = key
+    
+    blocks = {}
+    for actuator, group_rows in group_rows_by_actuator(rows):
+        number = actuator_number_key(actuator)
+        # Rows without a number go to the end of the block
+        offset = len(keys) if number is None else bisect_right(keys, number)
+        blocks.setdefault(offset, []).append((number if number is not None else float("inf"), group_rows))
+    
+    plan = []
+    for offset in sorted(blocks):
+        block_rows = []
+        for _, group_rows in sorted(blocks[offset], key=lambda item: item[0]):
+            block_rows.extend(group_rows)
+        plan.append((first_row + offset, block_rows))
+    return plan
@@ -1,14 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import copy
+from actuator_batch import build_actuator_entry
+from actuator_validation import ActuatorValidator
 
 class ActuatorDialog:
-    def __init__(self, parent, template_name, template_manager):
+    def __init__(self, parent, template_name, template_manager, existing=None):
         self.parent = parent
         self.template_name = template_name
         self.template_manager = template_manager
         self.result = None
         
+        # Actuator numbers and tag names already in the project (actuator_validation.ExistingSymbols)
+        self.existing = existing
+        
         # Get template data
         self.template_data = template_manager.get_template(template_name)
         if not self.template_data:
@@ -218,14 +222,16 @@ class ActuatorDialog:
         except Exception as e:
             messagebox.showerror("Preview Error", f"Error generating preview: {str(e)}")
     
-    def get_generated_data(self):
+    def read_entries(self):
+        """Read the (number, name) of every input row once (a leading "_" of the number is dropped)"""
+        return [(input_data['number_var'].get().strip().lstrip("_"), input_data['name_var'].get().strip())
+                for input_data in self.actuator_inputs]
+    
+    def get_generated_data(self, entries=None):
         """Get the generated actuator data based on inputs"""
         generated_data = []
         
-        for i, input_data in enumerate(self.actuator_inputs):
-            number = input_data['number_var'].get().strip()
-            name = input_data['name_var'].get().strip()
-            
+        for i, (number, name) in enumerate(entries if entries is not None else self.read_entries()):
             if not number or not name:
                 continue  # Skip incomplete entries
             
@@ -234,59 +240,48 @@ class ActuatorDialog:
                 raise ValueError(f"Actuator {i+1} number must be numeric")
             
             # Create actuator data
-            actuator_data = {
-                'actuator_number': number,
-                'actuator_name': name,
-                'actuators': copy.deepcopy(self.template_data['actuators'])
-            }
+            actuator_data = build_actuator_entry(
+                self.template_name, self.template_data,
+                self.template_manager.get_template_hash(self.template_name),
+                number, name
+            )
             
             generated_data.append(actuator_data)
         
         return generated_data
     
-    def validate_inputs(self):
-        """Validate all inputs"""
-        errors = []
-        
-        for i, input_data in enumerate(self.actuator_inputs):
-            number = input_data['number_var'].get().strip()
-            name = input_data['name_var'].get().strip()
-            
-            if not number and not name:
-                continue  # Skip empty rows
-            
-            if not number:
-                errors.append(f"Actuator {i+1}: Number is required")
-            elif not number.isdigit():
-                errors.append(f"Actuator {i+1}: Number must be numeric")
-            
-            if not name:
-                errors.append(f"Actuator {i+1}: Name is required")
-            elif not name.replace('_', '').replace('-', '').isalnum():
-                errors.append(f"Actuator {i+1}: Name should contain only alphanumeric characters, underscores, and hyphens")
-        
-        # Check for duplicate numbers
-        numbers = []
-        for input_data in self.actuator_inputs:
-            number = input_data['number_var'].get().strip()
-            if number:
-                if number in numbers:
-                    errors.append(f"Duplicate actuator number: {number}")
-                numbers.append(number)
-        
-        return errors
+    def validate_inputs(self, entries):
+        """Validate all inputs; returns an actuator_validation.ValidationResult"""
+        validator = ActuatorValidator(self.template_data.get('actuators', []), self.existing)
+        return validator.validate(entries)
+    
+    def focus_input(self, issue):
+        """Put the cursor into the entry an issue points to"""
+        if issue.row is None or issue.row >= len(self.actuator_inputs):
+            return
+        input_data = self.actuator_inputs[issue.row]
+        entry = input_data['number_entry'] if issue.field == "number" else input_data['name_entry']
+        entry.focus_set()
+        entry.select_range(0, tk.END)
     
     def generate_actuators(self):
         """Generate actuators and close dialog"""
         # Validate inputs
-        errors = self.validate_inputs()
-        if errors:
-            error_message = "Please fix the following errors:\n\n" + "\n".join(errors)
+        entries = self.read_entries()
+        result = self.validate_inputs(entries)
+        if not result.ok:
+            error_message = "Please fix the following errors:\n\n" + "\n".join(result.format())
             messagebox.showerror("Validation Error", error_message)
+            self.focus_input(result.errors[0])
             return
+        if result.warnings:
+            warning_message = "\n".join(result.format(result.warnings)) + "\n\nGenerate anyway?"
+            if not messagebox.askyesno("Validation Warning", warning_message):
+                self.focus_input(result.warnings[0])
+                return
         
         try:
-            generated_data = self.get_generated_data()
+            generated_data = self.get_generated_data(entries)
             
             if not generated_data:
                 messagebox.showwarning("Warning", "Please enter at least one actuator.")
@@ -0,0 +1,328 @@
+"""Validation of a batch of (actuator number, actuator name) entries.
+
+Every check is a set or dict lookup, so a batch validates in time linear in
+its size: duplicate numbers and names inside the batch, the name rules
+(compiled once at import), and collisions of the generated actuator numbers
+and tag names with those already in the target sheet or project
+(ExistingSymbols). Issues carry the 0-based row of the offending entry so
+the GUI and CLI can point at it.
+"""
+import re
+from collections import namedtuple
+from actuator_block import normalize_cell
+from column_mapping import normalize_header
+from schema import PLACEHOLDER, FIELDS_BY_KEY
+
+ERROR = "error"
+WARNING = "warning"
+
+# Longest tag name Logix Designer accepts
+MAX_TAG_LENGTH = 40
+# Logix Designer tag names: ASCII letters, digits and single underscores, starting with a
+# letter or an underscore and not ending with an underscore
+LOGIX_TAG_NAME = re.compile(r"^(?!.*__)[A-Za-z_][A-Za-z0-9_]*(?<!_)$")
+
+# row is the 0-based entry index (None for batch-wide issues); field is "number", "name" or "tag"
+ValidationIssue = namedtuple("ValidationIssue", "row field severity message")
+
+# (pattern that must match, message) per actuator name. The name becomes part of Logix
+# tag names, so the Logix rules apply: unlike the original check, hyphens and non-ASCII
+# letters are rejected, and so are a leading digit, "__" and a trailing underscore
+NAME_RULES = (
+    (re.compile(r"^[A-Za-z0-9_]+$"), "Name may contain only letters (A-Z), digits and underscores"),
+    (re.compile(r"^[A-Za-z_]"), "Name must start with a letter or an underscore"),
+    (re.compile(r"^(?!.*__)"), "Name must not contain two underscores in a row"),
+    (re.compile(r"^.*(?<!_)$"), "Name must not end with an underscore"),
+)
+# All of NAME_RULES in one pattern; the single rules only run to explain a failure
+VALID_NAME = LOGIX_TAG_NAME
+
+class ValidationResult:
+    """Issues found in a batch, in entry order"""
+    
+    def __init__(self, issues, entry_count):
+        self.issues = sorted(issues, key=lambda issue: (issue.row is not None, issue.row or 0))
+        self.entry_count = entry_count
+        self.errors = [issue for issue in self.issues if issue.severity == ERROR]
+        self.warnings = [issue for issue in self.issues if issue.severity == WARNING]
+    
+    @property
+    def ok(self):
+        return not self.errors
+    
+    def error_rows(self):
+        """0-based rows with at least one error"""
+        return sorted({issue.row for issue in self.errors if issue.row is not None})
+    
+    def format(self, issues=None, limit=25):
+        """One line per issue ("Actuator 3: ..."), at most limit lines"""
+        issues = self.errors if issues is None else issues
+        lines = [message_line(issue) for issue in issues[:limit]]
+        if len(issues) > limit:
+            lines.append(f"... and {len(issues) - limit} more")
+        return lines
+
+def message_line(issue):
+    """Text of an issue with the 1-based entry it belongs to"""
+    if issue.row is None:
+        return issue.message
+    return f"Actuator {issue.row + 1}: {issue.message}"
+
+# LOGIX_TAG_NAME and MAX_TAG_LENGTH in words, for messages
+LOGIX_TAG_RULE = (f"at most {MAX_TAG_LENGTH} letters, digits and single underscores, "
+                  "starting with a letter or an underscore and not ending with one")
+
+def is_logix_name(tag_name):
+    """True when Logix Designer accepts tag_name as a tag name"""
+    return len(tag_name) <= MAX_TAG_LENGTH and LOGIX_TAG_NAME.match(tag_name) is not None
+
+def normalize_number(number):
+    """Canonical actuator number ("_030" -> "30"), or None when it is not numeric"""
+    text = (number.strip() if isinstance(number, str) else normalize_cell(number)).lstrip("_")
+    if not text.isdigit():
+        return None
+    return str(int(text))
+
+class ExistingSymbols:
+    """Actuator numbers and tag names already used in a target sheet or project"""
+    
+    def __init__(self, source="the target"):
+        self.source = source
+        # tag name (case-insensitive, like Logix) -> actuator number
+        self.tags = {}
+        self.numbers = set()
+    
+    def __len__(self):
+        return len(self.tags)
+    
+    def add(self, actuator, tag_name):
+        """Record one row: its actuator number ("_30" or "30") and tag name"""
+        number = normalize_number(actuator)
+        if number is None:
+            return
+        self.numbers.add(number)
+        tag_name = normalize_cell(tag_name)
+        if tag_name:
+            self.tags.setdefault(tag_name.lower(), number)
+    
+    def update(self, other):
+        """Merge another symbol set into this one"""
+        self.numbers |= other.numbers
+        for tag_name, number in other.tags.items():
+            self.tags.setdefault(tag_name, number)
+        return self
+
+def symbols_from_rows(rows, source="the target sheet"):
+    """Symbols of sheet rows whose first two cells are Actuator and Name"""
+    symbols = ExistingSymbols(source)
+    for row in rows:
+        if len(row) > 1:
+            symbols.add(row[0], row[1])
+    return symbols
+
+def symbols_from_block(header_values, block_rows, source="the target sheet"):
+    """Symbols of an actuator block, taking the tag names from its Name column"""
+    name_header = normalize_header(FIELDS_BY_KEY["name"].header)
+    headers = [normalize_header(value) for value in header_values]
+    name_column = headers.index(name_header) if name_header in headers[1:] else 1
+    symbols = ExistingSymbols(source)
+    for row in block_rows:
+        if len(row) > name_column:
+            symbols.add(row[0], row[name_column])
+    return symbols
+
+def symbols_from_batches(batches, source="the queued batches"):
+    """Symbols of generated actuator batches (lists of actuator entries)"""
+    symbols = ExistingSymbols(source)
+    for batch in batches:
+        for actuator_data in batch:
+            for tag_name in tag_names_of(actuator_data['actuators'], actuator_data['actuator_name']):
+                symbols.add(actuator_data['actuator_number'], tag_name)
+    return symbols
+
+def tag_names_of(components, actuator_name):
+    """Generated tag names of one actuator"""
+    return [str(component.get('name', '')).replace(PLACEHOLDER, actuator_name)
+            for component in components if component.get('name')]
+
+class ActuatorValidator:
+    """Validate (number, name) entries for one template against existing symbols"""
+    
+    def __init__(self, components=(), existing=None):
+        # Component names split once into the text around {ActuatorName}
+        names = [str(component.get('name', '')) for component in components if component.get('name')]
+        self.tag_parts = [name.split(PLACEHOLDER) for name in names if PLACEHOLDER in name]
+        self.lower_parts = [[part.lower() for part in parts] for parts in self.tag_parts]
+        self.fixed_tags = [name for name in names if PLACEHOLDER not in name]
+        self.longest_extra = max((len("".join(parts)) for parts in self.tag_parts), default=0)
+        self.existing = existing if existing is not None else ExistingSymbols()
+    
+    def tag_names(self, name):
+        """Generated tag names for an actuator name"""
+        return [name.join(parts) for parts in self.tag_parts]
+    
+    def validate(self, entries):
+        """Check an iterable of (number, name) pairs; returns a ValidationResult"""
+        issues = []
+        numbers = {}
+        names = {}
+        # (row, canonical number, name) of the entries whose tags are checked
+        valid = []
+        count = 0
+        
+        for row, (number, name) in enumerate(entries):
+            count += 1
+            number = (number or "").strip()
+            name = (name or "").strip()
+            if not number and not name:
+                continue  # Empty rows are skipped
+            
+            canonical = None
+            if not number:
+                issues.append(ValidationIssue(row, "number", ERROR, "Number is required"))
+            else:
+                # Plain digits are the common case; only they skip normalize_number
+                canonical = number if number.isdigit() and number[0] != "0" else normalize_number(number)
+                if canonical is None:
+                    issues.append(ValidationIssue(row, "number", ERROR, "Number must be numeric"))
+                elif canonical in numbers:
+                    issues.append(ValidationIssue(row, "number", ERROR,
+                                                  f"Duplicate actuator number {number} (also actuator {numbers[canonical] + 1})"))
+                else:
+                    numbers[canonical] = row
+            
+            if not name:
+                issues.append(ValidationIssue(row, "name", ERROR, "Name is required"))
+                continue
+            
+            rule_failed = not VALID_NAME.match(name)
+            if rule_failed:
+                # Report the first rule that fails
+                for pattern, message in NAME_RULES:
+                    if not pattern.match(name):
+                        issues.append(ValidationIssue(row, "name", ERROR, message))
+                        break
+            if len(name) + self.longest_extra > MAX_TAG_LENGTH:
+                issues.append(ValidationIssue(row, "name", ERROR,
+                                              f"Generated tag names would exceed {MAX_TAG_LENGTH} characters"))
+            
+            key = name.lower()
+            if key in names:
+                issues.append(ValidationIssue(row, "name", ERROR,
+                                              f"Duplicate actuator name {name} (also actuator {names[key] + 1})"))
+                continue
+            names[key] = row
+            if not rule_failed:
+                valid.append((row, canonical, name))
+        
+        if valid and self.tag_parts:
+            issues.extend(self._check_tags(valid))
+        if len(names) > 1:
+            for tag_name in self.fixed_tags:
+                issues.append(ValidationIssue(None, "tag", WARNING,
+                                              f"Tag {tag_name} has no {PLACEHOLDER} and is generated by every actuator"))
+        return ValidationResult(issues, count)
+    
+    def _check_tags(self, valid):
+        """Issues of the generated tag names: collisions inside the batch and with existing symbols"""
+        existing = self.existing
+        count = len(valid)
+        keys = [name.lower() for _, _, name in valid]
+        # all_tags[j] is pattern j // count applied to valid[j % count]
+        all_tags = [key.join(parts) for parts in self.lower_parts for key in keys]
+        tag_set = set(all_tags)
+        issues = {}
+        
+        def tag_name(j):
+            return valid[j % count][2].join(self.tag_parts[j // count])
+        
+        if len(tag_set) < len(all_tags):
+            # Only when two entries generate the same tag is the batch walked tag by tag
+            first = {}
+            for j, tag in enumerate(all_tags):
+                i = j % count
+                other = first.setdefault(tag, i)
+                if other != i:
+                    later, earlier = max(i, other), min(i, other)
+                    if later not in issues:
+                        issues[later] = ValidationIssue(valid[later][0], "tag", ERROR,
+                                                        f"Tag {tag_name(j)} is also generated by actuator {valid[earlier][0] + 1}")
+        
+        if existing.numbers:
+            owners = {}
+            hits = tag_set & existing.tags.keys()
+            if hits:
+                for j, tag in enumerate(all_tags):
+                    if tag in hits:
+                        owners.setdefault(j % count, []).append((j, existing.tags[tag]))
+            
+            for i, (row, canonical, name) in enumerate(valid):
+                if i in issues or (i not in owners and canonical not in existing.numbers):
+                    continue
+                tag_owners = owners.get(i, ())
+                conflict = next(((j, owner) for j, owner in tag_owners if owner != canonical), None)
+                if conflict:
+                    issues[i] = ValidationIssue(row, "tag", ERROR,
+                                                f"Tag {tag_name(conflict[0])} already exists for actuator _{conflict[1]} in {existing.source}")
+                elif tag_owners:
+                    # Same actuator generated again (skip/upsert inserts leave it alone)
+                    issues[i] = ValidationIssue(row, "number", WARNING,
+                                                f"Actuator _{canonical} is already in {existing.source}")
+                else:
+                    issues[i] = ValidationIssue(row, "number", ERROR,
+                                                f"Actuator number _{canonical} is already used by other tags in {existing.source}")
+        return list(issues.values())
+
+def validate_mixed(entries, components_of, existing=None):
+    """Check (template, number, name) entries of several templates; returns a ValidationResult
+    
+    components_of(template name) returns the template's components, or None
+    when it does not exist. The entries of each template are validated
+    together, then numbers and generated tag names are checked across the
+    templates. Rows of the issues are positions in entries.
+    """
+    issues = []
+    count = 0
+    # template name -> [(row, number, name)]
+    groups = {}
+    for row, (template_name, number, name) in enumerate(entries):
+        count += 1
+        if not (number or "").strip() and not (name or "").strip():
+            continue  # Empty rows are skipped
+        groups.setdefault(template_name, []).append((row, number, name))
+    
+    # Each template's components are looked up once
+    components = {}
+    for template_name, rows in groups.items():
+        components[template_name] = components_of(template_name) if template_name else None
+        if components[template_name] is None:
+            message = f"Template '{template_name}' not found" if template_name else "Template is required"
+            issues.extend(ValidationIssue(row, "template", ERROR, message) for row, _, _ in rows)
+            continue
+        result = ActuatorValidator(components[template_name], existing).validate(
+            (number, name) for _, number, name in rows)
+        issues.extend(issue._replace(row=rows[issue.row][0]) if issue.row is not None else issue
+                      for issue in result.issues)
+    
+    # Numbers and tags used by entries of another template (same-template repeats are reported above)
+    numbers = {}
+    tags = {}
+    for row, template_name, number, name in sorted((row, template_name, number, name)
+                                                  for template_name, rows in groups.items()
+                                                  if components[template_name] is not None
+                                                  for row, number, name in rows):
+        canonical = normalize_number(number or "")
+        if canonical is None or not (name or "").strip():
+            continue
+        other = numbers.setdefault(canonical, (row, template_name))
+        if other[1] != template_name:
+            issues.append(ValidationIssue(row, "number", ERROR,
+                                          f"Duplicate actuator number {number} (also actuator {other[0] + 1})"))
+            continue
+        for tag_name in tag_names_of(components[template_name], name.strip()):
+            other = tags.setdefault(tag_name.lower(), (row, template_name))
+            if other[1] != template_name:
+                issues.append(ValidationIssue(row, "tag", ERROR,
+                                              f"Tag {tag_name} is also generated by actuator {other[0] + 1}"))
+                break
+    return ValidationResult(issues, count)
@@ -0,0 +1,55 @@
+"""Atomic replacement of files written by the application.
+
+A file is written to a temporary file in the same directory and moved over
+the target with os.replace, so readers see either the old or the new file.
+The temporary file is created with the permissions a plain open() would
+give it (0666 minus the umask), and a file that is replaced keeps its
+permissions, unlike tempfile.mkstemp which always creates 0600 files.
+"""
+import os
+import stat
+from contextlib import contextmanager
+
+TEMP_PREFIX = ".~atm_"
+
+_TEMP_FLAGS = (os.O_RDWR | os.O_CREAT | os.O_EXCL
+               | getattr(os, "O_BINARY", 0) | getattr(os, "O_NOINHERIT", 0))
+
+def create_temp_file(file_path, suffix=None):
+    """Create a temporary file next to file_path; returns (fd, temp_path)
+    
+    suffix defaults to the extension of file_path.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    if suffix is None:
+        suffix = os.path.splitext(file_path)[1]
+    while True:
+        temp_path = os.path.join(directory, f"{TEMP_PREFIX}{os.urandom(6).hex()}{suffix}")
+        try:
+            return os.open(temp_path, _TEMP_FLAGS, 0o666), temp_path
+        except FileExistsError:
+            continue
+
+def replace_file(temp_path, file_path):
+    """Move temp_path over file_path, keeping the permissions of the file it replaces"""
+    try:
+        os.chmod(temp_path, stat.S_IMODE(os.stat(file_path).st_mode))
+    except FileNotFoundError:
+        pass
+    os.replace(temp_path, file_path)
+
+def discard_temp_file(temp_path):
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+@contextmanager
+def atomic_write(file_path, suffix=None):
+    """Yield a temporary path to write; it replaces file_path when the block succeeds"""
+    fd, temp_path = create_temp_file(file_path, suffix)
+    os.close(fd)
+    try:
+        yield temp_path
+        replace_file(temp_path, file_path)
+    except Exception:
+        discard_temp_file(temp_path)
+        raise
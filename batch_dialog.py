@@ -0,0 +1,240 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from actuator_batch import build_mixed_batch
+from actuator_validation import validate_mixed
+
+class BatchDialog:
+    """Actuators of several templates (one template per line) generated in one pass"""
+    
+    def __init__(self, parent, template_manager, existing=None, template_name=None):
+        self.parent = parent
+        self.template_manager = template_manager
+        self.result = None
+        
+        # Actuator numbers and tag names already in the project (actuator_validation.ExistingSymbols)
+        self.existing = existing
+        self.template_names = sorted(template_manager.get_template_index())
+        self.default_template = template_name or (self.template_names[0] if self.template_names else "")
+        
+        # Create dialog window
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Mixed Template Batch")
+        self.dialog.geometry("900x700")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        # Center the dialog
+        self.dialog.update_idletasks()
+        x = (self.dialog.winfo_screenwidth() // 2) - (450)
+        y = (self.dialog.winfo_screenheight() // 2) - (350)
+        self.dialog.geometry(f"900x700+{x}+{y}")
+        
+        # Store actuator inputs
+        self.actuator_inputs = []
+        
+        self.create_widgets()
+        
+        # Wait for dialog to close
+        self.dialog.wait_window()
+    
+    def create_widgets(self):
+        # Main frame
+        main_frame = ttk.Frame(self.dialog, padding="15")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Dialog buttons - fixed at bottom
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=(20, 10))
+        
+        ttk.Button(button_frame, text="Generate",
+                  command=self.generate_actuators).pack(side=tk.RIGHT, padx=(10, 0))
+        ttk.Button(button_frame, text="Cancel",
+                  command=self.cancel).pack(side=tk.RIGHT)
+        self.summary_label = ttk.Label(button_frame, text="", foreground="gray")
+        self.summary_label.pack(side=tk.LEFT)
+        
+        # Actuators input section
+        input_frame = ttk.LabelFrame(main_frame, text="Actuators", padding="10")
+        input_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Instructions
+        instructions = """Instructions:
+• Each line names its own template, so a whole station is generated at once
+• Each template is read once, however many actuators use it
+• The generated actuators are sorted by number and exported or inserted in one operation
+• Paste Lines reads TEMPLATE, NUMBER, NAME lines copied from Excel (tab, comma or semicolon separated)"""
+        
+        ttk.Label(input_frame, text=instructions, justify=tk.LEFT,
+                 foreground="blue").pack(anchor=tk.W, pady=(0, 10))
+        
+        # Buttons for managing actuators
+        actuator_btn_frame = ttk.Frame(input_frame)
+        actuator_btn_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=(10, 0))
+        
+        ttk.Button(actuator_btn_frame, text="+ Add Another Actuator",
+                  command=self.add_actuator_input).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(actuator_btn_frame, text="- Remove Last",
+                  command=self.remove_last_actuator).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(actuator_btn_frame, text="📋 Paste Lines",
+                  command=self.paste_lines).pack(side=tk.LEFT)
+        
+        # Scrollable frame for actuator inputs
+        canvas = tk.Canvas(input_frame, height=350)
+        scrollbar = ttk.Scrollbar(input_frame, orient="vertical", command=canvas.yview)
+        self.scrollable_frame = ttk.Frame(canvas)
+        
+        self.scrollable_frame.bind(
+            "<Configure>",
+            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
+        )
+        
+        canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
+        canvas.configure(yscrollcommand=scrollbar.set)
+        
+        canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        
+        # Column headings
+        ttk.Label(self.scrollable_frame, text="Template").grid(row=0, column=1, sticky=tk.W, padx=(0, 10))
+        ttk.Label(self.scrollable_frame, text="Number").grid(row=0, column=2, sticky=tk.W, padx=(0, 10))
+        ttk.Label(self.scrollable_frame, text="Name").grid(row=0, column=3, sticky=tk.W)
+        
+        # Add first actuator input
+        self.add_actuator_input()
+    
+    def add_actuator_input(self, template_name=None, number="", name=""):
+        """Add input fields for a new actuator (the template of the line above by default)"""
+        row = len(self.actuator_inputs) + 1
+        if template_name is None:
+            template_name = (self.actuator_inputs[-1]['template_var'].get() if self.actuator_inputs
+                             else self.default_template)
+        
+        label = ttk.Label(self.scrollable_frame, text=f"{row}.")
+        label.grid(row=row, column=0, sticky=tk.W, padx=(0, 10), pady=2)
+        
+        template_var = tk.StringVar(value=template_name)
+        template_combo = ttk.Combobox(self.scrollable_frame, textvariable=template_var,
+                                      values=self.template_names, width=30)
+        template_combo.grid(row=row, column=1, sticky=tk.W, padx=(0, 10), pady=2)
+        
+        number_var = tk.StringVar(value=number)
+        number_entry = ttk.Entry(self.scrollable_frame, textvariable=number_var, width=12)
+        number_entry.grid(row=row, column=2, sticky=tk.W, padx=(0, 10), pady=2)
+        
+        name_var = tk.StringVar(value=name)
+        name_entry = ttk.Entry(self.scrollable_frame, textvariable=name_var, width=25)
+        name_entry.grid(row=row, column=3, sticky=tk.W, pady=2)
+        for var in (template_var, number_var, name_var):
+            var.trace_add("write", lambda *args: self.update_summary())
+        
+        self.actuator_inputs.append({
+            'widgets': (label, template_combo, number_entry, name_entry),
+            'template_var': template_var,
+            'number_var': number_var,
+            'name_var': name_var,
+            'template_combo': template_combo,
+            'number_entry': number_entry,
+            'name_entry': name_entry,
+        })
+        
+        if not number:
+            number_entry.focus()
+        self.update_summary()
+    
+    def remove_last_actuator(self):
+        """Remove the last actuator input"""
+        if len(self.actuator_inputs) > 1:
+            for widget in self.actuator_inputs.pop()['widgets']:
+                widget.destroy()
+            self.update_summary()
+    
+    def paste_lines(self):
+        """Add TEMPLATE, NUMBER, NAME lines from the clipboard"""
+        try:
+            text = self.dialog.clipboard_get()
+        except tk.TclError:
+            messagebox.showwarning("Paste Lines", "The clipboard is empty.")
+            return
+        
+        lines = []
+        for line in text.splitlines():
+            separator = next((character for character in "\t;," if character in line), None)
+            cells = [cell.strip() for cell in line.split(separator)] if separator else [line.strip()]
+            if len(cells) >= 3 and cells[0] and not cells[0].startswith("#"):
+                lines.append((cells[0], cells[1].lstrip("_"), cells[2]))
+        if not lines:
+            messagebox.showwarning("Paste Lines", "No TEMPLATE, NUMBER, NAME lines found in the clipboard.")
+            return
+        
+        # Fill an empty last line first
+        last = self.actuator_inputs[-1]
+        if not last['number_var'].get().strip() and not last['name_var'].get().strip():
+            template_name, number, name = lines.pop(0)
+            last['template_var'].set(template_name)
+            last['number_var'].set(number)
+            last['name_var'].set(name)
+        for template_name, number, name in lines:
+            self.add_actuator_input(template_name, number, name)
+        self.update_summary()
+    
+    def read_entries(self):
+        """Read the (template, number, name) of every input row once"""
+        return [(input_data['template_var'].get().strip(),
+                 input_data['number_var'].get().strip().lstrip("_"),
+                 input_data['name_var'].get().strip())
+                for input_data in self.actuator_inputs]
+    
+    def update_summary(self):
+        """Show how many actuators and templates the batch has"""
+        entries = [entry for entry in self.read_entries() if entry[1] or entry[2]]
+        templates = {template_name for template_name, _, _ in entries}
+        self.summary_label.config(text=f"{len(entries)} actuator(s) from {len(templates)} template(s)")
+    
+    def components_of(self, template_name):
+        """Components of a template, or None if it does not exist"""
+        template_data = self.template_manager.get_template(template_name)
+        return template_data.get('actuators', []) if template_data else None
+    
+    def focus_input(self, issue):
+        """Put the cursor into the entry an issue points to"""
+        if issue.row is None or issue.row >= len(self.actuator_inputs):
+            return
+        input_data = self.actuator_inputs[issue.row]
+        widget = {"template": input_data['template_combo'],
+                  "number": input_data['number_entry']}.get(issue.field, input_data['name_entry'])
+        widget.focus_set()
+        widget.select_range(0, tk.END)
+    
+    def generate_actuators(self):
+        """Validate the lines, generate every actuator sorted by number and close the dialog"""
+        entries = self.read_entries()
+        result = validate_mixed(entries, self.components_of, self.existing)
+        if not result.ok:
+            error_message = "Please fix the following errors:\n\n" + "\n".join(result.format())
+            messagebox.showerror("Validation Error", error_message)
+            self.focus_input(result.errors[0])
+            return
+        if result.warnings:
+            warning_message = "\n".join(result.format(result.warnings)) + "\n\nGenerate anyway?"
+            if not messagebox.askyesno("Validation Warning", warning_message):
+                self.focus_input(result.warnings[0])
+                return
+        
+        try:
+            generated_data = build_mixed_batch(self.template_manager,
+                                               [entry for entry in entries if entry[1] or entry[2]])
+            
+            if not generated_data:
+                messagebox.showwarning("Warning", "Please enter at least one actuator.")
+                return
+            
+            self.result = generated_data
+            self.dialog.destroy()
+        
+        except Exception as e:
+            messagebox.showerror("Error", f"Error generating actuators: {str(e)}")
+    
+    def cancel(self):
+        """Cancel and close dialog"""
+        self.result = None
+        self.dialog.destroy()
@@ -0,0 +1,229 @@
+"""COM round-trip benchmark of the Excel insert and detection paths.
+
+Runs insert_into_excel and detect_excel_files against the in-process fake
+Excel object model (benchmarks/fake_excel.py) and reports COM calls and
+simulated time per inserted row. Every insert case checks the rows left in
+the fake sheet, so a fast but wrong insert fails the run. Call counts are
+deterministic, so compare fails on any increase by default:
+
+Usage:
+    python benchmarks/bench_com.py run --output com_results.json
+    python benchmarks/bench_com.py run --latency-ms 0.5 --existing-rows 2000
+    python benchmarks/bench_com.py compare com_baseline.json com_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from actuator_block import row_key, INSERT_APPEND, INSERT_SKIP, INSERT_UPSERT, ORDER_END, ORDER_SORTED
+from bench_suite import make_template, make_batch
+from excel_generator import ExcelGenerator
+from excel_session import ExcelSession
+from fake_excel import FakeExcelApplication
+
+BATCH_SIZES = (1, 10, 100)
+COMPONENT_COUNT = 8
+
+# (case, mode, order, batch already in the sheet); every case must leave the existing
+# rows followed by the batch's rows (numbered above the existing ones) in the block,
+# except the sorted one, whose batch is numbered in between the existing actuators
+INSERT_CASES = (
+    ("insert_append", INSERT_APPEND, ORDER_END, False),
+    ("insert_sorted", INSERT_APPEND, ORDER_SORTED, False),
+    ("insert_skip_new", INSERT_SKIP, ORDER_END, False),
+    ("insert_skip_existing", INSERT_SKIP, ORDER_END, True),
+    ("insert_upsert_existing", INSERT_UPSERT, ORDER_END, True),
+)
+
+def make_sheet_rows(existing_rows, headers):
+    """Header, existing_rows data rows numbered _2, _4, ... and 'Actuator End'"""
+    rows = [list(headers)]
+    for i in range(existing_rows):
+        rows.append([f"_{2 * (i // COMPONENT_COUNT + 1)}", f"Existing{i}"])
+    rows.append(["Actuator End"])
+    return rows
+
+def interleave(batch):
+    """The batch renumbered _1, _3, ..., so its actuators sort in between the existing ones"""
+    return [dict(actuator_data, actuator_number=str(2 * i + 1)) for i, actuator_data in enumerate(batch)]
+
+def actuator_order(row):
+    return int(str(row[0]).lstrip("_"))
+
+def check_sheet(case, worksheet, expected_rows):
+    """Fail unless the block holds expected_rows in order with 'Actuator End' right below"""
+    values = worksheet.values(2)
+    end_rows = [row for row, value in enumerate(values, 1) if row_key(value)[0].lower() == "actuator end"]
+    expected_end = len(expected_rows) + 2
+    if end_rows != [expected_end]:
+        raise RuntimeError(f"{case}: 'Actuator End' at rows {end_rows}, expected row {expected_end}")
+    for row, (value, expected_row) in enumerate(zip(values[1:expected_end - 1], expected_rows), 2):
+        if row_key(value) != row_key(expected_row):
+            raise RuntimeError(f"{case}: sheet row {row} holds {row_key(value)}, "
+                               f"expected {row_key(expected_row)}")
+
+def make_excel(latency_ms, existing_rows, headers, workbooks=1, sheets=1):
+    """Fake Excel with the target workbook first; returns (app, target sheet)"""
+    app = FakeExcelApplication(latency_ms=latency_ms)
+    target = None
+    for i in range(workbooks):
+        workbook = app.add_workbook(f"Book{i + 1}.xlsx", path=f"C:\\Plants\\Book{i + 1}.xlsx")
+        for j in range(sheets):
+            rows = make_sheet_rows(existing_rows, headers) if i == 0 and j == 0 else None
+            worksheet = workbook.add_worksheet(f"Sheet{j + 1}", rows)
+            target = target or worksheet
+    return app, target
+
+class ComBenchmarkRunner:
+    def __init__(self, latency_ms=0.25, existing_rows=240, batch_sizes=BATCH_SIZES):
+        self.latency_ms = latency_ms
+        self.existing_rows = existing_rows
+        self.batch_sizes = batch_sizes
+        self.results = {}
+    
+    def record(self, case, params, app, rows, wall_s):
+        """Store the COM statistics of one case"""
+        stats = app.stats
+        per_row = stats.calls / rows if rows else float(stats.calls)
+        self.results[case] = {
+            "params": params,
+            "rows": rows,
+            "calls": stats.calls,
+            "calls_per_row": per_row,
+            "simulated_ms": stats.simulated_ms,
+            "simulated_ms_per_row": stats.simulated_ms / rows if rows else stats.simulated_ms,
+            "wall_s": wall_s,
+            "top_calls": dict(stats.by_name.most_common(5)),
+        }
+        print(f"{case:<44} {stats.calls:8,} calls  {per_row:8.1f} calls/row  "
+              f"{stats.simulated_ms:10.1f} ms simulated")
+    
+    def run(self):
+        """Run every insert case and the detection cases"""
+        template_data = make_template("SyntheticCom", COMPONENT_COUNT)
+        for actuator_count in self.batch_sizes:
+            for case, mode, order, preload in INSERT_CASES:
+                self.run_insert_case(case, template_data, actuator_count, mode, order, preload)
+        self.run_detect_cases()
+        return self.results
+    
+    def run_insert_case(self, case, template_data, actuator_count, mode, order, preload):
+        """Count the COM calls of one insert into a fresh fake sheet"""
+        generator = ExcelGenerator()
+        app, worksheet = make_excel(self.latency_ms, self.existing_rows, generator.column_headers)
+        generator.excel_session = ExcelSession(connect=lambda: app)
+        batch = make_batch("SyntheticCom", template_data, actuator_count)
+        existing_rows = make_sheet_rows(self.existing_rows, generator.column_headers)[1:-1]
+        if order == ORDER_SORTED:
+            # Stable sort: each batch group lands right after the existing group below its number
+            batch = interleave(batch)
+            expected_rows = sorted(existing_rows + generator.generate_excel_rows(batch), key=actuator_order)
+        else:
+            expected_rows = existing_rows + generator.generate_excel_rows(batch)
+        
+        if preload:
+            generator.insert_into_excel(batch)
+            app.stats.reset()
+        
+        start = time.perf_counter()
+        success, message = generator.insert_into_excel(batch, mode=mode, order=order)
+        wall_s = time.perf_counter() - start
+        if not success:
+            raise RuntimeError(f"{case} failed: {message}")
+        check_sheet(f"{case}[n={actuator_count}]", worksheet, expected_rows)
+        
+        params = {"actuators": actuator_count, "components": COMPONENT_COUNT,
+                  "existing_rows": self.existing_rows, "mode": mode, "order": order}
+        self.record(f"{case}[n={actuator_count}]", params, app,
+                    actuator_count * COMPONENT_COUNT, wall_s)
+    
+    def run_detect_cases(self, workbooks=5, sheets=10):
+        """Count the COM calls of a first and a repeated (cached) detection"""
+        app, _ = make_excel(self.latency_ms, 0, ["Actuator", "Name"], workbooks, sheets)
+        generator = ExcelGenerator(ExcelSession(connect=lambda: app))
+        params = {"workbooks": workbooks, "sheets": sheets}
+        for case in ("detect", "detect_cached"):
+            app.stats.reset()
+            start = time.perf_counter()
+            success, result = generator.detect_excel_files()
+            if not success:
+                raise RuntimeError(f"{case} failed: {result}")
+            self.record(f"{case}[w={workbooks},s={sheets}]", params, app, 0,
+                        time.perf_counter() - start)
+
+def run_command(args):
+    """Run the COM benchmark and write the results as JSON"""
+    runner = ComBenchmarkRunner(latency_ms=args.latency_ms, existing_rows=args.existing_rows)
+    results = runner.run()
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_ms": args.latency_ms,
+            "existing_rows": args.existing_rows,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {len(results)} results to {args.output}")
+    return 0
+
+def compare_command(args):
+    """Print calls per row side by side and fail when a case needs more COM calls"""
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f).get("results", {})
+    with open(args.current, "r", encoding="utf-8") as f:
+        current = json.load(f).get("results", {})
+    
+    regressions = []
+    print(f"{'case':<44} {'base calls':>11} {'new calls':>10} {'ratio':>7}")
+    for case in sorted(set(baseline) & set(current)):
+        base_calls = baseline[case]["calls"]
+        new_calls = current[case]["calls"]
+        ratio = new_calls / base_calls if base_calls else float("inf")
+        regressed = new_calls > base_calls * (1 + args.threshold)
+        if regressed:
+            regressions.append(case)
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{case:<44} {base_calls:11,} {new_calls:10,} {ratio:7.2f}{flag}")
+    
+    if regressions:
+        print(f"\n{len(regressions)} case(s) need more COM calls than the baseline")
+        return 1
+    print("\nNo COM call regressions")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="COM round-trip benchmark against a fake Excel")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    run_parser = subparsers.add_parser("run", help="Run the COM benchmark")
+    run_parser.add_argument("--output", default="com_results.json")
+    run_parser.add_argument("--latency-ms", type=float, default=0.25,
+                            help="Simulated latency of one COM round trip (default 0.25 ms)")
+    run_parser.add_argument("--existing-rows", type=int, default=240,
+                            help="Data rows already in the target block")
+    
+    compare_parser = subparsers.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.0,
+                                help="Allowed increase in COM calls before flagging (default 0)")
+    
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        return run_command(args)
+    return compare_command(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
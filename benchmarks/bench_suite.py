@@ -0,0 +1,430 @@
+"""Benchmark suite for the generate/export pipeline and template I/O.
+
+Runs headless (no Tk window, no Excel); pyperclip is stubbed out.
+
+Usage:
+    python benchmarks/bench_suite.py run --output bench_results.json
+    python benchmarks/bench_suite.py run --quick
+    python benchmarks/bench_suite.py compare baseline.json bench_results.json --threshold 0.10
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from openpyxl import Workbook, load_workbook
+
+import excel_generator
+from actuator_batch import build_mixed_batch
+from actuator_block import row_key, INSERT_SKIP, ORDER_SORTED
+from actuator_validation import ActuatorValidator
+from excel_generator import ExcelGenerator
+from offline_excel import OfflineWorkbookInserter
+from paste_parser import parse_pasted_actuators
+from row_cache import RowCache
+from schema import FIELD_KEYS
+from template_manager import TemplateManager
+from template_history import ACTION_DELETE
+
+COMPONENT_COUNTS = (1, 8, 50)
+BATCH_SIZES = (10, 1000, 100000)
+STORE_SIZES = (10, 100, 1000)
+
+QUICK_COMPONENT_COUNTS = (1, 8)
+QUICK_BATCH_SIZES = (10, 1000)
+QUICK_STORE_SIZES = (10, 100)
+
+# Actuators of the mixed-template batch case, spread over every template of the store
+MIXED_BATCH_SIZE = 1000
+
+# Actuators already in the workbook of the offline insert cases (625 x 8 = 5,000 block rows)
+OFFLINE_BLOCK_ACTUATORS = 625
+# Actuator groups sorted in between the existing ones, one block each
+OFFLINE_INTERLEAVED_GROUPS = 200
+
+def make_component(index):
+    """Build one synthetic template component with realistic placeholders"""
+    component = {key: "" for key in FIELD_KEYS}
+    component.update({
+        "name": "{ActuatorName}" if index == 0 else f"{{ActuatorName}}_Comp{index}",
+        "index": index,
+        "datatype": f"Act_Synthetic{index % 5}",
+        "input": f"Murr_IO:I.Data[{index % 32:02d}].{index % 8}",
+        "inp_descr": f"I1{index:05d}",
+        "alm1": "2",
+        "alm1_descr_lang1": "{ActuatorName} Error",
+        "alm1_descr_lang2": "{ActuatorName} Fehler",
+        "alm1_descr_lang3": "{ActuatorName} Erreur",
+        "alm1_procedure": f"P{index}",
+        "alm1_bad": "x",
+        "alm1_cause": "_Loose / unteached / broken sensor\r\n_Mechanical blocage during sequence",
+        "alm1_action": "_Check sensor functionality or adjust\r\n_Inspect the station",
+    })
+    return component
+
+def make_template(name, component_count):
+    """Build a synthetic template with the given number of components"""
+    return {
+        "name": name,
+        "description": f"Synthetic template with {component_count} components",
+        "actuators": [make_component(i) for i in range(component_count)],
+        "last_modified": "2025-01-01T00:00:00",
+    }
+
+def make_batch(template_name, template_data, actuator_count):
+    """Build generated actuator data shaped like ActuatorDialog.get_generated_data"""
+    template_hash = RowCache.hash_components(template_data["actuators"])
+    return [
+        {
+            "actuator_number": str(100 + i),
+            "actuator_name": f"Axis{i}",
+            "template_name": template_name,
+            "template_hash": template_hash,
+            "actuators": template_data["actuators"],
+        }
+        for i in range(actuator_count)
+    ]
+
+def make_block_workbook(file_path, headers, rows):
+    """Workbook with the header row, rows as the actuator block and 'Actuator End'"""
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Actuators"
+    worksheet.append(list(headers))
+    for row in rows:
+        worksheet.append(list(row))
+    worksheet.append(["Actuator End"])
+    workbook.save(file_path)
+
+def check_block(case, file_path, expected_rows):
+    """Fail when the block of a workbook does not hold exactly expected_rows, in order"""
+    workbook = load_workbook(file_path, read_only=True)
+    try:
+        values = [row[:2] for row in workbook.active.iter_rows(min_row=2, max_col=2, values_only=True)]
+    finally:
+        workbook.close()
+    keys = [row_key(row) for row in values]
+    expected = [row_key(row) for row in expected_rows] + [("Actuator End", "")]
+    if len(keys) != len(expected):
+        raise RuntimeError(f"{case}: the block has {len(keys) - 1} rows, expected {len(expected) - 1}")
+    for offset, (key, expected_key) in enumerate(zip(keys, expected)):
+        if key != expected_key:
+            raise RuntimeError(f"{case}: sheet row {offset + 2} holds {key}, expected {expected_key}")
+
+def check_delete_restore(case, manager, template_name):
+    """Fail unless a template without a history can be deleted and restored"""
+    if manager.history.latest_version(template_name):
+        raise RuntimeError(f"{case}: '{template_name}' already has a history")
+    template_data = dict(manager.get_template(template_name))
+    if not manager.delete_template(template_name):
+        raise RuntimeError(f"{case}: deleting '{template_name}' failed")
+    versions = [info.version for info in manager.history.versions(template_name) if info.action != ACTION_DELETE]
+    if not versions:
+        raise RuntimeError(f"{case}: deleting '{template_name}' left no version to restore")
+    if not manager.restore_version(template_name, versions[-1]):
+        raise RuntimeError(f"{case}: restoring '{template_name}' failed")
+    restored = dict(manager.get_template(template_name))
+    restored.pop("last_modified", None)
+    template_data.pop("last_modified", None)
+    if restored != template_data:
+        raise RuntimeError(f"{case}: '{template_name}' was not restored as it was deleted")
+
+def measure(func, repeat, setup=None):
+    """Run func repeat times and return the wall time of each run in seconds"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+class BenchmarkRunner:
+    def __init__(self, repeat=5, max_rows=1000000, max_xlsx_rows=200000, quick=False):
+        self.repeat = repeat
+        self.max_rows = max_rows
+        self.max_xlsx_rows = max_xlsx_rows
+        self.component_counts = QUICK_COMPONENT_COUNTS if quick else COMPONENT_COUNTS
+        self.batch_sizes = QUICK_BATCH_SIZES if quick else BATCH_SIZES
+        self.store_sizes = QUICK_STORE_SIZES if quick else STORE_SIZES
+        self.results = {}
+        self.skipped = []
+        self.work_dir = tempfile.mkdtemp(prefix="atm_bench_")
+    
+    def _repeat_for(self, rows):
+        """Large cases are expensive enough to time once"""
+        return self.repeat if rows <= 100000 else 1
+    
+    def record(self, case, group, params, timings, rows=0, payload_bytes=0):
+        """Store the timings of one case"""
+        self.results[case] = {
+            "group": group,
+            "params": params,
+            "rows": rows,
+            "bytes": payload_bytes,
+            "repeat": len(timings),
+            "min_s": min(timings),
+            "median_s": statistics.median(timings),
+            "mean_s": statistics.mean(timings),
+        }
+        print(f"{case:<48} median {statistics.median(timings) * 1000:10.2f} ms  ({len(timings)} runs)")
+    
+    def skip(self, case, reason):
+        """Record a case that was not run"""
+        self.skipped.append({"case": case, "reason": reason})
+        print(f"{case:<48} skipped ({reason})")
+    
+    def run(self):
+        """Run every benchmark group"""
+        # Keep the clipboard untouched; only the payload building is measured
+        excel_generator.pyperclip.copy = lambda text: None
+        try:
+            for component_count in self.component_counts:
+                template_name = f"Synthetic{component_count}"
+                template_data = make_template(template_name, component_count)
+                for actuator_count in self.batch_sizes:
+                    self.run_generation_cases(template_name, template_data, actuator_count)
+            self.run_template_store_cases()
+            self.run_offline_insert_cases()
+        finally:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+        return self.results
+    
+    def run_generation_cases(self, template_name, template_data, actuator_count):
+        """Time row generation, clipboard payload, xlsx export and paste parsing"""
+        component_count = len(template_data["actuators"])
+        rows = component_count * actuator_count
+        params = {"components": component_count, "actuators": actuator_count}
+        suffix = f"[c={component_count},n={actuator_count}]"
+        
+        if self.max_rows and rows > self.max_rows:
+            for group in ("generate_rows", "clipboard", "xlsx", "paste_parse", "validate"):
+                self.skip(group + suffix, f"{rows} rows exceeds --max-rows")
+            return
+        
+        generator = ExcelGenerator()
+        batch = make_batch(template_name, template_data, actuator_count)
+        repeat = self._repeat_for(rows)
+        
+        timings = measure(lambda: generator.generate_excel_rows(batch), repeat,
+                          setup=generator.row_cache.clear)
+        self.record("generate_rows" + suffix, "generate_rows", params, timings, rows)
+        
+        if actuator_count <= generator.row_cache.max_entries:
+            generator.generate_excel_rows(batch)
+            timings = measure(lambda: generator.generate_excel_rows(batch), repeat)
+            self.record("generate_rows_cached" + suffix, "generate_rows_cached", params, timings, rows)
+        
+        captured = {}
+        def capture(text):
+            captured["bytes"] = len(text.encode("utf-8"))
+        excel_generator.pyperclip.copy = capture
+        timings = measure(lambda: generator.copy_to_clipboard(batch), repeat,
+                          setup=generator.row_cache.clear)
+        excel_generator.pyperclip.copy = lambda text: None
+        self.record("clipboard" + suffix, "clipboard", params, timings, rows, captured.get("bytes", 0))
+        
+        if self.max_xlsx_rows and rows > self.max_xlsx_rows:
+            self.skip("xlsx" + suffix, f"{rows} rows exceeds --max-xlsx-rows")
+        else:
+            file_path = os.path.join(self.work_dir, "bench.xlsx")
+            timings = measure(lambda: generator.generate_excel_file(batch, file_path), repeat,
+                              setup=generator.row_cache.clear)
+            self.record("xlsx" + suffix, "xlsx", params, timings, rows, os.path.getsize(file_path))
+        
+        paste_text = "\n".join("\t".join(str(cell) for cell in row)
+                               for row in generator.generate_excel_rows(batch))
+        timings = measure(lambda: parse_pasted_actuators(paste_text), repeat)
+        self.record("paste_parse" + suffix, "paste_parse", params, timings, rows,
+                    len(paste_text.encode("utf-8")))
+        
+        entries = [(entry["actuator_number"], entry["actuator_name"]) for entry in batch]
+        validator = ActuatorValidator(template_data["actuators"])
+        timings = measure(lambda: validator.validate(entries), repeat)
+        self.record("validate" + suffix, "validate", params, timings, rows)
+    
+    def run_template_store_cases(self):
+        """Time TemplateManager load and save at growing store sizes"""
+        original_cwd = os.getcwd()
+        for store_size in self.store_sizes:
+            store_dir = os.path.join(self.work_dir, f"store_{store_size}")
+            os.makedirs(os.path.join(store_dir, "templates"))
+            store = {f"Synthetic_{i}": make_template(f"Synthetic_{i}", 8) for i in range(store_size)}
+            store_path = os.path.join(store_dir, "templates", "templates.json")
+            with open(store_path, "w", encoding="utf-8") as f:
+                json.dump(store, f, indent=2, ensure_ascii=False)
+            
+            params = {"templates": store_size}
+            os.chdir(store_dir)
+            try:
+                timings = measure(TemplateManager, self.repeat)
+                self.record(f"store_load[t={store_size}]", "store_load", params, timings,
+                            payload_bytes=os.path.getsize(store_path))
+                manager = TemplateManager()
+                # A template that is not resident yet, read from the snapshot
+                timings = measure(lambda: manager.get_template(f"Synthetic_{store_size - 1}"),
+                                  self.repeat, setup=manager._resident.clear)
+                self.record(f"template_get[t={store_size}]", "template_get", params, timings)
+                # Lines cycling through the templates, built cold (each template read once)
+                entries = [(f"Synthetic_{i % store_size}", str(100 + i), f"Axis{i}")
+                           for i in range(MIXED_BATCH_SIZE)]
+                timings = measure(lambda: build_mixed_batch(manager, entries), self.repeat,
+                                  setup=manager._resident.clear)
+                self.record(f"mixed_batch[t={store_size}]", "mixed_batch", params, timings,
+                            rows=MIXED_BATCH_SIZE * 8)
+                timings = measure(manager.save_templates, self.repeat)
+                self.record(f"store_save[t={store_size}]", "store_save", params, timings,
+                            payload_bytes=os.path.getsize(store_path))
+                # The store was written before any history, like the templates users already have
+                case = f"delete_restore[t={store_size}]"
+                names = iter(sorted(manager.get_template_index()))
+                timings = measure(lambda: check_delete_restore(case, manager, next(names)),
+                                  min(self.repeat, store_size))
+                self.record(case, "delete_restore", params, timings)
+            finally:
+                os.chdir(original_cwd)
+    
+    def run_offline_insert_cases(self):
+        """Time offline inserts into a block of 5,000 rows and check the rows in the saved file"""
+        template_data = make_template("SyntheticBlock", 8)
+        generator = ExcelGenerator()
+        batch = make_batch("SyntheticBlock", template_data, OFFLINE_BLOCK_ACTUATORS)
+        existing_rows = generator.generate_excel_rows(batch)
+        source_path = os.path.join(self.work_dir, "block.xlsx")
+        make_block_workbook(source_path, generator.column_headers, existing_rows)
+        file_path = os.path.join(self.work_dir, "block_insert.xlsx")
+        inserter = OfflineWorkbookInserter(generator)
+        params = {"block_rows": len(existing_rows)}
+        suffix = f"[block={len(existing_rows)}]"
+        
+        # Every row is already in the block, so nothing may be added
+        case = "offline_skip_existing" + suffix
+        timings = measure(lambda: inserter.insert_into_workbook(batch, file_path, mode=INSERT_SKIP),
+                          self.repeat, setup=lambda: shutil.copyfile(source_path, file_path))
+        check_block(case, file_path, existing_rows)
+        self.record(case, "offline_insert", params, timings, len(existing_rows))
+        
+        # A number inside the block goes after its group, one past the block just above End
+        middle = batch[len(batch) // 2]["actuator_number"]
+        last = str(int(batch[-1]["actuator_number"]) + 1)
+        new_batch = [dict(batch[0], actuator_number=middle, actuator_name="Inserted"),
+                     dict(batch[0], actuator_number=last, actuator_name="Inserted")]
+        middle_rows, last_rows = (generator.generate_excel_rows([entry]) for entry in new_batch)
+        split = max(i for i, row in enumerate(existing_rows) if row[0] == f"_{middle}") + 1
+        case = "offline_sorted" + suffix
+        timings = measure(lambda: inserter.insert_into_workbook(new_batch, file_path, order=ORDER_SORTED),
+                          self.repeat, setup=lambda: shutil.copyfile(source_path, file_path))
+        check_block(case, file_path, existing_rows[:split] + middle_rows + existing_rows[split:] + last_rows)
+        self.record(case, "offline_insert", params, timings, len(middle_rows) + len(last_rows))
+        
+        # Even numbers in the block and odd ones inserted, so every group opens its own gap
+        spaced_batch = [dict(entry, actuator_number=str(100 + 2 * i)) for i, entry in enumerate(batch)]
+        step = len(batch) // OFFLINE_INTERLEAVED_GROUPS
+        new_batch = [dict(batch[0], actuator_number=str(101 + 2 * i), actuator_name=f"Inserted{i}")
+                     for i in range(0, step * OFFLINE_INTERLEAVED_GROUPS, step)]
+        make_block_workbook(source_path, generator.column_headers, generator.generate_excel_rows(spaced_batch))
+        expected_rows = generator.generate_excel_rows(
+            sorted(spaced_batch + new_batch, key=lambda entry: int(entry["actuator_number"])))
+        case = f"offline_interleaved[block={len(existing_rows)},groups={len(new_batch)}]"
+        timings = measure(lambda: inserter.insert_into_workbook(new_batch, file_path, order=ORDER_SORTED),
+                          self.repeat, setup=lambda: shutil.copyfile(source_path, file_path))
+        check_block(case, file_path, expected_rows)
+        self.record(case, "offline_insert", dict(params, groups=len(new_batch)), timings,
+                    len(expected_rows) - len(existing_rows))
+
+def run_command(args):
+    """Run the suite and write the results as JSON"""
+    runner = BenchmarkRunner(repeat=args.repeat, max_rows=args.max_rows,
+                             max_xlsx_rows=args.max_xlsx_rows, quick=args.quick)
+    results = runner.run()
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+        "skipped": runner.skipped,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {len(results)} results to {args.output}")
+    return 0
+
+def compare_results(baseline, current, threshold):
+    """Compare two result sets; returns (rows, regressions)"""
+    rows = []
+    regressions = []
+    base_results = baseline.get("results", {})
+    current_results = current.get("results", {})
+    for case in sorted(set(base_results) & set(current_results)):
+        base_time = base_results[case]["median_s"]
+        new_time = current_results[case]["median_s"]
+        ratio = new_time / base_time if base_time else float("inf")
+        regressed = ratio > 1 + threshold
+        rows.append((case, base_time, new_time, ratio, regressed))
+        if regressed:
+            regressions.append(case)
+    return rows, regressions
+
+def compare_command(args):
+    """Print a comparison table and fail on regressions beyond the threshold"""
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, "r", encoding="utf-8") as f:
+        current = json.load(f)
+    
+    rows, regressions = compare_results(baseline, current, args.threshold)
+    print(f"{'case':<48} {'base ms':>10} {'new ms':>10} {'ratio':>7}")
+    for case, base_time, new_time, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{case:<48} {base_time * 1000:10.2f} {new_time * 1000:10.2f} {ratio:7.2f}{flag}")
+    
+    only_base = sorted(set(baseline.get("results", {})) - set(current.get("results", {})))
+    if only_base:
+        print(f"\nMissing from current run: {', '.join(only_base)}")
+    
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Actuator Template Manager benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    run_parser = subparsers.add_parser("run", help="Run the benchmark suite")
+    run_parser.add_argument("--output", default="bench_results.json")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--quick", action="store_true", help="Skip the largest sizes")
+    run_parser.add_argument("--max-rows", type=int, default=1000000,
+                            help="Skip cases generating more rows (0 = no limit)")
+    run_parser.add_argument("--max-xlsx-rows", type=int, default=200000,
+                            help="Skip xlsx export above this many rows (0 = no limit)")
+    
+    compare_parser = subparsers.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="Allowed slowdown ratio before flagging (default 0.10)")
+    
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        return run_command(args)
+    return compare_command(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+"""In-process stand-in for the part of the Excel COM object model the app uses.
+
+Covers Application, Workbooks, Worksheets, Cells, Range (Value, Insert,
+Delete), Rows and UsedRange. Every property access and method call on a fake
+object counts as one COM round trip and adds the configured latency to the
+simulated time, so the COM code paths can be measured on any platform:
+
+    app = FakeExcelApplication(latency_ms=0.25)
+    sheet = app.add_workbook("Plant.xlsx").add_worksheet("IO", [["Actuator"], ["Actuator End"]])
+    generator = ExcelGenerator(ExcelSession(connect=lambda: app))
+    generator.insert_into_excel(actuators_data)
+    print(app.stats.calls, app.stats.simulated_ms)
+"""
+import re
+import time
+from collections import Counter
+
+NUMBER_PATTERN = re.compile(r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$")
+CELL_PATTERN = re.compile(r"^([A-Z]+)(\d+)$")
+
+def excel_value(value):
+    """Convert a written value the way Excel stores it"""
+    if isinstance(value, str):
+        # Numeric text becomes a number and line breaks are stored as \n
+        if NUMBER_PATTERN.match(value.strip()):
+            return float(value)
+        value = value.replace("\r\n", "\n")
+        return value if value != "" else None
+    return value
+
+def column_number(letters):
+    """Column letters to a 1-based column number ("A" -> 1, "AA" -> 27)"""
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - ord("A") + 1
+    return number
+
+class ComStats:
+    """Round-trip counters and simulated latency shared by one fake application"""
+    
+    def __init__(self, latency_ms=0.0, sleep=False):
+        self.latency_ms = latency_ms
+        self.sleep = sleep
+        self.running = True
+        self.calls = 0
+        self.by_name = Counter()
+    
+    @property
+    def simulated_ms(self):
+        return self.calls * self.latency_ms
+    
+    def call(self, name):
+        """Record one round trip"""
+        if not self.running:
+            # What pywin32 reports once Excel has gone away
+            raise RuntimeError("The object invoked has disconnected from its clients.")
+        self.calls += 1
+        self.by_name[name] += 1
+        if self.sleep and self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+    
+    def reset(self):
+        self.calls = 0
+        self.by_name = Counter()
+
+class FakeCollection:
+    """Workbooks/Worksheets: callable by 1-based index or by name, with Count"""
+    
+    def __init__(self, stats, kind, items):
+        self._stats = stats
+        self._kind = kind
+        self._items = items
+    
+    @property
+    def Count(self):
+        self._stats.call(f"{self._kind}.Count")
+        return len(self._items)
+    
+    def __call__(self, key):
+        self._stats.call(f"{self._kind}.Item")
+        if isinstance(key, int):
+            if not 1 <= key <= len(self._items):
+                raise IndexError(f"{self._kind}({key}) out of range")
+            return self._items[key - 1]
+        for item in self._items:
+            if item._name.lower() == str(key).lower():
+                return item
+        raise KeyError(f"{self._kind}('{key}') not found")
+
+class FakeRange:
+    """A rectangular cell range of a worksheet (1-based, inclusive)"""
+    
+    def __init__(self, worksheet, first_row, first_column, last_row, last_column):
+        self._worksheet = worksheet
+        self._first_row = first_row
+        self._first_column = first_column
+        self._last_row = last_row
+        self._last_column = last_column
+    
+    @property
+    def Row(self):
+        self._worksheet._stats.call("Range.Row")
+        return self._first_row
+    
+    @property
+    def Column(self):
+        self._worksheet._stats.call("Range.Column")
+        return self._first_column
+    
+    @property
+    def Rows(self):
+        self._worksheet._stats.call("Range.Rows")
+        return FakeRangeDimension(self._worksheet._stats, self._last_row - self._first_row + 1)
+    
+    @property
+    def Columns(self):
+        self._worksheet._stats.call("Range.Columns")
+        return FakeRangeDimension(self._worksheet._stats, self._last_column - self._first_column + 1)
+    
+    @property
+    def Value(self):
+        self._worksheet._stats.call("Range.Value.get")
+        cells = self._worksheet._cells
+        values = tuple(tuple(cells.get((row, column))
+                             for column in range(self._first_column, self._last_column + 1))
+                       for row in range(self._first_row, self._last_row + 1))
+        # A single cell comes back as a plain value, larger ranges as tuples of rows
+        if len(values) == 1 and len(values[0]) == 1:
+            return values[0][0]
+        return values
+    
+    @Value.setter
+    def Value(self, value):
+        self._worksheet._stats.call("Range.Value.set")
+        cells = self._worksheet._cells
+        row_count = self._last_row - self._first_row + 1
+        column_count = self._last_column - self._first_column + 1
+        for i in range(row_count):
+            for j in range(column_count):
+                if isinstance(value, (tuple, list)):
+                    row_values = value[i] if i < len(value) else ()
+                    cell_value = row_values[j] if j < len(row_values) else None
+                else:
+                    cell_value = value
+                stored = excel_value(cell_value)
+                key = (self._first_row + i, self._first_column + j)
+                if stored is None:
+                    cells.pop(key, None)
+                else:
+                    cells[key] = stored
+    
+    def Insert(self):
+        """Insert whole rows above this range (the range must be rows)"""
+        self._worksheet._stats.call("Range.Insert")
+        self._worksheet._shift_rows(self._first_row, self._last_row - self._first_row + 1)
+    
+    def Delete(self):
+        """Delete the rows of this range (the range must be rows)"""
+        self._worksheet._stats.call("Range.Delete")
+        self._worksheet._shift_rows(self._first_row, -(self._last_row - self._first_row + 1))
+
+class FakeRangeDimension:
+    """Range.Rows / Range.Columns; only Count is supported"""
+    
+    def __init__(self, stats, count):
+        self._stats = stats
+        self._count = count
+    
+    @property
+    def Count(self):
+        self._stats.call("Range.Count")
+        return self._count
+
+class FakeWorksheet:
+    """A worksheet storing its non-empty cells as {(row, column): value}"""
+    
+    def __init__(self, stats, name, rows=None):
+        self._stats = stats
+        self._name = name
+        self._cells = {}
+        for i, row in enumerate(rows or []):
+            for j, value in enumerate(row):
+                stored = excel_value(value)
+                if stored is not None:
+                    self._cells[(i + 1, j + 1)] = stored
+    
+    @property
+    def Name(self):
+        self._stats.call("Worksheet.Name")
+        return self._name
+    
+    def Cells(self, row, column):
+        self._stats.call("Worksheet.Cells")
+        return FakeRange(self, row, column, row, column)
+    
+    def Range(self, first, last=None):
+        """Range(cell1, cell2) or Range("A1:C3")"""
+        self._stats.call("Worksheet.Range")
+        if isinstance(first, str):
+            parts = first.replace("$", "").upper().split(":")
+            (first_row, first_column), (last_row, last_column) = (
+                self._parse_address(parts[0]), self._parse_address(parts[-1]))
+        else:
+            last = last or first
+            first_row, first_column = first._first_row, first._first_column
+            last_row, last_column = last._last_row, last._last_column
+        return FakeRange(self, min(first_row, last_row), min(first_column, last_column),
+                         max(first_row, last_row), max(first_column, last_column))
+    
+    def Rows(self, rows):
+        """Rows(5) or Rows("5:9") as a range of whole rows"""
+        self._stats.call("Worksheet.Rows")
+        first, _, last = str(rows).partition(":")
+        return FakeRange(self, int(first), 1, int(last or first), self._last_column())
+    
+    @property
+    def UsedRange(self):
+        self._stats.call("Worksheet.UsedRange")
+        if not self._cells:
+            return FakeRange(self, 1, 1, 1, 1)
+        rows = [row for row, _ in self._cells]
+        columns = [column for _, column in self._cells]
+        return FakeRange(self, min(rows), min(columns), max(rows), max(columns))
+    
+    def values(self, column_count=None):
+        """Plain list of row values for checks (not counted as COM calls)"""
+        if not self._cells:
+            return []
+        last_row = max(row for row, _ in self._cells)
+        column_count = column_count or self._last_column()
+        return [[self._cells.get((row, column)) for column in range(1, column_count + 1)]
+                for row in range(1, last_row + 1)]
+    
+    def _last_column(self):
+        return max((column for _, column in self._cells), default=1)
+    
+    def _shift_rows(self, start_row, count):
+        """Move every row at or below start_row by count (negative deletes rows)"""
+        shifted = {}
+        for (row, column), value in self._cells.items():
+            if row < start_row:
+                shifted[(row, column)] = value
+            elif count < 0 and row < start_row - count:
+                continue
+            else:
+                shifted[(row + count, column)] = value
+        self._cells = shifted
+    
+    @staticmethod
+    def _parse_address(address):
+        match = CELL_PATTERN.match(address)
+        if not match:
+            raise ValueError(f"Unsupported address '{address}'")
+        return int(match.group(2)), column_number(match.group(1))
+
+class FakeWorkbook:
+    """An open workbook; path None means never saved"""
+    
+    def __init__(self, stats, name, path=None):
+        self._stats = stats
+        self._name = name
+        self._path = path
+        self._worksheets = []
+        self._active_sheet = None
+    
+    @property
+    def Name(self):
+        self._stats.call("Workbook.Name")
+        return self._name
+    
+    @property
+    def FullName(self):
+        self._stats.call("Workbook.FullName")
+        return self._path or self._name
+    
+    @property
+    def Saved(self):
+        self._stats.call("Workbook.Saved")
+        return self._path is not None
+    
+    @property
+    def Worksheets(self):
+        self._stats.call("Workbook.Worksheets")
+        return FakeCollection(self._stats, "Worksheets", self._worksheets)
+    
+    @property
+    def ActiveSheet(self):
+        self._stats.call("Workbook.ActiveSheet")
+        return self._active_sheet
+    
+    def add_worksheet(self, name, rows=None):
+        """Add a sheet (not counted as COM calls); the first one becomes active"""
+        worksheet = FakeWorksheet(self._stats, name, rows)
+        self._worksheets.append(worksheet)
+        if self._active_sheet is None:
+            self._active_sheet = worksheet
+        return worksheet
+    
+    def activate(self, worksheet):
+        self._active_sheet = worksheet
+
+class FakeExcelApplication:
+    """Excel.Application stand-in; pass lambda: app as ExcelSession's connect"""
+    
+    def __init__(self, latency_ms=0.0, sleep=False):
+        self.stats = ComStats(latency_ms, sleep)
+        self._workbooks = []
+        self._active_workbook = None
+    
+    @property
+    def Workbooks(self):
+        self.stats.call("Application.Workbooks")
+        return FakeCollection(self.stats, "Workbooks", self._workbooks)
+    
+    @property
+    def ActiveWorkbook(self):
+        self.stats.call("Application.ActiveWorkbook")
+        return self._active_workbook
+    
+    @property
+    def ActiveSheet(self):
+        self.stats.call("Application.ActiveSheet")
+        return self._active_workbook._active_sheet if self._active_workbook else None
+    
+    def add_workbook(self, name, path=None):
+        """Open a workbook (not counted as COM calls); the first one becomes active"""
+        workbook = FakeWorkbook(self.stats, name, path)
+        self._workbooks.append(workbook)
+        if self._active_workbook is None:
+            self._active_workbook = workbook
+        return workbook
+    
+    def activate(self, workbook):
+        self._active_workbook = workbook
+    
+    def quit(self):
+        """Simulate Excel closing: every existing handle becomes unusable"""
+        self.stats.running = False
@@ -0,0 +1,219 @@
+"""Memory regression checks with tracemalloc budgets.
+
+Measures peak and retained memory of the main flows and fails (exit code 1)
+when a flow exceeds its budget:
+
+    python benchmarks/memory_budget.py
+    python benchmarks/memory_budget.py --output memory_results.json
+    python benchmarks/memory_budget.py --skip-xlsx   # the xlsx flow takes minutes
+
+Budgets are in MiB and derived from the measured values below with the
+same 25% headroom for every flow (at least 1 MiB, so flows that keep almost
+nothing do not fail on allocator noise). When a change moves a flow,
+update its measured values together with a justification in the commit.
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import excel_generator
+from actuator_batch import build_actuator_entry
+from bench_suite import make_template
+from component_history import ComponentHistory
+from excel_generator import ExcelGenerator
+from row_cache import RowCache
+from template_manager import TemplateManager
+
+STORE_SIZE = 500
+BATCH_SIZE = 10000
+COMPONENT_COUNT = 8
+HISTORY_COMPONENTS = 1000
+HISTORY_STEPS = 500
+
+# Measured (peak MiB, retained MiB) per flow
+MEASURED = {
+    "store_load": (13.4, 0.2),
+    "generate_batch": (67.5, 67.5),
+    "hold_generated": (None, 67.5),
+    "export_clipboard": (88.5, 9.5),
+    "export_xlsx": (728.6, 0.2),
+    "edit_history": (0.6, 0.5),
+}
+HEADROOM = 1.25
+MIN_BUDGET = 1.0
+
+def derive_budget(measured):
+    if measured is None:
+        return None
+    return round(max(measured * HEADROOM, MIN_BUDGET), 1)
+
+# (peak MiB, retained MiB) per flow
+BUDGETS = {flow: (derive_budget(peak), derive_budget(retained))
+           for flow, (peak, retained) in MEASURED.items()}
+
+MIB = 1024 * 1024
+
+class MemoryProbe:
+    """Measure peak and retained allocations of one flow with tracemalloc"""
+    
+    def __enter__(self):
+        gc.collect()
+        tracemalloc.reset_peak()
+        self.start, _ = tracemalloc.get_traced_memory()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        _, peak = tracemalloc.get_traced_memory()
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+        self.peak = (peak - self.start) / MIB
+        self.retained = (current - self.start) / MIB
+        return False
+
+def generate_batch(template_name, template_data):
+    """Generate a batch exactly as ActuatorDialog.get_generated_data does"""
+    template_hash = RowCache.hash_components(template_data["actuators"])
+    return [
+        build_actuator_entry(template_name, template_data, template_hash, str(100 + i), f"Axis{i}")
+        for i in range(BATCH_SIZE)
+    ]
+
+def edit_history(history, steps):
+    """Apply TemplateDialog-like edits (field edit, add, copy, move, delete) to a history"""
+    for step in range(steps):
+        components = history.current
+        index = (step * 7919) % len(components)
+        kind = step % 5
+        if kind == 0:
+            edited = dict(components[index])
+            edited["name"] = f"{edited['name']}_Edit"
+            history.apply("Edit", components.set(index, edited), index)
+        elif kind == 1:
+            history.apply("Add", components.append({"name": f"New_{step}"}), len(components))
+        elif kind == 2:
+            history.apply("Copy", components.append(dict(components[index])), len(components))
+        elif kind == 3 and index > 0:
+            history.apply("Move Up", components.swap(index, index - 1), index - 1)
+        else:
+            history.apply("Delete", components.delete(index))
+
+def run_flows(work_dir, include_xlsx=True):
+    """Run every flow and return {flow: (peak MiB, retained MiB)}"""
+    measurements = {}
+    
+    store_dir = os.path.join(work_dir, "store")
+    os.makedirs(os.path.join(store_dir, "templates"))
+    store = {f"Synthetic_{i}": make_template(f"Synthetic_{i}", COMPONENT_COUNT) for i in range(STORE_SIZE)}
+    with open(os.path.join(store_dir, "templates", "templates.json"), "w", encoding="utf-8") as f:
+        json.dump(store, f, indent=2, ensure_ascii=False)
+    del store
+    
+    original_cwd = os.getcwd()
+    os.chdir(store_dir)
+    try:
+        with MemoryProbe() as probe:
+            manager = TemplateManager()
+        measurements["store_load"] = (probe.peak, probe.retained)
+    finally:
+        os.chdir(original_cwd)
+    
+    template_name = "Synthetic_0"
+    template_data = manager.get_template(template_name)
+    
+    with MemoryProbe() as probe:
+        generated_actuators = generate_batch(template_name, template_data)
+    measurements["generate_batch"] = (probe.peak, probe.retained)
+    
+    # What ActuatorTemplateApp.generated_actuators keeps alive between exports
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    del generated_actuators
+    gc.collect()
+    released, _ = tracemalloc.get_traced_memory()
+    measurements["hold_generated"] = (None, (held - released) / MIB)
+    generated_actuators = generate_batch(template_name, template_data)
+    
+    generator = ExcelGenerator()
+    excel_generator.pyperclip.copy = lambda text: None
+    with MemoryProbe() as probe:
+        generator.copy_to_clipboard(generated_actuators)
+    measurements["export_clipboard"] = (probe.peak, probe.retained)
+    
+    # Undo history of a large template in the template dialog
+    history = ComponentHistory(make_template("History", HISTORY_COMPONENTS)["actuators"])
+    with MemoryProbe() as probe:
+        edit_history(history, HISTORY_STEPS)
+    measurements["edit_history"] = (probe.peak, probe.retained)
+    del history
+    
+    if not include_xlsx:
+        return measurements
+    
+    generator.row_cache.clear()
+    gc.collect()
+    with MemoryProbe() as probe:
+        generator.generate_excel_file(generated_actuators, os.path.join(work_dir, "export.xlsx"))
+        generator.row_cache.clear()
+    measurements["export_xlsx"] = (probe.peak, probe.retained)
+    
+    return measurements
+
+def check_budgets(measurements, scale=1.0):
+    """Return a list of budget violations"""
+    violations = []
+    for flow, (peak, retained) in measurements.items():
+        peak_budget, retained_budget = BUDGETS[flow]
+        if peak is not None and peak_budget is not None and peak > peak_budget * scale:
+            violations.append(f"{flow}: peak {peak:.1f} MiB exceeds budget {peak_budget * scale:.1f} MiB")
+        if retained_budget is not None and retained > retained_budget * scale:
+            violations.append(f"{flow}: retained {retained:.1f} MiB exceeds budget {retained_budget * scale:.1f} MiB")
+    return violations
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="tracemalloc memory budgets")
+    parser.add_argument("--output", help="Write the measurements as JSON")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="Multiply every budget (e.g. 1.2 on instrumented builds)")
+    parser.add_argument("--skip-xlsx", action="store_true", help="Skip the slow xlsx export flow")
+    args = parser.parse_args(argv)
+    
+    work_dir = tempfile.mkdtemp(prefix="atm_mem_")
+    tracemalloc.start()
+    try:
+        measurements = run_flows(work_dir, include_xlsx=not args.skip_xlsx)
+    finally:
+        tracemalloc.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print(f"{'flow':<20} {'peak MiB':>10} {'retained MiB':>13} {'budget':>16}")
+    for flow, (peak, retained) in measurements.items():
+        peak_budget, retained_budget = BUDGETS[flow]
+        peak_text = f"{peak:10.1f}" if peak is not None else f"{'-':>10}"
+        budget_text = f"{peak_budget or '-'} / {retained_budget or '-'}"
+        print(f"{flow:<20} {peak_text} {retained:13.1f} {budget_text:>16}")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({flow: {"peak_mib": peak, "retained_mib": retained}
+                       for flow, (peak, retained) in measurements.items()}, f, indent=2)
+    
+    violations = check_budgets(measurements, args.budget_scale)
+    if violations:
+        print("\nMemory budget exceeded:")
+        for violation in violations:
+            print(f"  {violation}")
+        return 1
+    print("\nAll flows within budget")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+"""Command line interface for generating and exporting actuators without the GUI.
+
+Examples:
+    python cli.py list
+    python cli.py export -t Act_AxisLinear -a 30:AxisX -a 31:AxisZ --xlsx out.xlsx
+    python cli.py export -t Act_AxisLinear -a 30:AxisX --format csv -o axes.csv
+    python cli.py export -t Act_AxisLinear -a 30:AxisX --format l5x -o axes.L5X --controller Line1
+    python cli.py insert -t Act_AxisLinear -a 30:AxisX --workbook plant.xlsx
+    python cli.py insert -t Act_AxisLinear --actuators-file axes.csv --backend com
+    python cli.py insert --batch-file station.csv --workbook plant.xlsx
+    python cli.py index --remove 30 31
+    python cli.py project --rebuild
+    python cli.py project --export build/
+"""
+import argparse
+import csv
+import sys
+from datetime import datetime
+from template_manager import TemplateManager
+from excel_generator import ExcelGenerator
+from offline_excel import OfflineWorkbookInserter, read_existing_symbols
+from actuator_validation import ActuatorValidator, validate_mixed
+from excel_session import ExcelSessionError
+from symbol_index import SymbolIndex
+from project_manifest import ProjectManifest, STATE_BUILT, describe_target
+from exporters import discover_exporters, get_exporter
+from actuator_batch import build_actuator_entry, build_mixed_batch
+from tracing import tracer
+from output_cache import BUILD_SKIPPED, BUILD_FAILED
+from actuator_block import INSERT_MODES, INSERT_APPEND, INSERT_ORDERS, ORDER_END, ORDER_SORTED
+from schema import LAYOUTS
+
+def parse_actuator_spec(spec):
+    """Parse NUMBER:NAME into a (number, name) tuple"""
+    number, separator, name = spec.partition(":")
+    if not separator or not number.strip() or not name.strip():
+        raise argparse.ArgumentTypeError(f"Expected NUMBER:NAME, got '{spec}'")
+    return number.strip().lstrip("_"), name.strip()
+
+def read_delimited_lines(file_path):
+    """Yield the non-empty, non-comment rows of a CSV/TSV file (delimiter detected)"""
+    with open(file_path, "r", encoding="utf-8", newline="") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        for row in csv.reader(f, dialect):
+            if not row or not row[0].strip() or row[0].strip().startswith("#"):
+                continue
+            yield row
+
+def read_actuators_file(file_path):
+    """Read (number, name) pairs from a CSV/TSV file, one actuator per line"""
+    actuators = []
+    for row in read_delimited_lines(file_path):
+        if len(row) < 2:
+            raise ValueError(f"Line '{','.join(row)}' needs a number and a name")
+        actuators.append((row[0].strip().lstrip("_"), row[1].strip()))
+    return actuators
+
+def read_batch_file(file_path):
+    """Read (template, number, name) lines of a mixed-template batch from a CSV/TSV file"""
+    entries = []
+    for row in read_delimited_lines(file_path):
+        if len(row) < 3:
+            raise ValueError(f"Line '{','.join(row)}' needs a template, a number and a name")
+        entries.append((row[0].strip(), row[1].strip().lstrip("_"), row[2].strip()))
+    return entries
+
+def build_mixed_data(template_manager, args, existing=None):
+    """Build the actuators of a --batch-file, sorted by number"""
+    entries = read_batch_file(args.batch_file)
+    if args.template:
+        # -t/-a/--actuators-file add lines of one more template
+        actuators = list(args.actuator or [])
+        if args.actuators_file:
+            actuators.extend(read_actuators_file(args.actuators_file))
+        entries.extend((args.template, number, name) for number, name in actuators)
+    if not entries:
+        raise ValueError(f"No actuators in {args.batch_file}")
+    
+    def components_of(template_name):
+        template_data = template_manager.get_template(template_name)
+        return template_data['actuators'] if template_data else None
+    
+    result = validate_mixed(entries, components_of, existing)
+    for line in result.format(result.warnings):
+        print(f"Warning: {line}", file=sys.stderr)
+    if not result.ok:
+        raise ValueError("Invalid actuators:\n" + "\n".join(result.format()))
+    return build_mixed_batch(template_manager, entries)
+
+def build_generated_data(template_manager, args, existing=None):
+    """Build generated actuator data from the command line arguments
+    
+    existing (actuator_validation.ExistingSymbols) adds collision checks
+    against actuators already in the target.
+    """
+    if args.batch_file:
+        return build_mixed_data(template_manager, args, existing)
+    if not args.template:
+        raise ValueError("No template given (use -t TEMPLATE or --batch-file)")
+    template_data = template_manager.get_template(args.template)
+    if not template_data:
+        raise ValueError(f"Template '{args.template}' not found")
+    
+    actuators = list(args.actuator or [])
+    if args.actuators_file:
+        actuators.extend(read_actuators_file(args.actuators_file))
+    if not actuators:
+        raise ValueError("No actuators given (use -a NUMBER:NAME or --actuators-file)")
+    
+    result = ActuatorValidator(template_data['actuators'], existing).validate(actuators)
+    for line in result.format(result.warnings):
+        print(f"Warning: {line}", file=sys.stderr)
+    if not result.ok:
+        raise ValueError("Invalid actuators:\n" + "\n".join(result.format()))
+    
+    template_hash = template_manager.get_template_hash(args.template)
+    generated_data = []
+    for number, name in actuators:
+        generated_data.append(build_actuator_entry(args.template, template_data, template_hash, number, name))
+    return generated_data
+
+def check_symbol_index(args, generated_data):
+    """Check a batch against the project symbol index; returns the index, or raises ValueError"""
+    symbol_index = SymbolIndex()
+    result = symbol_index.check(generated_data)
+    if result.issues and not args.ignore_conflicts:
+        raise ValueError("Conflicts with the project symbol index (use --ignore-conflicts to export anyway):\n"
+                         + "\n".join(result.format(result.issues)))
+    return symbol_index
+
+def registered(symbol_index, generated_data, result):
+    """Record a successful export in the symbol index; returns result"""
+    if result[0]:
+        symbol_index.register(generated_data)
+    return result
+
+def command_list(args, template_manager, excel_generator):
+    """List the available templates"""
+    for template_name, entry in template_manager.get_template_index().items():
+        print(f"{template_name}\t{entry.count} components\t{entry.description}")
+    return True, ""
+
+def command_export(args, template_manager, excel_generator):
+    """Export generated rows to the clipboard, a new Excel file or a registered file format"""
+    generated_data = build_generated_data(template_manager, args)
+    if args.format and not args.output:
+        return False, "--output is required with --format"
+    symbol_index = check_symbol_index(args, generated_data)
+    if args.format:
+        exporter = get_exporter(args.format, layout=args.layout, controller_name=args.controller,
+                                export_date=args.export_date)
+        return registered(symbol_index, generated_data, exporter.export(generated_data, args.output))
+    if args.clipboard:
+        return registered(symbol_index, generated_data, excel_generator.copy_to_clipboard(generated_data))
+    if args.if_changed:
+        status = excel_generator.build_excel_file(generated_data, args.xlsx)
+        if status == BUILD_SKIPPED:
+            return True, f"{args.xlsx} is up to date"
+        if status != BUILD_FAILED:
+            return registered(symbol_index, generated_data, (True, f"Excel file saved to {args.xlsx}"))
+    elif excel_generator.generate_excel_file(generated_data, args.xlsx):
+        return registered(symbol_index, generated_data, (True, f"Excel file saved to {args.xlsx}"))
+    return False, "Failed to generate Excel file"
+
+def command_insert(args, template_manager, excel_generator):
+    """Insert generated rows into a workbook (offline) or the running Excel (COM)"""
+    if args.backend == "com":
+        # --workbook/--sheet name an open workbook and sheet instead of the active sheet
+        excel_generator.excel_session.select_target(args.workbook, args.sheet)
+        try:
+            existing = excel_generator.read_existing_symbols() if excel_generator.excel_session.available else None
+        except ExcelSessionError as e:
+            return False, str(e)
+        generated_data = build_generated_data(template_manager, args, existing)
+        symbol_index = check_symbol_index(args, generated_data)
+        return registered(symbol_index, generated_data,
+                          excel_generator.insert_into_excel(generated_data, mode=args.mode, order=args.order))
+    
+    if not args.workbook:
+        return False, "--workbook is required with the offline backend"
+    generated_data = build_generated_data(template_manager, args,
+                                          read_existing_symbols(args.workbook, args.sheet))
+    symbol_index = check_symbol_index(args, generated_data)
+    result = registered(symbol_index, generated_data, OfflineWorkbookInserter(excel_generator).insert_into_workbook(
+        generated_data, args.workbook, args.sheet, mode=args.mode, order=args.order))
+    if result[0]:
+        # Bind the actuators to the workbook so later template changes can be rebuilt
+        ProjectManifest().record_built(generated_data, template_manager, args.workbook, args.sheet)
+    return result
+
+def command_index(args, template_manager, excel_generator):
+    """Show or edit the project symbol index"""
+    symbol_index = SymbolIndex()
+    if args.clear:
+        symbol_index.clear()
+        return True, "Symbol index cleared."
+    if args.remove:
+        removed = symbol_index.remove(number.lstrip("_") for number in args.remove)
+        return True, f"Removed {removed} actuator(s); index has {symbol_index.describe()}."
+    return True, f"Symbol index ({symbol_index.file_path}): {symbol_index.describe()}"
+
+def command_project(args, template_manager, excel_generator):
+    """Show the project bindings, forget some or rebuild the actuators whose template changed"""
+    manifest = ProjectManifest()
+    if args.remove:
+        removed = manifest.remove(args.remove)
+        return True, f"Removed {removed} binding(s); project has {manifest.describe()}."
+    if args.export:
+        return manifest.export_files(template_manager, excel_generator, args.export, force=args.force)
+    if args.rebuild:
+        return manifest.rebuild(template_manager, OfflineWorkbookInserter(excel_generator),
+                                rebuild_all=args.all, symbol_index=SymbolIndex(), order=args.order)
+    
+    status = manifest.status(template_manager)
+    for binding, state in status:
+        print(f"_{binding['number']}\t{binding['name']}\t{binding['template']}\t"
+              f"{describe_target(binding['target'])}\t{state}")
+    stale = sum(1 for binding, state in status if state != STATE_BUILT)
+    return True, f"Project ({manifest.file_path}): {manifest.describe()}, {stale} to rebuild"
+
+def command_history(args, template_manager, excel_generator):
+    """List the saved versions of a template, show the changes of one or restore it"""
+    history = template_manager.history
+    if args.restore:
+        if not template_manager.restore_version(args.template, args.restore):
+            return False, f"Version {args.restore} of '{args.template}' not found"
+        return True, f"Restored version {args.restore} of '{args.template}'."
+    if args.diff:
+        lines = history.diff(args.template, args.diff)
+        return True, "\n".join(lines) if lines else "No changes."
+    versions = history.versions(args.template)
+    if not versions:
+        return False, f"No history for '{args.template}'"
+    for info in versions:
+        print(f"{info.version}\t{info.time[:19]}\t{info.action}\t{info.changes}")
+    return True, ""
+
+def create_parser():
+    exporters = discover_exporters()
+    parser = argparse.ArgumentParser(description="Actuator Template Manager command line")
+    parser.add_argument("--trace", metavar="LOG", help="Write stage timings to a JSON-lines log")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    subparsers.add_parser("list", help="List templates")
+    
+    actuator_args = argparse.ArgumentParser(add_help=False)
+    actuator_args.add_argument("-t", "--template", help="Template name")
+    actuator_args.add_argument("-a", "--actuator", action="append", type=parse_actuator_spec,
+                               metavar="NUMBER:NAME", help="Actuator to generate (repeatable)")
+    actuator_args.add_argument("--actuators-file", help="CSV/TSV file with NUMBER,NAME per line")
+    actuator_args.add_argument("--batch-file",
+                               help="CSV/TSV file with TEMPLATE,NUMBER,NAME per line (several templates, "
+                                    "output sorted by number)")
+    actuator_args.add_argument("--ignore-conflicts", action="store_true",
+                               help="Export even if tags or I/O addresses collide with the project symbol index")
+    actuator_args.add_argument("--layout", choices=list(LAYOUTS), default="standard",
+                               help="Output columns: " + "; ".join(f"{name}: {layout.description}"
+                                                                  for name, layout in LAYOUTS.items()))
+    
+    export_parser = subparsers.add_parser("export", parents=[actuator_args],
+                                          help="Export generated rows")
+    target = export_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--xlsx", metavar="PATH", help="Generate a new Excel file")
+    target.add_argument("--clipboard", action="store_true", help="Copy tab-separated rows")
+    target.add_argument("--format", choices=list(exporters),
+                        help="Stream rows to a file: " + "; ".join(f"{name}: {exporter.label}"
+                                                                   for name, exporter in exporters.items()))
+    export_parser.add_argument("-o", "--output", metavar="PATH", help="Output file for --format")
+    export_parser.add_argument("--controller", default="Controller",
+                               help="Controller name in the L5X context (default: Controller)")
+    export_parser.add_argument("--export-date", type=datetime.fromisoformat, metavar="YYYY-MM-DD[THH:MM:SS]",
+                               help="ExportDate written into L5X files (default: now), for reproducible output")
+    export_parser.add_argument("--if-changed", action="store_true",
+                               help="With --xlsx: skip writing when the file was built from the same inputs")
+    
+    insert_parser = subparsers.add_parser("insert", parents=[actuator_args],
+                                          help="Insert generated rows into a workbook")
+    insert_parser.add_argument("--backend", choices=("offline", "com"), default="offline",
+                               help="offline: edit the file with openpyxl; com: use the running Excel")
+    insert_parser.add_argument("--workbook", help="Workbook file to edit (offline) or name of an open workbook (com)")
+    insert_parser.add_argument("--sheet", help="Sheet name (default: the active sheet)")
+    insert_parser.add_argument("--mode", choices=INSERT_MODES, default=INSERT_APPEND,
+                               help="append: insert every row; skip: only rows whose (Actuator, Name) "
+                                    "is new; upsert: skip and update changed rows in place")
+    insert_parser.add_argument("--order", choices=INSERT_ORDERS, default=ORDER_END,
+                               help="end: insert above 'Actuator End'; sorted: place each actuator "
+                                    "by its number inside the block")
+    
+    index_parser = subparsers.add_parser("index", help="Show or edit the project symbol index")
+    index_action = index_parser.add_mutually_exclusive_group()
+    index_action.add_argument("--clear", action="store_true", help="Forget every actuator")
+    index_action.add_argument("--remove", nargs="+", metavar="NUMBER", help="Forget these actuators")
+    
+    project_parser = subparsers.add_parser("project", help="Show or rebuild the actuators bound to workbooks")
+    project_action = project_parser.add_mutually_exclusive_group()
+    project_action.add_argument("--rebuild", action="store_true",
+                                help="Regenerate the actuators whose template changed and patch their rows")
+    project_action.add_argument("--remove", nargs="+", metavar="NUMBER",
+                                help="Forget these bindings (their rows stay in the workbook)")
+    project_action.add_argument("--export", metavar="DIR",
+                                help="Generate one Excel file per target workbook, skipping unchanged files")
+    project_parser.add_argument("--force", action="store_true", help="With --export: rewrite every file")
+    project_parser.add_argument("--all", action="store_true", help="With --rebuild: rebuild every binding")
+    project_parser.add_argument("--order", choices=INSERT_ORDERS, default=ORDER_SORTED,
+                                help="Where rebuilt actuators' new rows go (default: sorted)")
+    
+    history_parser = subparsers.add_parser("history", help="Show or restore saved versions of a template")
+    history_parser.add_argument("-t", "--template", required=True, help="Template name")
+    history_action = history_parser.add_mutually_exclusive_group()
+    history_action.add_argument("--diff", type=int, metavar="VERSION",
+                                help="Show what VERSION changed against the version before it")
+    history_action.add_argument("--restore", type=int, metavar="VERSION",
+                                help="Save VERSION as the newest version of the template")
+    return parser
+
+COMMANDS = {
+    "list": command_list,
+    "export": command_export,
+    "insert": command_insert,
+    "index": command_index,
+    "project": command_project,
+    "history": command_history,
+}
+
+def main(argv=None):
+    args = create_parser().parse_args(argv)
+    if args.trace:
+        tracer.enable(args.trace)
+    
+    template_manager = TemplateManager()
+    excel_generator = ExcelGenerator(layout=getattr(args, "layout", None))
+    try:
+        success, message = COMMANDS[args.command](args, template_manager, excel_generator)
+    except (ValueError, OSError) as e:
+        success, message = False, str(e)
+    
+    if message:
+        print(message, file=sys.stdout if success else sys.stderr)
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
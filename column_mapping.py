@@ -0,0 +1,116 @@
+"""Projection of generated rows onto the header layout of a target sheet.
+
+Generated rows follow ExcelGenerator.column_headers. Target sheets may
+reorder, omit or add columns, so the header row (the row holding the
+"Actuator" marker) is matched by name and every generated field is written
+to the column carrying its header. Consecutive sheet columns form runs that
+are written with one range write each.
+"""
+import re
+from functools import lru_cache
+
+HEADER_SEPARATORS = re.compile(r"[\s.\-_]+")
+
+def normalize_header(value):
+    """Header text for matching: 'Alm 1 Descr.Language1' == 'alm1 descr. language1'"""
+    if value is None:
+        return ""
+    return HEADER_SEPARATORS.sub("", str(value)).lower()
+
+class ColumnMapping:
+    """Where each generated field goes in the sheet (1-based columns)"""
+    
+    def __init__(self, field_headers, columns, extra_headers=()):
+        self.field_headers = tuple(field_headers)
+        # Sheet column per field, None when the sheet has no such column
+        self.columns = tuple(columns)
+        self.extra_headers = tuple(extra_headers)
+        self.missing = tuple(header for header, column in zip(self.field_headers, self.columns)
+                             if column is None)
+        self.last_column = max((column for column in self.columns if column is not None), default=0)
+        self.runs = self._build_runs()
+    
+    def _build_runs(self):
+        """Group fields into runs of consecutive sheet columns: [(first_column, field indexes)]"""
+        mapped = sorted((column, field) for field, column in enumerate(self.columns) if column is not None)
+        runs = []
+        for column, field in mapped:
+            if runs and runs[-1][0] + len(runs[-1][1]) == column:
+                runs[-1][1].append(field)
+            else:
+                runs.append((column, [field]))
+        return [(first_column, tuple(fields)) for first_column, fields in runs]
+    
+    @property
+    def is_positional(self):
+        """Whether fields map 1:1 onto columns 1..n (the default layout)"""
+        return self.columns == tuple(range(1, len(self.columns) + 1))
+    
+    def check(self, rows):
+        """Error message if writing rows would drop values or lose the row identity, else None"""
+        if self.columns[0] is None or (len(self.columns) > 1 and self.columns[1] is None):
+            return f"The header row needs '{self.field_headers[0]}' and '{self.field_headers[1]}' columns."
+        
+        dropped = [self.field_headers[field] for field, column in enumerate(self.columns)
+                   if column is None and any(len(row) > field and row[field] not in (None, "")
+                                             for row in rows)]
+        if dropped:
+            return ("The target sheet has no column for: " + ", ".join(dropped)
+                    + ". Add these headers to the 'Actuator' row or remove the values from the template.")
+        return None
+    
+    def describe(self):
+        """Layout differences for messages, or an empty string"""
+        parts = []
+        if self.missing:
+            parts.append(f"{len(self.missing)} column(s) not in sheet")
+        if self.extra_headers:
+            parts.append(f"{len(self.extra_headers)} extra sheet column(s) left untouched")
+        if not parts and not self.is_positional:
+            parts.append("columns matched by header")
+        return ", ".join(parts)
+    
+    def run_values(self, rows):
+        """Values per run for a range write: [(first_column, tuple of row tuples)]"""
+        runs = []
+        for first_column, fields in self.runs:
+            values = tuple(tuple(row[field] if field < len(row) else "" for field in fields)
+                           for row in rows)
+            runs.append((first_column, values))
+        return runs
+    
+    def sheet_cells(self, row):
+        """(column, value) pairs of one generated row"""
+        return [(column, row[field]) for field, column in enumerate(self.columns)
+                if column is not None and field < len(row)]
+    
+    def from_sheet(self, sheet_row):
+        """Field-ordered values of a row read from the sheet (columns 1..last_column)"""
+        return [sheet_row[column - 1] if column is not None and column <= len(sheet_row) else None
+                for column in self.columns]
+
+def positional_mapping(field_headers):
+    """The fixed layout: field i in column i + 1"""
+    return ColumnMapping(field_headers, range(1, len(field_headers) + 1))
+
+@lru_cache(maxsize=64)
+def _build_mapping(field_headers, sheet_headers):
+    if not any(normalize_header(header) for header in sheet_headers[1:]):
+        # Only the "Actuator" marker is present: keep the fixed layout
+        return positional_mapping(field_headers)
+    
+    positions = {}
+    for column, header in enumerate(sheet_headers, 1):
+        key = normalize_header(header)
+        if key and key not in positions:
+            positions[key] = column
+    
+    columns = [positions.get(normalize_header(header)) for header in field_headers]
+    known = {normalize_header(header) for header in field_headers}
+    extra = [header for header in sheet_headers
+             if normalize_header(header) and normalize_header(header) not in known]
+    return ColumnMapping(field_headers, columns, extra)
+
+def build_column_mapping(field_headers, sheet_headers):
+    """Match the generated fields against the header row values of the sheet (cached per layout)"""
+    return _build_mapping(tuple(field_headers), tuple(sheet_headers))
@@ -0,0 +1,163 @@
+"""Undo/redo history of a template's component list with structural sharing.
+
+ComponentList is an immutable list stored as a tuple of chunks (tuples of
+at most CHUNK_SIZE components). An edit copies only the chunk it touches
+and the small tuple of chunk references; every other chunk, and every
+component dict, is shared with the previous version. Component dicts are
+never changed in place: an edit replaces the component with a new dict.
+A history step therefore costs about one chunk plus one reference per
+chunk, whatever the size of the template.
+"""
+
+CHUNK_SIZE = 32
+
+class ComponentList:
+    """Immutable list of component dicts; edits return a new ComponentList"""
+    
+    __slots__ = ("_chunks", "_length")
+    
+    def __init__(self, components=()):
+        components = list(components)
+        self._chunks = tuple(tuple(components[i:i + CHUNK_SIZE])
+                             for i in range(0, len(components), CHUNK_SIZE))
+        self._length = len(components)
+    
+    @classmethod
+    def _from_chunks(cls, chunks, length):
+        components = cls.__new__(cls)
+        components._chunks = chunks
+        components._length = length
+        return components
+    
+    def __len__(self):
+        return self._length
+    
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield from chunk
+    
+    def __getitem__(self, index):
+        position, offset = self._locate(index)
+        return self._chunks[position][offset]
+    
+    def to_list(self):
+        """Plain list of the components (the dicts themselves are shared)"""
+        return list(self)
+    
+    def _locate(self, index):
+        """(chunk position, offset in the chunk) of a component index"""
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("component index out of range")
+        for position, chunk in enumerate(self._chunks):
+            if index < len(chunk):
+                return position, index
+            index -= len(chunk)
+    
+    def _replace_chunk(self, position, new_chunks, length_change):
+        chunks = (self._chunks[:position] + tuple(chunk for chunk in new_chunks if chunk)
+                  + self._chunks[position + 1:])
+        return ComponentList._from_chunks(chunks, self._length + length_change)
+    
+    def set(self, index, component):
+        """Copy with the component at index replaced"""
+        position, offset = self._locate(index)
+        chunk = self._chunks[position]
+        return self._replace_chunk(position, (chunk[:offset] + (component,) + chunk[offset + 1:],), 0)
+    
+    def insert(self, index, component):
+        """Copy with component inserted before index (at the end when index >= len)"""
+        if index >= self._length:
+            if self._chunks and len(self._chunks[-1]) < CHUNK_SIZE:
+                position, offset = len(self._chunks) - 1, len(self._chunks[-1])
+            else:
+                return ComponentList._from_chunks(self._chunks + ((component,),), self._length + 1)
+        else:
+            position, offset = self._locate(index)
+        chunk = self._chunks[position]
+        chunk = chunk[:offset] + (component,) + chunk[offset:]
+        if len(chunk) > CHUNK_SIZE:
+            # Split a full chunk so later edits stay small
+            middle = len(chunk) // 2
+            return self._replace_chunk(position, (chunk[:middle], chunk[middle:]), 1)
+        return self._replace_chunk(position, (chunk,), 1)
+    
+    def append(self, component):
+        return self.insert(self._length, component)
+    
+    def extend(self, components):
+        """Copy with components appended as new chunks"""
+        components = list(components)
+        added = ComponentList(components)
+        return ComponentList._from_chunks(self._chunks + added._chunks, self._length + len(components))
+    
+    def delete(self, index):
+        """Copy without the component at index"""
+        position, offset = self._locate(index)
+        chunk = self._chunks[position]
+        return self._replace_chunk(position, (chunk[:offset] + chunk[offset + 1:],), -1)
+    
+    def swap(self, first, second):
+        """Copy with two components exchanged (move up / down)"""
+        first_component = self[first]
+        return self.set(first, self[second]).set(second, first_component)
+
+class ComponentHistory:
+    """Current ComponentList with unlimited undo and redo
+    
+    Each step records the version it replaced, a label for the buttons
+    ("Delete", "Paste import", ...) and the selected index to restore.
+    """
+    
+    def __init__(self, components=()):
+        self.current = ComponentList(components)
+        self.selection = None
+        # (components, selection, label) of the versions before / after current
+        self._undo = []
+        self._redo = []
+    
+    def apply(self, label, components, selection=None, before=None):
+        """Make components the current version; clears the redo steps
+        
+        selection is the index to select in the new version, before the
+        one selected when the step was made (restored by undo).
+        """
+        self._undo.append((self.current, before, label))
+        self._redo.clear()
+        self.current = components
+        self.selection = selection
+    
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+    
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+    
+    @property
+    def undo_label(self):
+        return self._undo[-1][2] if self._undo else None
+    
+    @property
+    def redo_label(self):
+        return self._redo[-1][2] if self._redo else None
+    
+    def undo(self):
+        """Go back one step; returns its label, or None when there is nothing to undo"""
+        if not self._undo:
+            return None
+        components, selection, label = self._undo.pop()
+        self._redo.append((self.current, self.selection, label))
+        self.current, self.selection = components, selection
+        return label
+    
+    def redo(self):
+        """Repeat the last undone step; returns its label, or None"""
+        if not self._redo:
+            return None
+        components, selection, label = self._redo.pop()
+        self._undo.append((self.current, self.selection, label))
+        self.current, self.selection = components, selection
+        return label
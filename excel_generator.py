@@ -1,226 +1,340 @@
 import pandas as pd
 import pyperclip
-import win32com.client
+import io
 import os
-from tkinter import messagebox
 import re
+import openpyxl
+from row_cache import RowCache
+from tracing import tracer
+from job_runner import JobCancelled, PROGRESS_CHUNK
+from actuator_block import (find_actuator_row, find_insertion_point, build_row_index,
+                            plan_upsert, describe_upsert, plan_sorted_insertion,
+                            INSERT_APPEND, ORDER_END)
+from excel_session import ExcelSession, ExcelSessionError, COM_AVAILABLE
+from column_mapping import build_column_mapping
+from schema import get_layout
+from actuator_validation import ExistingSymbols, symbols_from_block
+from output_cache import (inputs_hash, is_up_to_date, record_output, write_reproducible_zip,
+                          BUILD_WRITTEN, BUILD_SKIPPED, BUILD_FAILED)
 
 class ExcelGenerator:
-    def __init__(self):
-        self.column_headers = [
-            "Actuator", "Name", "Index", "DataType", "Prefix", "Output", "Out.Descr.", 
-            "Input", "Inp.Descr.", "Alm 0", "Alm 1", "Alm 0 Descr. Language1", 
-            "Alm 0 Descr. Language2", "Alm 0 Descr. Language3", "Alm 1 Descr.Language1", 
-            "Alm 1 Descr.Language2", "Alm 1 Descr.Language3", "Alm0 Procedure", 
-            "Alm1 Procedure", "Alm0 BAD", "Alm1 BAD", "Alm0 Cause", "Alm1 Cause", 
-            "Alm0 Action", "Alm1 Action"
-        ]
+    def __init__(self, excel_session=None, layout=None):
+        # Generated rows are cached per (template content, number, name)
+        self.row_cache = RowCache()
+        
+        # Excel handles are kept between inserts and detections
+        self.excel_session = excel_session if excel_session is not None else ExcelSession()
+        
+        # Output columns and their compiled row projector (see schema.py)
+        self.layout = get_layout(layout)
+        self.column_headers = list(self.layout.headers)
     
-    def generate_excel_rows(self, actuators_data):
+    def generate_excel_rows(self, actuators_data, job=None):
         """Generate Excel rows from actuators data"""
-        rows = []
-        
-        for actuator_data in actuators_data:
-            actuator_number = actuator_data['actuator_number']
-            actuator_name = actuator_data['actuator_name']
+        with tracer.span("generate_rows", summary="generated {rows:,} rows in {ms:.0f} ms") as span:
+            rows = []
+            total_rows = sum(len(actuator_data['actuators']) for actuator_data in actuators_data) if job else 0
+            next_report = PROGRESS_CHUNK
             
-            for actuator in actuator_data['actuators']:
-                # Replace placeholders with actual values
-                row = self._process_actuator_row(actuator, actuator_number, actuator_name)
-                rows.append(row)
+            for actuator_data in actuators_data:
+                rows.extend(self._generate_actuator_rows(actuator_data))
+                
+                # Report progress and allow cancellation between chunks
+                if job and len(rows) >= next_report:
+                    job.report(len(rows), total_rows)
+                    next_report = len(rows) + PROGRESS_CHUNK
+            
+            span.add(rows=len(rows), actuators=len(actuators_data))
         
         return rows
     
-    def _process_actuator_row(self, actuator, actuator_number, actuator_name):
-        """Process a single actuator row, replacing placeholders"""
-        row = [
-            f"_{actuator_number}",  # Actuator column with underscore prefix
-            self._replace_placeholders(actuator.get('name', ''), actuator_name),
-            actuator.get('index', ''),
-            actuator.get('datatype', ''),
-            actuator.get('prefix', ''),
-            actuator.get('output', ''),
-            actuator.get('out_descr', ''),
-            self._replace_placeholders(actuator.get('input', ''), actuator_name),
-            self._replace_placeholders(actuator.get('inp_descr', ''), actuator_name),
-            actuator.get('alm0', ''),
-            actuator.get('alm1', ''),
-            self._replace_placeholders(actuator.get('alm0_descr_lang1', ''), actuator_name),
-            self._replace_placeholders(actuator.get('alm0_descr_lang2', ''), actuator_name),
-            self._replace_placeholders(actuator.get('alm0_descr_lang3', ''), actuator_name),
-            self._replace_placeholders(actuator.get('alm1_descr_lang1', ''), actuator_name),
-            self._replace_placeholders(actuator.get('alm1_descr_lang2', ''), actuator_name),
-            self._replace_placeholders(actuator.get('alm1_descr_lang3', ''), actuator_name),
-            actuator.get('alm0_procedure', ''),
-            actuator.get('alm1_procedure', ''),
-            actuator.get('alm0_bad', ''),
-            actuator.get('alm1_bad', ''),
-            actuator.get('alm0_cause', ''),
-            actuator.get('alm1_cause', ''),
-            actuator.get('alm0_action', ''),
-            actuator.get('alm1_action', '')
-        ]
-        return row
-    
-    def _replace_placeholders(self, text, actuator_name):
-        """Replace placeholders in text with actual values"""
-        if not text:
-            return text
+    def _generate_actuator_rows(self, actuator_data):
+        """Generate the rows of a single actuator, using the row cache"""
+        key = self.row_cache.make_key(actuator_data)
+        cached_rows = self.row_cache.get(key)
+        if cached_rows is not None:
+            return cached_rows
+        
+        actuator_number = actuator_data['actuator_number']
+        actuator_name = actuator_data['actuator_name']
         
-        # Replace {ActuatorName} placeholder
-        text = text.replace('{ActuatorName}', actuator_name)
+        project = self.layout.project
+        rows = [project(actuator, actuator_number, actuator_name)
+                for actuator in actuator_data['actuators']]
         
-        return text
+        self.row_cache.put(key, rows, actuator_data.get('template_name'))
+        return rows
     
-    def copy_to_clipboard(self, actuators_data):
+    def copy_to_clipboard(self, actuators_data, job=None):
         """Copy generated rows to clipboard in tab-separated format"""
         try:
-            rows = self.generate_excel_rows(actuators_data)
-            
-            # Convert to tab-separated format
-            clipboard_text = ""
-            for row in rows:
-                # Convert each cell to string and join with tabs
-                row_text = "\t".join(str(cell) for cell in row)
-                clipboard_text += row_text + "\n"
-            
-            # Copy to clipboard
-            pyperclip.copy(clipboard_text)
+            rows = self.generate_excel_rows(actuators_data, job)
+            
+            with tracer.span("clipboard", summary="copied {bytes:,} bytes in {ms:.0f} ms") as span:
+                # Convert to tab-separated format
+                clipboard_text = ""
+                for row in rows:
+                    # Convert each cell to string and join with tabs
+                    row_text = "\t".join(str(cell) for cell in row)
+                    clipboard_text += row_text + "\n"
+                
+                # Copy to clipboard
+                if job:
+                    job.check_cancelled()
+                pyperclip.copy(clipboard_text)
+                span.add(rows=len(rows), bytes=len(clipboard_text.encode('utf-8')))
             
             return True, f"Copied {len(rows)} rows to clipboard. You can now paste them into Excel."
             
+        except JobCancelled:
+            raise
         except Exception as e:
             return False, f"Error copying to clipboard: {str(e)}"
     
-    def insert_into_excel(self, actuators_data):
-        """Insert rows directly into open Excel file"""
+    def insert_into_excel(self, actuators_data, job=None, mode=INSERT_APPEND, order=ORDER_END):
+        """Insert rows directly into open Excel file
+        
+        mode is one of actuator_block.INSERT_MODES: "append" inserts every row,
+        "skip" only rows whose (Actuator, Name) is not in the block yet and
+        "upsert" additionally updates changed existing rows in place.
+        order is one of actuator_block.INSERT_ORDERS: "end" inserts one block
+        above "Actuator End", "sorted" places each actuator by its number.
+        """
+        if not self.excel_session.available:
+            return False, "Excel integration requires pywin32 and is only available on Windows."
+        
         try:
-            # Try to connect to Excel application
-            xl_app = win32com.client.GetActiveObject("Excel.Application")
+            # Selected target sheet, or the active sheet (reconnects if Excel restarted)
+            worksheet = self.excel_session.target_worksheet()
             
-            if not xl_app:
-                return False, "No Excel application found. Please open Excel first."
-            
-            # Get active workbook and worksheet
-            workbook = xl_app.ActiveWorkbook
-            if not workbook:
-                return False, "No active workbook found. Please open an Excel file."
-            
-            worksheet = xl_app.ActiveSheet
-            if not worksheet:
-                return False, "No active worksheet found."
-            
-            # Find "Actuator" in the first column
-            actuator_row = self._find_actuator_row(worksheet)
+            # Read the first column once and find "Actuator" in it
+            with tracer.span("com_find_actuator_row"):
+                column_a = self._read_column_a(worksheet)
+                actuator_row = self._find_actuator_row(column_a)
             if actuator_row is None:
                 return False, "Could not find 'Actuator' in the first column. Please make sure your Excel file has the correct format."
             
-            # Generate rows to insert
-            rows = self.generate_excel_rows(actuators_data)
+            # Match the generated columns against the sheet's header row
+            with tracer.span("com_read_header"):
+                mapping = self._read_column_mapping(worksheet, actuator_row)
             
-            # Find the insertion point (after the last data row before "Actuator End")
-            insert_row = self._find_insertion_point(worksheet, actuator_row)
+            # Generate rows to insert
+            rows = self.generate_excel_rows(actuators_data, job)
+            if job:
+                job.check_cancelled()
             
-            # Insert new rows to make space (instead of overwriting)
-            worksheet.Rows(f"{insert_row}:{insert_row + len(rows) - 1}").Insert()
+            # Report layout mismatches before anything is written
+            problem = mapping.check(rows)
+            if problem:
+                return False, problem
+            layout_text = f" ({mapping.describe()})" if mapping.describe() else ""
             
-            # Insert row data
-            for i, row in enumerate(rows):
-                current_row = insert_row + i
+            # Find the insertion point (after the last data row before "Actuator End")
+            with tracer.span("com_find_insertion_point"):
+                insert_row = self._find_insertion_point(column_a, actuator_row)
+            
+            plan = None
+            if mode != INSERT_APPEND:
+                # Read the existing block once and keep only new (or changed) rows
+                with tracer.span("com_read_block") as span:
+                    existing_rows = [mapping.from_sheet(row) for row in
+                                     self._read_block(worksheet, actuator_row + 1, insert_row - 1,
+                                                      mapping.last_column)]
+                    span.add(rows=len(existing_rows))
+                plan = plan_upsert(build_row_index(existing_rows, actuator_row + 1), rows, mode)
+                
+                with tracer.span("com_update_rows", rows=len(plan['updates'])):
+                    for sheet_row, row in plan['updates']:
+                        self._write_block_range(worksheet, sheet_row, [row], mapping)
+                rows = plan['new_rows']
                 
-                # Insert row data
-                for j, cell_value in enumerate(row):
-                    worksheet.Cells(current_row, j + 1).Value = cell_value
+                if not rows:
+                    return True, f"Nothing new to insert into Excel ({describe_upsert(plan)}){layout_text}."
             
-            return True, f"Successfully inserted {len(rows)} rows into Excel at row {insert_row}."
+            if order != ORDER_END:
+                inserted_blocks = self._insert_sorted(worksheet, column_a, actuator_row, insert_row, rows,
+                                                      mapping, job)
+                summary = describe_upsert(plan) if plan is not None else f"inserted {len(rows)} rows"
+                return True, f"Updated Excel sorted by actuator number ({inserted_blocks} blocks): {summary}{layout_text}."
             
+            # Insert new rows to make space (instead of overwriting)
+            with tracer.span("com_insert_rows", rows=len(rows)):
+                worksheet.Rows(f"{insert_row}:{insert_row + len(rows) - 1}").Insert()
+            
+            # Insert row data, one range write per column run and chunk of rows
+            with tracer.span("com_write_cells", summary="wrote {rows:,} rows to Excel in {ms:.0f} ms") as span:
+                for i in range(0, len(rows), PROGRESS_CHUNK):
+                    current_row = insert_row + i
+                    
+                    # Report progress and allow cancellation between chunks
+                    if job and i:
+                        try:
+                            job.report(i, len(rows))
+                        except JobCancelled:
+                            # Remove the rows that were inserted but not written yet
+                            worksheet.Rows(f"{current_row}:{insert_row + len(rows) - 1}").Delete()
+                            raise
+                    
+                    chunk = rows[i:i + PROGRESS_CHUNK]
+                    self._write_block_range(worksheet, current_row, chunk, mapping)
+                    span.add(rows=len(chunk), writes=len(mapping.runs))
+            
+            if plan is not None:
+                return True, f"Updated Excel at row {insert_row}: {describe_upsert(plan)}{layout_text}."
+            return True, f"Successfully inserted {len(rows)} rows into Excel at row {insert_row}{layout_text}."
+        
+        except JobCancelled:
+            raise
+        except ExcelSessionError as e:
+            return False, str(e)
         except Exception as e:
+            # The handles may be stale; reconnect on the next call
+            self.excel_session.reset()
             return False, f"Error inserting into Excel: {str(e)}"
     
-    def _find_insertion_point(self, worksheet, actuator_row):
+    def read_existing_symbols(self):
+        """Actuator numbers and tag names already in the block of the target sheet"""
+        worksheet = self.excel_session.target_worksheet()
+        column_a = self._read_column_a(worksheet)
+        actuator_row = self._find_actuator_row(column_a)
+        if actuator_row is None:
+            return ExistingSymbols(f"sheet '{worksheet.Name}'")
+        insert_row = self._find_insertion_point(column_a, actuator_row)
+        used_range = worksheet.UsedRange
+        last_column = max(used_range.Column + used_range.Columns.Count - 1, 2)
+        block = self._read_block(worksheet, actuator_row, insert_row - 1, last_column)
+        return symbols_from_block(block[0], block[1:], f"sheet '{worksheet.Name}'")
+    
+    def _insert_sorted(self, worksheet, column_a, actuator_row, insert_row, rows, mapping, job=None):
+        """Insert actuator groups at their actuator-number positions; returns the block count"""
+        # Column A as read for the insertion point, binary-searched for every group
+        existing_values = column_a[actuator_row:insert_row - 1]
+        plan = plan_sorted_insertion(existing_values, actuator_row + 1, rows)
+        
+        # Bottom-up, so the planned row numbers above stay valid
+        with tracer.span("com_insert_blocks", summary="inserted {rows:,} rows in {ms:.0f} ms") as span:
+            written = 0
+            for sheet_row, block_rows in reversed(plan):
+                if job:
+                    job.report(written, len(rows))
+                worksheet.Rows(f"{sheet_row}:{sheet_row + len(block_rows) - 1}").Insert()
+                self._write_block_range(worksheet, sheet_row, block_rows, mapping)
+                written += len(block_rows)
+                span.add(rows=len(block_rows), blocks=1)
+        return len(plan)
+    
+    def _write_block_range(self, worksheet, first_row, rows, mapping):
+        """Write a block of rows with one Range write per run of mapped columns"""
+        last_row = first_row + len(rows) - 1
+        for first_column, values in mapping.run_values(rows):
+            worksheet.Range(worksheet.Cells(first_row, first_column),
+                            worksheet.Cells(last_row, first_column + len(values[0]) - 1)).Value = values
+    
+    def _read_column_mapping(self, worksheet, header_row):
+        """Read the header row with one Range call and map the generated columns onto it"""
+        used_range = worksheet.UsedRange
+        last_column = max(used_range.Column + used_range.Columns.Count - 1, len(self.column_headers))
+        header_values = self._read_block(worksheet, header_row, header_row, last_column)[0]
+        return build_column_mapping(self.column_headers, header_values)
+    
+    def _read_block(self, worksheet, first_row, last_row, column_count):
+        """Read rows first_row..last_row with a single Range call"""
+        if last_row < first_row:
+            return []
+        values = worksheet.Range(worksheet.Cells(first_row, 1),
+                                 worksheet.Cells(last_row, column_count)).Value
+        if not isinstance(values, tuple):
+            # A single cell comes back as a plain value
+            return [[values]]
+        return [list(row) for row in values]
+    
+    def _read_column_a(self, worksheet):
+        """Read the first column down to the last used row with a single Range call"""
+        used_range = worksheet.UsedRange
+        last_row = used_range.Row + used_range.Rows.Count - 1
+        return [row[0] for row in self._read_block(worksheet, 1, last_row, 1)]
+    
+    @staticmethod
+    def _column_value(column_a):
+        """get_value(row) over the values of _read_column_a"""
+        return lambda row: column_a[row - 1] if 0 < row <= len(column_a) else None
+    
+    def _find_insertion_point(self, column_a, actuator_row):
         """Find the best insertion point (before 'Actuator End' or after last data)"""
         try:
-            # Look for "Actuator End" marker
-            for row in range(actuator_row + 1, actuator_row + 1000):
-                cell_value = str(worksheet.Cells(row, 1).Value).strip().lower()
-                if cell_value == "actuator end":
-                    return row  # Insert before "Actuator End"
-            
-            # If no "Actuator End" found, find last non-empty row after actuator header
-            last_data_row = actuator_row + 1
-            for row in range(actuator_row + 1, actuator_row + 1000):
-                cell_value = worksheet.Cells(row, 1).Value
-                if cell_value is None or str(cell_value).strip() == "":
-                    break
-                last_data_row = row + 1
-            
-            return last_data_row
-            
+            return find_insertion_point(self._column_value(column_a), actuator_row, len(column_a))
         except Exception:
             # Fallback: insert right after actuator header
             return actuator_row + 1
     
-    def _find_actuator_row(self, worksheet):
+    def _find_actuator_row(self, column_a):
         """Find the row containing 'Actuator' in the first column"""
         try:
-            # Search in first column (up to row 100 to be safe)
-            for row in range(1, 101):
-                cell_value = str(worksheet.Cells(row, 1).Value).strip()
-                if cell_value.lower() == "actuator":
-                    return row
-            return None
+            return find_actuator_row(self._column_value(column_a))
         except Exception:
             return None
     
-    def detect_excel_files(self):
-        """Detect open Excel files and their sheets"""
+    def detect_excel_files(self, job=None, refresh=False):
+        """Detect open Excel files and their sheets (cached until Excel changes or refresh)"""
+        if not self.excel_session.available:
+            return False, "Excel integration requires pywin32 and is only available on Windows."
+        
         try:
-            xl_app = win32com.client.GetActiveObject("Excel.Application")
-            
-            if not xl_app:
-                return False, "No Excel application found."
-            
-            workbooks_info = []
-            
-            for i in range(1, xl_app.Workbooks.Count + 1):
-                workbook = xl_app.Workbooks(i)
-                workbook_info = {
-                    'name': workbook.Name,
-                    'path': workbook.FullName if workbook.Saved else "Unsaved",
-                    'sheets': []
-                }
-                
-                # Get sheet names
-                for j in range(1, workbook.Worksheets.Count + 1):
-                    sheet = workbook.Worksheets(j)
-                    workbook_info['sheets'].append(sheet.Name)
-                
-                workbooks_info.append(workbook_info)
-            
-            return True, workbooks_info
-            
+            return True, self.excel_session.snapshot(job, refresh)
+        
+        except JobCancelled:
+            raise
+        except ExcelSessionError as e:
+            return False, str(e)
         except Exception as e:
+            self.excel_session.reset()
             return False, f"Error detecting Excel files: {str(e)}"
     
-    def generate_excel_file(self, actuators_data, file_path):
-        """Generate a new Excel file with the actuator data"""
+    def generate_excel_file(self, actuators_data, file_path, job=None):
+        """Generate a new Excel file with the actuator data (byte-identical for the same data)"""
         try:
             # Create DataFrame with headers
-            rows = self.generate_excel_rows(actuators_data)
+            rows = self.generate_excel_rows(actuators_data, job)
+            if job:
+                job.check_cancelled()
             
-            # Create DataFrame
-            df = pd.DataFrame(rows, columns=self.column_headers)
-            
-            # Save to Excel
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Actuators', index=False)
+            with tracer.span("xlsx", summary="wrote xlsx in {ms:.0f} ms") as span:
+                # Create DataFrame
+                df = pd.DataFrame(rows, columns=self.column_headers)
+                
+                # Save to Excel, then fix the timestamps so the same rows give the same file
+                data = io.BytesIO()
+                with pd.ExcelWriter(data, engine='openpyxl') as writer:
+                    df.to_excel(writer, sheet_name='Actuators', index=False)
+                write_reproducible_zip(data, file_path)
+                
+                span.add(rows=len(rows), bytes=os.path.getsize(file_path))
             
             return True
             
+        except JobCancelled:
+            raise
         except Exception as e:
             print(f"Error generating Excel file: {e}")
             return False
     
+    def build_excel_file(self, actuators_data, file_path, job=None, force=False):
+        """Generate an Excel file unless its sidecar shows it was built from the same inputs
+        
+        Returns BUILD_WRITTEN, BUILD_SKIPPED or BUILD_FAILED (see output_cache.py).
+        """
+        inputs = inputs_hash(actuators_data, "xlsx", self.column_headers, pd.__version__, openpyxl.__version__)
+        if not force and is_up_to_date(file_path, inputs):
+            return BUILD_SKIPPED
+        if not self.generate_excel_file(actuators_data, file_path, job):
+            return BUILD_FAILED
+        try:
+            record_output(file_path, inputs)
+        except OSError as e:
+            # The file is fine; it is only rebuilt next time
+            print(f"Error writing build sidecar: {e}")
+        return BUILD_WRITTEN
+    
     def validate_excel_format(self, file_path):
         """Validate that the Excel file has the correct format"""
         try:
@@ -0,0 +1,162 @@
+import threading
+from tracing import tracer
+
+try:
+    import win32com.client
+except ImportError:
+    # Direct Excel integration is only available on Windows (pywin32)
+    win32com = None
+
+COM_AVAILABLE = win32com is not None
+
+class ExcelSessionError(Exception):
+    """Raised when Excel or the selected target cannot be reached"""
+
+def connect_running_excel():
+    """Attach to the running Excel application"""
+    return win32com.client.GetActiveObject("Excel.Application")
+
+class ExcelSession:
+    """Excel application and worksheet handles kept for the app's lifetime.
+    
+    Handles are checked with one cheap call before use and the session
+    reconnects when Excel was restarted. The workbook/sheet snapshot is cached
+    and only walked again on refresh or when its signature changes. connect
+    returns an Excel.Application-like object, so the session also works
+    against a fake object model.
+    """
+    
+    def __init__(self, connect=None):
+        self._connect = connect if connect is not None else (connect_running_excel if COM_AVAILABLE else None)
+        self._lock = threading.RLock()
+        self._app = None
+        self._sheets = {}
+        self._snapshot = None
+        self._snapshot_signature = None
+        self.target_workbook = None
+        self.target_sheet = None
+        self.connect_count = 0
+    
+    @property
+    def available(self):
+        """Whether Excel can be reached at all on this system"""
+        return self._connect is not None
+    
+    def application(self):
+        """The Excel application, reconnecting if the cached handle went stale"""
+        with self._lock:
+            if self._app is not None:
+                try:
+                    self._app.Workbooks.Count
+                    return self._app
+                except Exception:
+                    # Excel was closed or restarted; every cached handle is dead
+                    self.reset()
+            
+            if self._connect is None:
+                raise ExcelSessionError("Excel integration requires pywin32 and is only available on Windows.")
+            with tracer.span("com_connect"):
+                try:
+                    app = self._connect()
+                except Exception:
+                    app = None
+            if not app:
+                raise ExcelSessionError("No Excel application found. Please open Excel first.")
+            self._app = app
+            self.connect_count += 1
+            return app
+    
+    def reset(self):
+        """Drop every cached handle and the snapshot"""
+        with self._lock:
+            self._app = None
+            self._sheets = {}
+            self._snapshot = None
+            self._snapshot_signature = None
+    
+    def select_target(self, workbook_name=None, sheet_name=None):
+        """Use the given open workbook/sheet instead of the active sheet (None for the active one)"""
+        with self._lock:
+            self.target_workbook = workbook_name or None
+            self.target_sheet = sheet_name or None
+    
+    def describe_target(self):
+        """Target for messages, e.g. 'Plant.xlsx / IO'"""
+        if not self.target_workbook:
+            return "the active sheet"
+        return f"{self.target_workbook} / {self.target_sheet or 'active sheet'}"
+    
+    def target_worksheet(self):
+        """The worksheet inserts go to: the selected target, or the active sheet"""
+        with self._lock:
+            app = self.application()
+            if not self.target_workbook:
+                workbook = app.ActiveWorkbook
+                if not workbook:
+                    raise ExcelSessionError("No active workbook found. Please open an Excel file.")
+                worksheet = app.ActiveSheet
+                if not worksheet:
+                    raise ExcelSessionError("No active worksheet found.")
+                return worksheet
+            
+            key = (self.target_workbook, self.target_sheet)
+            worksheet = self._sheets.get(key)
+            if worksheet is not None:
+                try:
+                    if worksheet.Name == self.target_sheet:
+                        return worksheet
+                except Exception:
+                    pass
+                del self._sheets[key]
+            
+            try:
+                workbook = app.Workbooks(self.target_workbook)
+            except Exception:
+                raise ExcelSessionError(f"Workbook '{self.target_workbook}' is not open in Excel.")
+            if self.target_sheet is None:
+                # The workbook's active sheet can change, so it is not cached
+                return workbook.ActiveSheet
+            try:
+                worksheet = workbook.Worksheets(self.target_sheet)
+            except Exception:
+                raise ExcelSessionError(f"Sheet '{self.target_sheet}' not found in '{self.target_workbook}'.")
+            self._sheets[key] = worksheet
+            return worksheet
+    
+    def snapshot(self, job=None, refresh=False):
+        """Open workbooks and their sheets: [{'name', 'path', 'sheets'}]
+        
+        The full walk (one COM call per workbook and sheet) only runs on refresh
+        or when the cheap signature (workbook count, active workbook and its sheet
+        count) changed; renaming sheets of other workbooks needs a refresh.
+        """
+        with self._lock:
+            app = self.application()
+            signature = self._signature(app)
+            if not refresh and self._snapshot is not None and signature == self._snapshot_signature:
+                return self._snapshot
+            
+            workbooks_info = []
+            with tracer.span("com_detect", summary="scanned Excel in {ms:.0f} ms"):
+                workbook_count = app.Workbooks.Count
+                for i in range(1, workbook_count + 1):
+                    if job:
+                        job.report(i - 1, workbook_count)
+                    workbook = app.Workbooks(i)
+                    worksheets = workbook.Worksheets
+                    workbooks_info.append({
+                        'name': workbook.Name,
+                        'path': workbook.FullName if workbook.Saved else "Unsaved",
+                        'sheets': [worksheets(j).Name for j in range(1, worksheets.Count + 1)]
+                    })
+            
+            self._snapshot = workbooks_info
+            self._snapshot_signature = signature
+            return workbooks_info
+    
+    def _signature(self, app):
+        """Cheap change check for the snapshot"""
+        workbook = app.ActiveWorkbook
+        if not workbook:
+            return (app.Workbooks.Count, None, 0)
+        return (app.Workbooks.Count, workbook.Name, workbook.Worksheets.Count)
@@ -0,0 +1,188 @@
+"""Streaming file exporters and their registry.
+
+An exporter consumes a stream of rows projected with its layout (see
+schema.py) and writes them to a text stream one at a time, so memory use
+does not grow with the number of rows. Exporters register themselves with
+@register_exporter; modules named *_export.py next to this file are
+imported by discover_exporters(), so a new format only needs a new module:
+
+    @register_exporter
+    class TsvExporter(Exporter):
+        name = "tsv"
+        label = "Tab-separated text"
+        extension = ".tsv"
+        
+        def write(self, stream, rows, job=None):
+            ...
+"""
+import csv
+import importlib
+import json
+import os
+from atomic_file import atomic_write
+from job_runner import JobCancelled, PROGRESS_CHUNK
+from schema import get_layout, register_layout, ACTUATOR_KEY, STANDARD_LAYOUT
+from tracing import tracer
+
+EXPORT_MODULE_SUFFIX = "_export.py"
+
+EXPORTERS = {}
+_discovered = False
+
+def iter_rows(actuators_data, layout=STANDARD_LAYOUT, job=None):
+    """Yield the rows of every actuator projected with layout, reporting progress to job"""
+    project = layout.project
+    total = sum(len(actuator_data['actuators']) for actuator_data in actuators_data) if job else 0
+    done = 0
+    for actuator_data in actuators_data:
+        actuator_number = actuator_data['actuator_number']
+        actuator_name = actuator_data['actuator_name']
+        for component in actuator_data['actuators']:
+            yield project(component, actuator_number, actuator_name)
+            done += 1
+            if job and done % PROGRESS_CHUNK == 0:
+                job.report(done, total)
+
+class Exporter:
+    """Base class of the file exporters; subclasses implement write()"""
+    
+    name = None
+    label = None
+    extension = ""
+    file_type = "Text files"
+    unit = "rows"
+    encoding = "utf-8"
+    # Name of the layout whose columns write() consumes; None means the layout chosen for the export
+    layout_name = None
+    
+    def __init__(self, layout=None, **options):
+        # The schema.Layout the rows are projected with
+        self.layout = get_layout(self.layout_name or layout)
+        self.options = options
+    
+    def write(self, stream, rows, job=None):
+        """Write rows to a text stream; returns (items written, note for the message)"""
+        raise NotImplementedError
+    
+    def export(self, actuators_data, file_path, job=None):
+        """Write the file atomically; returns (success, message)"""
+        try:
+            with atomic_write(file_path, self.extension) as temp_path:
+                with tracer.span(self.name, summary=f"wrote {{items:,}} {self.unit} in {{ms:.0f}} ms") as span:
+                    with open(temp_path, "w", encoding=self.encoding, newline="") as f:
+                        written, note = self.write(f, iter_rows(actuators_data, self.layout, job), job)
+                    span.add(items=written, bytes=os.path.getsize(temp_path))
+            
+            message = f"Exported {written} {self.unit} to {os.path.basename(file_path)}"
+            if note:
+                message += f" ({note})"
+            return True, message + "."
+        
+        except JobCancelled:
+            raise
+        except Exception as e:
+            return False, f"Error exporting {self.label}: {str(e)}"
+
+def register_exporter(cls):
+    """Class decorator adding an exporter to the registry under cls.name"""
+    EXPORTERS[cls.name] = cls
+    return cls
+
+def discover_exporters():
+    """Import the *_export.py modules once so their exporters register themselves"""
+    global _discovered
+    if not _discovered:
+        _discovered = True
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for file_name in sorted(os.listdir(directory)):
+            if file_name.endswith(EXPORT_MODULE_SUFFIX):
+                try:
+                    importlib.import_module(file_name[:-3])
+                except Exception as e:
+                    print(f"Error loading exporter module {file_name}: {e}")
+    return EXPORTERS
+
+def get_exporter(name, **options):
+    """A new exporter of the registered format name"""
+    exporters = discover_exporters()
+    if name not in exporters:
+        raise ValueError(f"Unknown export format '{name}'. Available formats: {', '.join(exporters)}")
+    return exporters[name](**options)
+
+@register_exporter
+class CsvExporter(Exporter):
+    """Comma-separated rows with a header line"""
+    
+    name = "csv"
+    label = "CSV"
+    extension = ".csv"
+    file_type = "CSV files"
+    # With a byte order mark Excel detects UTF-8 when opening the file
+    encoding = "utf-8-sig"
+    
+    def write(self, stream, rows, job=None):
+        writer = csv.writer(stream, lineterminator="\n")
+        writer.writerow(self.layout.headers)
+        written = 0
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+        return written, ""
+
+@register_exporter
+class JsonLinesExporter(Exporter):
+    """One JSON object per row, keyed by field"""
+    
+    name = "jsonl"
+    label = "JSON Lines"
+    extension = ".jsonl"
+    file_type = "JSON Lines files"
+    
+    def write(self, stream, rows, job=None):
+        keys = self.layout.keys
+        written = 0
+        for row in rows:
+            stream.write(json.dumps(dict(zip(keys, row)), ensure_ascii=False))
+            stream.write("\n")
+            written += 1
+        return written, ""
+
+# Both alarm slots of a component: (number, descriptions, procedure, BAD, cause, action)
+HMI_ALARM_LAYOUT = register_layout(
+    "hmi_alarms", (ACTUATOR_KEY, "name",
+                   "alm0", "alm0_descr_lang1", "alm0_descr_lang2", "alm0_descr_lang3",
+                   "alm0_procedure", "alm0_bad", "alm0_cause", "alm0_action",
+                   "alm1", "alm1_descr_lang1", "alm1_descr_lang2", "alm1_descr_lang3",
+                   "alm1_procedure", "alm1_bad", "alm1_cause", "alm1_action"),
+    "Alarm columns used by the HMI alarm export")
+
+HMI_ALARM_HEADERS = ("Tag", "Alarm", "Number", "Message Language1", "Message Language2",
+                     "Message Language3", "Procedure", "BAD", "Cause", "Action")
+
+@register_exporter
+class HmiAlarmExporter(Exporter):
+    """One CSV line per configured alarm (Alm 0 / Alm 1) of every component"""
+    
+    name = "hmi_alarms"
+    label = "HMI alarm CSV"
+    extension = ".csv"
+    file_type = "CSV files"
+    unit = "alarms"
+    encoding = "utf-8-sig"
+    layout_name = HMI_ALARM_LAYOUT.name
+    
+    def write(self, stream, rows, job=None):
+        writer = csv.writer(stream, lineterminator="\n")
+        writer.writerow(HMI_ALARM_HEADERS)
+        written = 0
+        for row in rows:
+            tag = row[1]
+            for slot, first in enumerate((2, 10)):
+                number, lang1, lang2, lang3, procedure, bad, cause, action = row[first:first + 8]
+                if number in (None, "") and not lang1:
+                    continue
+                # Multi-line causes and actions keep their line breaks inside the quoted cell
+                writer.writerow((tag, f"Alm{slot}", number, lang1, lang2, lang3, procedure, bad,
+                                 str(cause).replace("\r\n", "\n"), str(action).replace("\r\n", "\n")))
+                written += 1
+        return written, ""
@@ -0,0 +1,142 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from template_history import ACTION_DELETE
+
+class HistoryDialog:
+    """Saved versions of a template, the changes of each and restoring one"""
+    
+    def __init__(self, parent, template_name, template_manager):
+        self.parent = parent
+        self.template_name = template_name
+        self.template_manager = template_manager
+        self.history = template_manager.history
+        # True when a version was restored (the template list needs a refresh)
+        self.result = False
+        
+        self.versions = self.history.versions(template_name)
+        if not self.versions:
+            messagebox.showinfo("Template History", f"No saved versions of '{template_name}' yet.")
+            return
+        
+        # Create dialog window
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(f"History: {template_name}")
+        self.dialog.geometry("900x600")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        # Center the dialog
+        self.dialog.update_idletasks()
+        x = (self.dialog.winfo_screenwidth() // 2) - (450)
+        y = (self.dialog.winfo_screenheight() // 2) - (300)
+        self.dialog.geometry(f"900x600+{x}+{y}")
+        
+        self.create_widgets()
+        self.load_versions()
+        
+        # Wait for dialog to close
+        self.dialog.wait_window()
+    
+    def create_widgets(self):
+        # Main frame
+        main_frame = ttk.Frame(self.dialog, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Versions list
+        versions_frame = ttk.LabelFrame(main_frame, text="Saved Versions", padding="10")
+        versions_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.versions_tree = ttk.Treeview(versions_frame, columns=("time", "action", "changes"),
+                                          show="headings", height=8)
+        self.versions_tree.heading("time", text="Saved")
+        self.versions_tree.heading("action", text="Action")
+        self.versions_tree.heading("changes", text="Changes")
+        self.versions_tree.column("time", width=160)
+        self.versions_tree.column("action", width=80)
+        self.versions_tree.column("changes", width=500)
+        
+        versions_scroll = ttk.Scrollbar(versions_frame, orient="vertical", command=self.versions_tree.yview)
+        self.versions_tree.configure(yscrollcommand=versions_scroll.set)
+        self.versions_tree.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        versions_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.versions_tree.bind("<<TreeviewSelect>>", self.on_version_select)
+        
+        # Changes of the selected version
+        diff_frame = ttk.LabelFrame(main_frame, text="Changes Against the Previous Version", padding="10")
+        diff_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        
+        self.diff_text = tk.Text(diff_frame, wrap=tk.NONE, height=15)
+        diff_scroll = ttk.Scrollbar(diff_frame, orient="vertical", command=self.diff_text.yview)
+        self.diff_text.configure(yscrollcommand=diff_scroll.set)
+        self.diff_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        diff_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Added, removed and changed lines in the colors of a diff
+        self.diff_text.tag_configure("added", foreground="dark green")
+        self.diff_text.tag_configure("removed", foreground="red")
+        self.diff_text.tag_configure("changed", foreground="blue")
+        
+        # Dialog buttons
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X)
+        
+        ttk.Button(button_frame, text="Close",
+                  command=self.dialog.destroy).pack(side=tk.RIGHT)
+        self.restore_btn = ttk.Button(button_frame, text="Restore This Version",
+                                     command=self.restore_version, state=tk.DISABLED)
+        self.restore_btn.pack(side=tk.RIGHT, padx=(0, 10))
+    
+    def load_versions(self):
+        """Fill the versions list, newest first"""
+        for info in reversed(self.versions):
+            self.versions_tree.insert("", "end", iid=str(info.version), text=str(info.version),
+                                      values=(info.time[:19].replace("T", " "), info.action, info.changes))
+        newest = str(self.versions[-1].version)
+        self.versions_tree.selection_set(newest)
+        self.versions_tree.focus(newest)
+    
+    def selected_version(self):
+        """Version number of the selected row, or None"""
+        selection = self.versions_tree.selection()
+        return int(selection[0]) if selection else None
+    
+    def on_version_select(self, event=None):
+        """Show the changes of the selected version"""
+        version = self.selected_version()
+        self.diff_text.config(state=tk.NORMAL)
+        self.diff_text.delete(1.0, tk.END)
+        if version is None:
+            self.restore_btn.config(state=tk.DISABLED)
+            return
+        
+        try:
+            lines = self.history.diff(self.template_name, version)
+        except Exception as e:
+            lines = [f"! Could not rebuild this version: {str(e)}"]
+        if not lines:
+            lines = ["No changes"]
+        tags = {"+": "added", "-": "removed", "~": "changed", ">": "changed", "!": "removed"}
+        for line in lines:
+            self.diff_text.insert(tk.END, line + "\n", tags.get(line[:1], ""))
+        self.diff_text.config(state=tk.DISABLED)
+        
+        restorable = version != self.versions[-1].version and not any(
+            info.version == version and info.action == ACTION_DELETE for info in self.versions)
+        self.restore_btn.config(state=tk.NORMAL if restorable else tk.DISABLED)
+    
+    def restore_version(self):
+        """Save the selected version as the newest version of the template"""
+        version = self.selected_version()
+        if version is None:
+            return
+        if not messagebox.askyesno("Restore Version",
+                                   f"Replace '{self.template_name}' with version {version}?\n\n"
+                                   "The current version stays in the history."):
+            return
+        
+        if self.template_manager.restore_version(self.template_name, version):
+            self.result = True
+            messagebox.showinfo("Success", f"Version {version} of '{self.template_name}' restored.")
+            self.dialog.destroy()
+        else:
+            messagebox.showerror("Error", f"Failed to restore version {version}")
@@ -0,0 +1,130 @@
+import queue
+import threading
+
+try:
+    import pythoncom
+except ImportError:
+    # COM apartments only exist on Windows (pywin32)
+    pythoncom = None
+
+# Rows processed between progress reports / cancellation checks
+PROGRESS_CHUNK = 200
+
+class JobCancelled(Exception):
+    """Raised inside a job when the user cancelled it"""
+
+class Job:
+    """Handle passed to a background function for progress and cancellation"""
+    
+    def __init__(self, name):
+        self.name = name
+        self._cancel_event = threading.Event()
+        self._events = None
+    
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+    
+    def cancel(self):
+        """Request cancellation; the job stops at its next check"""
+        self._cancel_event.set()
+    
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation was requested"""
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"{self.name} cancelled")
+    
+    def report(self, done, total):
+        """Report progress (rows done out of total) and check for cancellation"""
+        if self._events is not None:
+            self._events.put(("progress", self, (done, total)))
+        self.check_cancelled()
+
+class JobRunner:
+    """Run long operations on worker threads and marshal results back to Tk via after()"""
+    
+    def __init__(self, root, poll_ms=50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._events = queue.Queue()
+        self._handlers = {}
+        self._polling = False
+        self._com_tasks = None
+    
+    def start(self, name, func, on_progress=None, on_done=None, com=False):
+        """Run func(job) on a worker thread.
+        
+        on_progress(job, done, total) and on_done(job, status, result) are
+        called on the Tk thread; status is "ok", "cancelled" or "error".
+        Set com=True for functions that use Excel through COM; they run one
+        after another on a single COM thread.
+        """
+        job = Job(name)
+        job._events = self._events
+        self._handlers[job] = (on_progress, on_done)
+        
+        if com:
+            self._com_queue().put((job, func))
+        else:
+            worker = threading.Thread(target=self._run, args=(job, func),
+                                      name=f"job-{name}", daemon=True)
+            worker.start()
+        
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return job
+    
+    def _com_queue(self):
+        """Queue of the COM thread, started on first use"""
+        if self._com_tasks is None:
+            self._com_tasks = queue.Queue()
+            threading.Thread(target=self._run_com_tasks, name="job-com", daemon=True).start()
+        return self._com_tasks
+    
+    def _run_com_tasks(self):
+        # COM handles belong to the apartment of the thread that created them, so
+        # the Excel session cached between jobs is only used from this thread
+        if pythoncom is not None:
+            pythoncom.CoInitialize()
+        while True:
+            job, func = self._com_tasks.get()
+            self._run(job, func)
+    
+    def _run(self, job, func):
+        try:
+            result = func(job)
+            self._events.put(("done", job, ("ok", result)))
+        except JobCancelled as e:
+            self._events.put(("done", job, ("cancelled", str(e))))
+        except Exception as e:
+            self._events.put(("done", job, ("error", str(e))))
+    
+    def _poll(self):
+        """Deliver queued progress and completion events on the Tk thread"""
+        latest_progress = {}
+        try:
+            while True:
+                kind, job, payload = self._events.get_nowait()
+                if kind == "progress":
+                    # Only the most recent progress of each job is worth drawing
+                    latest_progress[job] = payload
+                    continue
+                
+                latest_progress.pop(job, None)
+                on_progress, on_done = self._handlers.pop(job, (None, None))
+                if on_done:
+                    status, result = payload
+                    on_done(job, status, result)
+        except queue.Empty:
+            pass
+        
+        for job, (done, total) in latest_progress.items():
+            on_progress = self._handlers.get(job, (None, None))[0]
+            if on_progress:
+                on_progress(job, done, total)
+        
+        if self._handlers:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
@@ -0,0 +1,149 @@
+"""Streaming export of generated actuators as a Studio 5000 L5X tag fragment.
+
+Tags are written one at a time with an incremental XML writer, so memory
+use does not grow with the number of tags. Components whose DataType is
+"Alias" become alias tags; their target is the Input or Output address,
+or the member named in Inp.Descr. of the actuator's main tag (e.g.
+AxisX_NotHomed -> AxisX.Alm2). Tag names that Logix Designer would reject
+fail the export, and the export date is a parameter, so the same tags and
+date give the same file.
+"""
+from datetime import datetime
+from xml.sax.saxutils import XMLGenerator
+from actuator_validation import is_logix_name, LOGIX_TAG_RULE
+from exporters import Exporter, register_exporter
+from schema import register_layout, ACTUATOR_KEY
+
+# Columns the exporter needs, projected with the schema's compiled projector
+L5X_LAYOUT = register_layout(
+    "l5x", (ACTUATOR_KEY, "name", "datatype", "input", "output", "inp_descr", "out_descr",
+            "alm0_descr_lang1", "alm1_descr_lang1"),
+    "Columns used by the L5X tag export")
+
+ALIAS_DATATYPE = "alias"
+SOFTWARE_REVISION = "32.00"
+EXPORT_DATE_FORMAT = "%a %b %d %H:%M:%S %Y"
+# Tag names listed in messages
+MESSAGE_TAG_LIMIT = 10
+
+# Logix names for data types that templates spell differently
+DATATYPE_NAMES = {"string": "STRING", "bool": "BOOL", "dint": "DINT", "int": "INT", "real": "REAL"}
+
+def _text(value):
+    """Cell value as stripped text"""
+    return "" if value is None else str(value).strip()
+
+def _name_list(names):
+    """Comma-separated names for messages, at most MESSAGE_TAG_LIMIT of them"""
+    text = ", ".join(names[:MESSAGE_TAG_LIMIT])
+    if len(names) > MESSAGE_TAG_LIMIT:
+        text += f" and {len(names) - MESSAGE_TAG_LIMIT} more"
+    return text
+
+@register_exporter
+class L5XExporter(Exporter):
+    """Write generated actuators as <Tag> elements of an L5X file"""
+    
+    name = "l5x"
+    label = "Studio 5000 L5X tags"
+    extension = ".L5X"
+    file_type = "Logix Designer files"
+    unit = "tags"
+    layout_name = L5X_LAYOUT.name
+    
+    def __init__(self, controller_name="Controller", software_revision=SOFTWARE_REVISION,
+                 export_date=None, **options):
+        super().__init__(**options)
+        self.controller_name = controller_name
+        self.software_revision = software_revision
+        # ExportDate of the file (a datetime); None uses the time of the export
+        self.export_date = export_date
+    
+    def iter_tags(self, rows):
+        """Yield (name, data_type, alias_for, description) per row of the l5x layout"""
+        actuator = None
+        main_tag = None
+        for row in rows:
+            (number, name, datatype, input_address, output_address, inp_descr, out_descr,
+             alm0_text, alm1_text) = (_text(value) for value in row)
+            if number != actuator:
+                # Rows of the next actuator
+                actuator = number
+                main_tag = None
+            if not name:
+                continue
+            
+            description = " / ".join(dict.fromkeys(text for text in (alm0_text, alm1_text) if text))
+            if datatype.lower() == ALIAS_DATATYPE:
+                alias_for = input_address or output_address
+                if not alias_for and main_tag and inp_descr:
+                    # Alarm bits of the main tag, e.g. AxisX.Alm2
+                    alias_for = f"{main_tag}.{inp_descr}"
+                yield name, None, alias_for or None, description or inp_descr or out_descr
+            else:
+                main_tag = main_tag or name
+                data_type = DATATYPE_NAMES.get(datatype.lower(), datatype)
+                yield name, data_type, None, description or inp_descr or out_descr
+    
+    def write(self, stream, rows, job=None):
+        """Stream the L5X document to a text stream
+        
+        Invalid tag names are collected while streaming and raise ValueError
+        at the end, so the target file is not replaced.
+        """
+        export_date = self.export_date or datetime.now()
+        xml = XMLGenerator(stream, encoding="utf-8", short_empty_elements=True)
+        xml.startDocument()
+        xml.startElement("RSLogix5000Content", {
+            "SchemaRevision": "1.0",
+            "SoftwareRevision": self.software_revision,
+            "TargetType": "Tag",
+            "ContainsContext": "true",
+            "ExportDate": export_date.strftime(EXPORT_DATE_FORMAT),
+            "ExportOptions": "References NoRawData L5KData DecoratedData Context",
+        })
+        xml.characters("\n")
+        xml.startElement("Controller", {"Use": "Context", "Name": self.controller_name})
+        xml.characters("\n")
+        xml.startElement("Tags", {"Use": "Context"})
+        xml.characters("\n")
+        
+        written = 0
+        skipped = []
+        invalid = []
+        for name, data_type, alias_for, description in self.iter_tags(rows):
+            if not is_logix_name(name):
+                invalid.append(name)
+                continue
+            if data_type is None and alias_for is None:
+                # An alias without target would not import; it is named in the message
+                skipped.append(name)
+                continue
+            
+            if alias_for is not None:
+                attributes = {"Name": name, "TagType": "Alias", "AliasFor": alias_for,
+                              "Use": "Target", "ExternalAccess": "Read/Write"}
+            else:
+                attributes = {"Name": name, "TagType": "Base", "DataType": data_type,
+                              "Use": "Target", "Constant": "false", "ExternalAccess": "Read/Write"}
+            xml.startElement("Tag", attributes)
+            if description:
+                xml.startElement("Description", {})
+                xml.characters(description)
+                xml.endElement("Description")
+            xml.endElement("Tag")
+            xml.characters("\n")
+            written += 1
+        
+        xml.endElement("Tags")
+        xml.characters("\n")
+        xml.endElement("Controller")
+        xml.characters("\n")
+        xml.endElement("RSLogix5000Content")
+        xml.endDocument()
+        if invalid:
+            raise ValueError(f"{len(invalid)} tag name(s) are not valid in Logix Designer "
+                             f"({LOGIX_TAG_RULE}): {_name_list(invalid)}")
+        if skipped:
+            return written, f"{len(skipped)} alias tag(s) without target skipped: {_name_list(skipped)}"
+        return written, ""
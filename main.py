@@ -5,7 +5,18 @@ import os
 from datetime import datetime
 import pandas as pd
 from template_manager import TemplateManager
-from excel_generator import ExcelGenerator
+from excel_generator import ExcelGenerator, COM_AVAILABLE
+from offline_excel import OfflineWorkbookInserter
+from actuator_block import INSERT_APPEND, INSERT_SKIP, INSERT_UPSERT, ORDER_END, ORDER_SORTED
+from tracing import tracer
+from job_runner import JobRunner
+from exporters import discover_exporters, get_exporter
+from actuator_validation import symbols_from_batches
+from symbol_index import SymbolIndex
+from project_manifest import ProjectManifest, STATE_BUILT
+
+# Treeview rows inserted per Tk callback while the template list fills
+TREE_BATCH = 250
 
 class ActuatorTemplateApp:
     def __init__(self, root):
@@ -13,22 +24,44 @@ class ActuatorTemplateApp:
         self.root.title("Actuator Template Manager")
         self.root.geometry("900x700")
         
-        # Initialize managers
-        self.template_manager = TemplateManager()
+        # Opt-in stage tracing (set ATM_TRACE to a JSON-lines log path)
+        tracer.enable_from_environment()
+        
+        # Initialize managers (the template store is loaded in the background)
+        self.template_manager = TemplateManager(load=False)
         self.excel_generator = ExcelGenerator()
+        self.offline_inserter = OfflineWorkbookInserter(self.excel_generator)
+        
+        # Tags and I/O addresses of everything exported in this project
+        self.symbol_index = SymbolIndex()
+        # Template bindings of the actuators inserted into workbook files
+        self.project_manifest = ProjectManifest()
+        
+        # Saving a template drops its cached rows
+        self.template_manager.add_change_listener(self.excel_generator.row_cache.invalidate_template)
         
         # Generated actuators storage
         self.generated_actuators = None
         
+        # Long operations run on worker threads; jobs of a kind block the conflicting buttons
+        self.job_runner = JobRunner(self.root)
+        self.running_jobs = {}
+        self.queued_batches = []
+        # Template actions requested before the store finished loading
+        self.pending_template_actions = []
+        self._tree_generation = 0
+        self.job_conflicts = {
+            "clipboard": ("clipboard",),
+            "excel_insert": ("excel_insert", "excel_detect"),
+            "excel_file": ("excel_file",),
+            "excel_detect": ("excel_insert", "excel_detect"),
+            "export": ("export",),
+        }
+        
         # Create GUI
         self.create_widgets()
-        self.load_templates()
-        
-        # Create default templates if none exist
-        if not self.template_manager.get_all_templates():
-            self.template_manager.create_default_templates()
-            self.load_templates()
-        
+        self.start_template_load()
+    
     def create_widgets(self):
         # Main frame
         main_frame = ttk.Frame(self.root, padding="10")
@@ -103,6 +136,10 @@ class ActuatorTemplateApp:
                   command=self.edit_template).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(template_action_frame, text="Delete Template", 
                   command=self.delete_template).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(template_action_frame, text="Template History", 
+                  command=self.show_template_history).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(template_action_frame, text="Mixed Batch", 
+                  command=self.use_mixed_batch).pack(side=tk.LEFT, padx=(0, 10))
         
         # Generated data section
         self.generated_frame = ttk.LabelFrame(main_frame, text="Generated Actuator Data", padding="10")
@@ -131,30 +168,172 @@ class ActuatorTemplateApp:
                                          command=self.detect_excel_files, state=tk.DISABLED)
         self.detect_excel_btn.grid(row=1, column=3)
         
+        # File formats of the exporter registry (exporters.py and *_export.py modules)
+        export_frame = ttk.Frame(self.generated_frame)
+        export_frame.grid(row=1, column=4, padx=(10, 0))
+        
+        self.exporters = {exporter.label: name for name, exporter in discover_exporters().items()}
+        self.export_format_var = tk.StringVar(value=next(iter(self.exporters), ""))
+        ttk.Combobox(export_frame, textvariable=self.export_format_var, values=list(self.exporters),
+                     state="readonly", width=22).pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.export_btn = ttk.Button(export_frame, text="📤 Export", 
+                                    command=self.export_file, state=tk.DISABLED)
+        self.export_btn.pack(side=tk.LEFT)
+        
+        self.action_buttons = {
+            "clipboard": self.copy_clipboard_btn,
+            "excel_insert": self.insert_excel_btn,
+            "excel_file": self.generate_excel_btn,
+            "excel_detect": self.detect_excel_btn,
+            "export": self.export_btn,
+        }
+        
+        # Progress of background jobs
+        self.progress_var = tk.DoubleVar(value=0)
+        self.progress_bar = ttk.Progressbar(self.generated_frame, variable=self.progress_var,
+                                            mode="determinate", length=400)
+        self.progress_bar.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 0))
+        
+        self.progress_label = ttk.Label(self.generated_frame, text="", foreground="gray")
+        self.progress_label.grid(row=2, column=2, sticky=tk.W, pady=(10, 0))
+        
+        self.cancel_job_btn = ttk.Button(self.generated_frame, text="Cancel", 
+                                        command=self.cancel_jobs, state=tk.DISABLED)
+        self.cancel_job_btn.grid(row=2, column=3, pady=(10, 0))
+        
+        # Insert target: the running Excel (COM) or a workbook file edited offline
+        backend_frame = ttk.Frame(self.generated_frame)
+        backend_frame.grid(row=3, column=0, columnspan=4, sticky=tk.W, pady=(10, 0))
+        
+        ttk.Label(backend_frame, text="Insert into:").pack(side=tk.LEFT, padx=(0, 10))
+        self.insert_backend_var = tk.StringVar(value="com" if COM_AVAILABLE else "offline")
+        ttk.Radiobutton(backend_frame, text="Open Excel (COM)", value="com",
+                        variable=self.insert_backend_var,
+                        state=tk.NORMAL if COM_AVAILABLE else tk.DISABLED).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Radiobutton(backend_frame, text="Workbook file (offline)", value="offline",
+                        variable=self.insert_backend_var).pack(side=tk.LEFT, padx=(0, 20))
+        
+        # Batches queued for one offline insert (one workbook load and save)
+        self.queue_workbook_btn = ttk.Button(backend_frame, text="➕ Queue for Workbook", 
+                                            command=self.queue_for_workbook, state=tk.DISABLED)
+        self.queue_workbook_btn.pack(side=tk.LEFT, padx=(0, 10))
+        self.apply_queue_btn = ttk.Button(backend_frame, text="Insert Queue (0)", 
+                                         command=self.apply_workbook_queue, state=tk.DISABLED)
+        self.apply_queue_btn.pack(side=tk.LEFT)
+        
+        # Regenerate the bound actuators whose template changed since they were inserted
+        self.rebuild_project_btn = ttk.Button(backend_frame, text="🔄 Rebuild Project", 
+                                             command=self.rebuild_project)
+        self.rebuild_project_btn.pack(side=tk.LEFT, padx=(10, 0))
+        self.export_project_btn = ttk.Button(backend_frame, text="📦 Export Project Files", 
+                                            command=self.export_project_files)
+        self.export_project_btn.pack(side=tk.LEFT, padx=(10, 0))
+        # Forget exported actuators that no longer exist, so they stop blocking exports
+        ttk.Button(backend_frame, text="🗂 Symbol Index", 
+                  command=self.manage_symbol_index).pack(side=tk.LEFT, padx=(10, 0))
+        
+        # How inserts treat rows already present in the target sheet
+        mode_frame = ttk.Frame(self.generated_frame)
+        mode_frame.grid(row=4, column=0, columnspan=4, sticky=tk.W, pady=(5, 0))
+        
+        ttk.Label(mode_frame, text="Existing rows:").pack(side=tk.LEFT, padx=(0, 10))
+        self.insert_mode_var = tk.StringVar(value=INSERT_APPEND)
+        for text, mode in (("Append all", INSERT_APPEND),
+                           ("Skip existing", INSERT_SKIP),
+                           ("Skip existing, update changed", INSERT_UPSERT)):
+            ttk.Radiobutton(mode_frame, text=text, value=mode,
+                            variable=self.insert_mode_var).pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Place new actuators by number instead of above "Actuator End"
+        self.insert_order_var = tk.StringVar(value=ORDER_END)
+        ttk.Checkbutton(mode_frame, text="Sort by actuator number", variable=self.insert_order_var,
+                        onvalue=ORDER_SORTED, offvalue=ORDER_END).pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Workbook/sheet used by Excel (COM) inserts, filled by Detect Excel Files
+        target_frame = ttk.Frame(self.generated_frame)
+        target_frame.grid(row=5, column=0, columnspan=4, sticky=tk.W, pady=(5, 0))
+        
+        ttk.Label(target_frame, text="Excel target:").pack(side=tk.LEFT, padx=(0, 10))
+        self.excel_targets = {"Active sheet": (None, None)}
+        self.excel_target_var = tk.StringVar(value="Active sheet")
+        self.excel_target_combo = ttk.Combobox(target_frame, textvariable=self.excel_target_var,
+                                               values=list(self.excel_targets), state="readonly", width=40)
+        self.excel_target_combo.pack(side=tk.LEFT, padx=(0, 10))
+        self.excel_target_combo.bind("<<ComboboxSelected>>", self.on_excel_target_selected)
+        self.refresh_targets_btn = ttk.Button(target_frame, text="Refresh", 
+                                             command=lambda: self.detect_excel_files(refresh=True, show=False),
+                                             state=tk.NORMAL if COM_AVAILABLE else tk.DISABLED)
+        self.refresh_targets_btn.pack(side=tk.LEFT)
+        
         # Status bar
         self.status_var = tk.StringVar()
         self.status_var.set("Ready")
         status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         status_bar.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
-        
-    def load_templates(self):
-        """Load templates into the treeview"""
-        # Clear existing items
-        for item in self.templates_tree.get_children():
-            self.templates_tree.delete(item)
+    
+    def start_template_load(self):
+        """Load the template store on a worker thread; the window stays usable meanwhile"""
+        self.status_var.set("Loading templates...")
+        
+        def on_done(job, status, result):
+            if status != "ok":
+                self.status_var.set(f"Failed to load templates: {result}")
+                self.template_manager.loaded = True
+            else:
+                # Create default templates if none exist
+                if not self.template_manager.get_template_index():
+                    self.template_manager.create_default_templates()
+                self.load_templates(show_progress=True)
             
-        # Load templates from manager
-        templates = self.template_manager.get_all_templates()
+            pending, self.pending_template_actions = self.pending_template_actions, []
+            for action in pending:
+                action()
         
-        for template_name, template_data in templates.items():
-            description = template_data.get("description", "No description")
-            actuator_count = len(template_data.get("actuators", []))
-            
-            self.templates_tree.insert("", "end", iid=template_name, text=template_name,
-                                     values=(description, actuator_count))
+        self.job_runner.start("template_load", lambda job: self.template_manager.load(), on_done=on_done)
+    
+    def templates_ready(self, action):
+        """True once the template store is loaded; until then action is queued and run after loading"""
+        if self.template_manager.loaded:
+            return True
+        if action not in self.pending_template_actions:
+            self.pending_template_actions.append(action)
+        self.status_var.set("Waiting for the templates to load...")
+        return False
+    
+    def load_templates(self, show_progress=False):
+        """Load templates into the treeview, TREE_BATCH rows per Tk callback"""
+        # Clear existing items
+        self.templates_tree.delete(*self.templates_tree.get_children())
+        
+        # Only the index is needed; components are loaded when a template is used
+        entries = list(self.template_manager.get_template_index().items())
+        # A newer refresh stops the batches of an older one
+        self._tree_generation += 1
+        generation = self._tree_generation
+        
+        def insert_batch(start):
+            if generation != self._tree_generation:
+                return
+            end = min(start + TREE_BATCH, len(entries))
+            for template_name, entry in entries[start:end]:
+                self.templates_tree.insert("", "end", iid=template_name, text=template_name,
+                                         values=(entry.description, entry.count))
+            # Progress only replaces the loading status, not messages of queued actions
+            show = show_progress and self.status_var.get().startswith("Loading templates")
+            if end < len(entries):
+                if show:
+                    self.status_var.set(f"Loading templates {end:,}/{len(entries):,}")
+                self.root.after(1, insert_batch, end)
+            elif show:
+                self.status_var.set(f"Loaded {len(entries):,} templates")
+        
+        insert_batch(0)
     
     def create_new_template(self):
         """Open dialog to create a new template"""
+        if not self.templates_ready(self.create_new_template):
+            return
         from template_dialog import TemplateDialog
         
         dialog = TemplateDialog(self.root, "Create New Template")
@@ -170,6 +349,8 @@ class ActuatorTemplateApp:
     
     def import_template(self):
         """Import template from JSON file"""
+        if not self.templates_ready(self.import_template):
+            return
         file_path = filedialog.askopenfilename(
             title="Import Template",
             filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
@@ -186,6 +367,8 @@ class ActuatorTemplateApp:
     
     def export_template(self):
         """Export selected template to JSON file"""
+        if not self.templates_ready(self.export_template):
+            return
         selected = self.templates_tree.selection()
         if not selected:
             messagebox.showwarning("Warning", "Please select a template to export")
@@ -228,6 +411,8 @@ class ActuatorTemplateApp:
     
     def use_template(self):
         """Use selected template to generate actuators"""
+        if not self.templates_ready(self.use_template):
+            return
         selected = self.templates_tree.selection()
         if not selected:
             messagebox.showwarning("Warning", "Please select a template to use")
@@ -236,7 +421,9 @@ class ActuatorTemplateApp:
         template_name = selected[0]
         from actuator_dialog import ActuatorDialog
         
-        dialog = ActuatorDialog(self.root, template_name, self.template_manager)
+        # Check the new actuators against the project and the batches queued for the workbook
+        dialog = ActuatorDialog(self.root, template_name, self.template_manager,
+                                self.existing_symbols())
         if dialog.result:
             # Store generated actuators for Excel generation
             self.generated_actuators = dialog.result
@@ -248,6 +435,29 @@ class ActuatorTemplateApp:
             self.status_var.set(f"Generated {rows_count} rows from {len(dialog.result)} actuator(s)")
             messagebox.showinfo("Success", f"Generated {rows_count} rows from template '{template_name}'!")
     
+    def existing_symbols(self):
+        """Tags and numbers new actuators must not collide with: the symbol index and the queued batches"""
+        return self.symbol_index.symbols().update(symbols_from_batches(self.queued_batches))
+    
+    def use_mixed_batch(self):
+        """Generate actuators of several templates (one per line) in one pass"""
+        if not self.templates_ready(self.use_mixed_batch):
+            return
+        selected = self.templates_tree.selection()
+        from batch_dialog import BatchDialog
+        
+        dialog = BatchDialog(self.root, self.template_manager, self.existing_symbols(),
+                             selected[0] if selected else None)
+        if dialog.result:
+            # One list sorted by actuator number, exported or inserted as one stream
+            self.generated_actuators = dialog.result
+            self.update_generated_data_ui()
+            
+            rows_count = sum(len(actuator['actuators']) for actuator in dialog.result)
+            templates_count = len({actuator['template_name'] for actuator in dialog.result})
+            self.status_var.set(f"Generated {rows_count} rows from {len(dialog.result)} actuator(s)")
+            messagebox.showinfo("Success", f"Generated {rows_count} rows from {templates_count} template(s)!")
+    
     def update_generated_data_ui(self):
         """Update UI to show options for generated data"""
         if self.generated_actuators:
@@ -259,59 +469,293 @@ class ActuatorTemplateApp:
                 foreground="green"
             )
             
-            # Enable action buttons
-            self.copy_clipboard_btn.config(state=tk.NORMAL)
-            self.insert_excel_btn.config(state=tk.NORMAL)
-            self.generate_excel_btn.config(state=tk.NORMAL)
-            self.detect_excel_btn.config(state=tk.NORMAL)
         else:
             self.generated_info_label.config(
                 text="No actuator data generated yet. Use a template first.",
                 foreground="gray"
             )
             
-            # Disable action buttons
-            self.copy_clipboard_btn.config(state=tk.DISABLED)
-            self.insert_excel_btn.config(state=tk.DISABLED)
-            self.generate_excel_btn.config(state=tk.DISABLED)
-            self.detect_excel_btn.config(state=tk.DISABLED)
+        
+        self.refresh_action_buttons()
+    
+    def refresh_action_buttons(self):
+        """Enable the action buttons except those conflicting with a running job"""
+        blocked = set()
+        for kind in self.running_jobs:
+            blocked.update(self.job_conflicts[kind])
+        
+        for kind, button in self.action_buttons.items():
+            enabled = bool(self.generated_actuators) and kind not in blocked
+            button.config(state=tk.NORMAL if enabled else tk.DISABLED)
+        
+        self.queue_workbook_btn.config(state=tk.NORMAL if self.generated_actuators else tk.DISABLED)
+        queue_enabled = bool(self.queued_batches) and "excel_insert" not in blocked
+        self.apply_queue_btn.config(text=f"Insert Queue ({len(self.queued_batches)})",
+                                    state=tk.NORMAL if queue_enabled else tk.DISABLED)
+        self.rebuild_project_btn.config(state=tk.DISABLED if "excel_insert" in blocked else tk.NORMAL)
+        self.export_project_btn.config(state=tk.DISABLED if "excel_file" in blocked else tk.NORMAL)
+        refresh_enabled = COM_AVAILABLE and "excel_detect" not in blocked
+        self.refresh_targets_btn.config(state=tk.NORMAL if refresh_enabled else tk.DISABLED)
+    
+    def start_job(self, kind, label, func, on_success, unit="rows", com=False):
+        """Run func(job) in the background with progress and cancellation"""
+        tracer.begin_action()
+        
+        def on_progress(job, done, total):
+            self.progress_bar.config(maximum=max(total, 1))
+            self.progress_var.set(done)
+            self.progress_label.config(text=f"{label}: {done:,} / {total:,} {unit}")
+        
+        def on_done(job, status, result):
+            self.running_jobs.pop(kind, None)
+            self.refresh_action_buttons()
+            if not self.running_jobs:
+                self.progress_var.set(0)
+                self.progress_label.config(text="")
+                self.cancel_job_btn.config(state=tk.DISABLED)
+            
+            if status == "ok":
+                on_success(result)
+            elif status == "cancelled":
+                self.status_var.set(f"{label} cancelled")
+            else:
+                self.status_var.set(f"{label} failed")
+                messagebox.showerror("Error", f"{label} failed: {result}")
+        
+        self.running_jobs[kind] = self.job_runner.start(kind, func, on_progress, on_done, com=com)
+        self.refresh_action_buttons()
+        self.progress_var.set(0)
+        self.progress_label.config(text=f"{label}...")
+        self.cancel_job_btn.config(state=tk.NORMAL)
+        self.status_var.set(f"{label}...")
+    
+    def cancel_jobs(self):
+        """Cancel every running background job"""
+        for job in self.running_jobs.values():
+            job.cancel()
+        self.status_var.set("Cancelling...")
+    
+    def _export_status(self, text):
+        """Status bar text for an export, with row cache and trace summaries"""
+        details = [self.excel_generator.row_cache.stats_text()]
+        if tracer.enabled:
+            summary = tracer.summary_text()
+            if summary:
+                details.append(summary)
+        return f"{text} ({'; '.join(details)})"
+    
+    def confirm_symbol_conflicts(self, actuators_data):
+        """Check data against the project symbol index; False if the user cancels the export"""
+        result = self.symbol_index.check(actuators_data)
+        if not result.issues:
+            return True
+        message = ("These actuators collide with tags or I/O addresses already in the project:\n\n"
+                   + "\n".join(result.format(result.issues, limit=15)) + "\n\nExport anyway?\n\n"
+                   "Choose No to open the symbol index and remove actuators that no longer exist.")
+        answer = messagebox.askyesnocancel("Symbol Conflicts", message)
+        if answer is None:
+            return False
+        if answer:
+            return True
+        if not self.manage_symbol_index():
+            return False
+        return self.confirm_symbol_conflicts(actuators_data)
+    
+    def manage_symbol_index(self):
+        """Show the project symbol index and remove stale actuators; returns how many were removed"""
+        from symbol_index_dialog import SymbolIndexDialog
+        
+        dialog = SymbolIndexDialog(self.root, self.symbol_index)
+        if dialog.result:
+            self.status_var.set(f"Removed {dialog.result} actuator(s) from the symbol index "
+                                f"({self.symbol_index.describe()})")
+        return dialog.result
     
     def copy_to_clipboard(self):
         """Copy generated data to clipboard"""
         if not self.generated_actuators:
             messagebox.showwarning("Warning", "No data to copy. Generate actuators first.")
             return
+        if not self.confirm_symbol_conflicts(self.generated_actuators):
+            return
         
-        success, message = self.excel_generator.copy_to_clipboard(self.generated_actuators)
+        actuators_data = self.generated_actuators
         
-        if success:
-            self.status_var.set("Data copied to clipboard!")
-            messagebox.showinfo("Success", message)
-        else:
-            self.status_var.set("Failed to copy to clipboard")
-            messagebox.showerror("Error", message)
+        def on_success(result):
+            success, message = result
+            if success:
+                self.symbol_index.register(actuators_data)
+                self.status_var.set(self._export_status("Data copied to clipboard!"))
+                messagebox.showinfo("Success", message)
+            else:
+                self.status_var.set("Failed to copy to clipboard")
+                messagebox.showerror("Error", message)
+        
+        self.start_job("clipboard", "Copying to clipboard",
+                       lambda job: self.excel_generator.copy_to_clipboard(actuators_data, job),
+                       on_success)
     
     def insert_into_excel(self):
         """Insert generated data into open Excel file"""
         if not self.generated_actuators:
             messagebox.showwarning("Warning", "No data to insert. Generate actuators first.")
             return
+        if not self.confirm_symbol_conflicts(self.generated_actuators):
+            return
         
-        success, message = self.excel_generator.insert_into_excel(self.generated_actuators)
+        actuators_data = self.generated_actuators
+        mode = self.insert_mode_var.get()
+        order = self.insert_order_var.get()
+        file_path = None
+        
+        def on_success(result):
+            success, message = result
+            if success:
+                self.symbol_index.register(actuators_data)
+                if file_path:
+                    self.project_manifest.record_built(actuators_data, self.template_manager, file_path)
+                self.status_var.set(self._export_status("Data inserted into Excel!"))
+                messagebox.showinfo("Success", message)
+            else:
+                self.status_var.set("Failed to insert into Excel")
+                messagebox.showerror("Error", message)
         
-        if success:
-            self.status_var.set("Data inserted into Excel!")
-            messagebox.showinfo("Success", message)
+        if self.insert_backend_var.get() == "offline":
+            file_path = filedialog.askopenfilename(
+                title="Select Workbook",
+                filetypes=[("Excel files", "*.xlsx *.xlsm"), ("All files", "*.*")]
+            )
+            if not file_path:
+                return
+            
+            self.start_job("excel_insert", "Inserting into workbook",
+                           lambda job: self.offline_inserter.insert_into_workbook(actuators_data, file_path, job=job,
+                                                                                   mode=mode, order=order),
+                           on_success)
         else:
-            self.status_var.set("Failed to insert into Excel")
-            messagebox.showerror("Error", message)
+            self.start_job("excel_insert", "Inserting into Excel",
+                           lambda job: self.excel_generator.insert_into_excel(actuators_data, job, mode, order),
+                           on_success, com=True)
+    
+    def queue_for_workbook(self):
+        """Queue the generated data for a single offline insert"""
+        if not self.generated_actuators:
+            messagebox.showwarning("Warning", "No data to queue. Generate actuators first.")
+            return
+        
+        self.queued_batches.append(self.generated_actuators)
+        rows_count = sum(len(actuator['actuators']) for batch in self.queued_batches for actuator in batch)
+        self.status_var.set(f"Queued {len(self.queued_batches)} batch(es), {rows_count} rows")
+        self.refresh_action_buttons()
+    
+    def apply_workbook_queue(self):
+        """Insert every queued batch into a workbook with one load and one save"""
+        if not self.queued_batches:
+            messagebox.showwarning("Warning", "No queued batches. Use 'Queue for Workbook' first.")
+            return
+        queued_actuators = [actuator_data for batch in self.queued_batches for actuator_data in batch]
+        if not self.confirm_symbol_conflicts(queued_actuators):
+            return
+        
+        file_path = filedialog.askopenfilename(
+            title="Select Workbook",
+            filetypes=[("Excel files", "*.xlsx *.xlsm"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        batches = list(self.queued_batches)
+        mode = self.insert_mode_var.get()
+        order = self.insert_order_var.get()
+        
+        def on_success(result):
+            success, message = result
+            if success:
+                self.symbol_index.register(queued_actuators)
+                self.project_manifest.record_built(queued_actuators, self.template_manager, file_path)
+                self.queued_batches = []
+                self.refresh_action_buttons()
+                self.status_var.set(self._export_status("Queued batches inserted!"))
+                messagebox.showinfo("Success", message)
+            else:
+                self.status_var.set("Failed to insert queued batches")
+                messagebox.showerror("Error", message)
+        
+        self.start_job("excel_insert", "Inserting queued batches",
+                       lambda job: self.offline_inserter.insert_batches(batches, file_path, job=job,
+                                                                       mode=mode, order=order),
+                       on_success)
+    
+    def rebuild_project(self):
+        """Regenerate the bound actuators whose template changed and patch their workbook rows"""
+        if not self.templates_ready(self.rebuild_project):
+            return
+        status = self.project_manifest.status(self.template_manager)
+        if not status:
+            messagebox.showinfo("Rebuild Project", "No actuators are bound to workbooks yet.\n\n"
+                                "Inserting into a workbook file (offline) binds them.")
+            return
+        stale = [(binding, state) for binding, state in status if state != STATE_BUILT]
+        if not stale:
+            messagebox.showinfo("Rebuild Project", f"Project is up to date ({self.project_manifest.describe()}).")
+            return
+        
+        lines = [f"_{binding['number']} {binding['name']} ({binding['template']}): {state}"
+                 for binding, state in stale[:15]]
+        if len(stale) > 15:
+            lines.append(f"... and {len(stale) - 15} more")
+        if not messagebox.askyesno("Rebuild Project",
+                                   f"Rebuild {len(stale)} actuator(s)?\n\n" + "\n".join(lines)):
+            return
+        
+        def on_success(result):
+            success, message = result
+            if success:
+                self.status_var.set(self._export_status("Project rebuilt!"))
+                messagebox.showinfo("Success", message)
+            else:
+                self.status_var.set("Failed to rebuild the project")
+                messagebox.showerror("Error", message)
+        
+        self.start_job("excel_insert", "Rebuilding project",
+                       lambda job: self.project_manifest.rebuild(self.template_manager, self.offline_inserter,
+                                                                 job, symbol_index=self.symbol_index),
+                       on_success)
+    
+    def export_project_files(self):
+        """Generate one Excel file per bound workbook, skipping files whose inputs are unchanged"""
+        if not self.templates_ready(self.export_project_files):
+            return
+        if not self.project_manifest.bindings:
+            messagebox.showinfo("Export Project Files", "No actuators are bound to workbooks yet.\n\n"
+                                "Inserting into a workbook file (offline) binds them.")
+            return
+        directory = filedialog.askdirectory(title="Select Output Folder")
+        if not directory:
+            return
+        
+        def on_success(result):
+            success, message = result
+            if success:
+                self.status_var.set(self._export_status(message.splitlines()[0]))
+                messagebox.showinfo("Success", message)
+            else:
+                self.status_var.set("Failed to export the project files")
+                messagebox.showerror("Error", message)
+        
+        self.start_job("excel_file", "Exporting project files",
+                       lambda job: self.project_manifest.export_files(self.template_manager, self.excel_generator,
+                                                                      directory, job),
+                       on_success)
     
     def generate_excel_file(self):
         """Generate new Excel file with generated data"""
         if not self.generated_actuators:
             messagebox.showwarning("Warning", "No data to export. Generate actuators first.")
             return
-            
+        if not self.confirm_symbol_conflicts(self.generated_actuators):
+            return
+        
         file_path = filedialog.asksaveasfilename(
             title="Save Excel File",
             defaultextension=".xlsx",
@@ -319,33 +763,103 @@ class ActuatorTemplateApp:
         )
         
         if file_path:
-            if self.excel_generator.generate_excel_file(self.generated_actuators, file_path):
-                self.status_var.set(f"Excel file saved to {file_path}")
-                messagebox.showinfo("Success", f"Excel file generated successfully!\nSaved to: {file_path}")
+            actuators_data = self.generated_actuators
+            
+            def on_success(success):
+                if success:
+                    self.symbol_index.register(actuators_data)
+                    self.status_var.set(self._export_status(f"Excel file saved to {file_path}"))
+                    messagebox.showinfo("Success", f"Excel file generated successfully!\nSaved to: {file_path}")
+                else:
+                    self.status_var.set("Failed to generate Excel file")
+                    messagebox.showerror("Error", "Failed to generate Excel file")
+            
+            self.start_job("excel_file", "Generating Excel file",
+                           lambda job: self.excel_generator.generate_excel_file(actuators_data, file_path, job),
+                           on_success)
+    
+    def export_file(self):
+        """Export generated data with the selected exporter"""
+        if not self.generated_actuators:
+            messagebox.showwarning("Warning", "No data to export. Generate actuators first.")
+            return
+        if not self.confirm_symbol_conflicts(self.generated_actuators):
+            return
+        
+        label = self.export_format_var.get()
+        exporter = get_exporter(self.exporters[label])
+        file_path = filedialog.asksaveasfilename(
+            title=f"Save {label}",
+            defaultextension=exporter.extension,
+            filetypes=[(exporter.file_type, f"*{exporter.extension}"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        actuators_data = self.generated_actuators
+        
+        def on_success(result):
+            success, message = result
+            if success:
+                self.symbol_index.register(actuators_data)
+                self.status_var.set(self._export_status(message))
+                messagebox.showinfo("Success", message)
             else:
-                self.status_var.set("Failed to generate Excel file")
-                messagebox.showerror("Error", "Failed to generate Excel file")
+                self.status_var.set(f"Failed to export {label}")
+                messagebox.showerror("Error", message)
+        
+        self.start_job("export", f"Exporting {label}",
+                       lambda job: exporter.export(actuators_data, file_path, job),
+                       on_success, unit=exporter.unit)
     
-    def detect_excel_files(self):
+    def detect_excel_files(self, refresh=False, show=True):
         """Detect and show open Excel files"""
-        success, result = self.excel_generator.detect_excel_files()
-        
-        if success:
-            if result:
-                info_text = "Open Excel files:\n\n"
-                for workbook in result:
-                    info_text += f"📁 {workbook['name']}\n"
-                    info_text += f"   Path: {workbook['path']}\n"
-                    info_text += f"   Sheets: {', '.join(workbook['sheets'])}\n\n"
-                
-                messagebox.showinfo("Excel Files Detected", info_text)
+        def on_success(detection):
+            success, result = detection
+            self.status_var.set("Ready")
+            if success:
+                self.update_excel_targets(result)
+                if not show:
+                    self.status_var.set(f"Found {len(result)} open Excel file(s)")
+                elif result:
+                    info_text = "Open Excel files:\n\n"
+                    for workbook in result:
+                        info_text += f"📁 {workbook['name']}\n"
+                        info_text += f"   Path: {workbook['path']}\n"
+                        info_text += f"   Sheets: {', '.join(workbook['sheets'])}\n\n"
+                    
+                    messagebox.showinfo("Excel Files Detected", info_text)
+                else:
+                    messagebox.showinfo("No Excel Files", "No open Excel files detected.")
             else:
-                messagebox.showinfo("No Excel Files", "No open Excel files detected.")
-        else:
-            messagebox.showerror("Error", result)
+                messagebox.showerror("Error", result)
+        
+        self.start_job("excel_detect", "Detecting Excel files",
+                       lambda job: self.excel_generator.detect_excel_files(job, refresh),
+                       on_success, unit="workbooks", com=True)
+    
+    def update_excel_targets(self, workbooks_info):
+        """Offer the detected workbooks/sheets as Excel insert targets"""
+        self.excel_targets = {"Active sheet": (None, None)}
+        for workbook in workbooks_info:
+            for sheet_name in workbook['sheets']:
+                self.excel_targets[f"{workbook['name']} / {sheet_name}"] = (workbook['name'], sheet_name)
+        self.excel_target_combo.config(values=list(self.excel_targets))
+        
+        # A target that is no longer open falls back to the active sheet
+        if self.excel_target_var.get() not in self.excel_targets:
+            self.excel_target_var.set("Active sheet")
+            self.on_excel_target_selected()
+    
+    def on_excel_target_selected(self, event=None):
+        """Point Excel inserts at the selected workbook/sheet"""
+        workbook_name, sheet_name = self.excel_targets.get(self.excel_target_var.get(), (None, None))
+        self.excel_generator.excel_session.select_target(workbook_name, sheet_name)
     
     def edit_template(self):
         """Edit selected template"""
+        if not self.templates_ready(self.edit_template):
+            return
         selected = self.templates_tree.selection()
         if not selected:
             messagebox.showwarning("Warning", "Please select a template to edit")
@@ -366,8 +880,27 @@ class ActuatorTemplateApp:
                 self.status_var.set("Failed to update template")
                 messagebox.showerror("Error", "Failed to update template")
     
+    def show_template_history(self):
+        """Show the saved versions of the selected template"""
+        if not self.templates_ready(self.show_template_history):
+            return
+        selected = self.templates_tree.selection()
+        if not selected:
+            messagebox.showwarning("Warning", "Please select a template to show its history")
+            return
+        
+        template_name = selected[0]
+        from history_dialog import HistoryDialog
+        
+        dialog = HistoryDialog(self.root, template_name, self.template_manager)
+        if dialog.result:
+            self.load_templates()
+            self.status_var.set(f"Template '{template_name}' restored from its history")
+    
     def delete_template(self):
         """Delete selected template"""
+        if not self.templates_ready(self.delete_template):
+            return
         selected = self.templates_tree.selection()
         if not selected:
             messagebox.showwarning("Warning", "Please select a template to delete")
@@ -0,0 +1,387 @@
+import os
+from bisect import bisect_right
+from copy import copy
+from openpyxl import load_workbook
+from openpyxl.cell.cell import MergedCell
+from actuator_block import (find_actuator_row, find_insertion_point, build_row_index,
+                            plan_upsert, describe_upsert, plan_sorted_insertion, row_key,
+                            INSERT_APPEND, ORDER_END)
+from job_runner import JobCancelled, PROGRESS_CHUNK
+from column_mapping import build_column_mapping, positional_mapping
+from actuator_validation import ExistingSymbols, symbols_from_block
+from atomic_file import atomic_write
+from tracing import tracer
+
+def open_workbook(file_path):
+    """Open a workbook for editing, keeping macros of .xlsm files"""
+    keep_vba = os.path.splitext(file_path)[1].lower() == ".xlsm"
+    return load_workbook(file_path, keep_vba=keep_vba)
+
+def get_worksheet(workbook, sheet_name=None):
+    """Get the named worksheet, or the active one"""
+    if sheet_name:
+        if sheet_name not in workbook.sheetnames:
+            raise ValueError(f"Sheet '{sheet_name}' not found. Available sheets: {', '.join(workbook.sheetnames)}")
+        return workbook[sheet_name]
+    return workbook.active
+
+def column_a_reader(worksheet):
+    """Read the first column once and return a get_value(row) callable over it"""
+    # worksheet.cell() would create empty cells while scanning past the data
+    values = [row[0] for row in worksheet.iter_rows(min_row=1, max_row=worksheet.max_row,
+                                                     min_col=1, max_col=1, values_only=True)]
+    return lambda row: values[row - 1] if 0 < row <= len(values) else None
+
+def read_block(worksheet, first_row, last_row, column_count):
+    """Read the values of rows first_row..last_row"""
+    if last_row < first_row:
+        return []
+    return [list(row) for row in worksheet.iter_rows(min_row=first_row, max_row=last_row,
+                                                     min_col=1, max_col=column_count,
+                                                     values_only=True)]
+
+def read_existing_symbols(file_path, sheet_name=None):
+    """Actuator numbers and tag names already in the actuator block of a workbook"""
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        worksheet = get_worksheet(workbook, sheet_name)
+        rows = [row for row in worksheet.iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+    
+    get_value = lambda row: rows[row - 1][0] if 0 < row <= len(rows) and rows[row - 1] else None
+    actuator_row = find_actuator_row(get_value)
+    if actuator_row is None:
+        return ExistingSymbols(os.path.basename(file_path))
+    insert_row = find_insertion_point(get_value, actuator_row, len(rows))
+    return symbols_from_block(rows[actuator_row - 1], rows[actuator_row:insert_row - 1],
+                              os.path.basename(file_path))
+
+def move_merged_ranges(worksheet, move_rows):
+    """Rebuild the merged ranges with move_rows(min_row, max_row) -> (min_row, max_row) or None
+    
+    The ranges live in a set hashed by their bounds, so they are changed
+    outside it and collected again. Ranges moved to None or shrunk to one
+    cell are dropped.
+    """
+    ranges = set()
+    for merged_range in list(worksheet.merged_cells.ranges):
+        rows = move_rows(merged_range.min_row, merged_range.max_row)
+        if rows is None or (rows[0] == rows[1] and merged_range.min_col == merged_range.max_col):
+            continue
+        merged_range.min_row, merged_range.max_row = rows
+        # The top-left cell holds the value; a deleted one leaves a placeholder there
+        anchor = (merged_range.min_row, merged_range.min_col)
+        if isinstance(worksheet._cells.get(anchor), MergedCell):
+            del worksheet._cells[anchor]
+        ranges.add(merged_range)
+    worksheet.merged_cells.ranges = ranges
+
+def shift_rows_down(worksheet, start_row, count):
+    """Insert count empty rows at start_row, moving merged cells and row heights along"""
+    if count <= 0:
+        return
+    worksheet.insert_rows(start_row, count)
+    
+    # openpyxl moves cell values and styles but not merged ranges or row dimensions;
+    # ranges below move down and ranges spanning start_row grow by the inserted rows
+    def move_rows(min_row, max_row):
+        return (min_row + count if min_row >= start_row else min_row,
+                max_row + count if max_row >= start_row else max_row)
+    move_merged_ranges(worksheet, move_rows)
+    
+    dimensions = worksheet.row_dimensions
+    for index in sorted((i for i in list(dimensions.keys()) if i >= start_row), reverse=True):
+        dimension = dimensions.pop(index)
+        dimension.index = index + count
+        dimensions[index + count] = dimension
+
+def open_row_gaps(worksheet, gaps):
+    """Insert empty rows at several places in one pass; returns the first new row of each gap
+    
+    gaps are (start_row, count) pairs in ascending start_row order, in the
+    rows of the unmodified sheet; each gap opens before its start_row. Every
+    cell, merged range and row height below the first gap is moved once, by
+    the rows of all gaps at or above it, instead of once per gap.
+    """
+    starts = [start_row for start_row, count in gaps]
+    # totals[i]: rows opened by the gaps before gap i
+    totals = [0]
+    for start_row, count in gaps:
+        totals.append(totals[-1] + count)
+    if not gaps or not totals[-1]:
+        return [start_row + totals[i] for i, start_row in enumerate(starts)]
+    
+    def offset(row):
+        return totals[bisect_right(starts, row)]
+    
+    # Bottom-up, so a moved cell never lands on one not moved yet
+    cells = worksheet._cells
+    for row, column in sorted((key for key in cells if key[0] >= starts[0]), reverse=True):
+        worksheet._move_cell(row, column, offset(row), 0)
+    worksheet._current_row = worksheet.max_row
+    
+    # Ranges spanning a gap grow by its rows, like shift_rows_down
+    move_merged_ranges(worksheet, lambda min_row, max_row: (min_row + offset(min_row),
+                                                           max_row + offset(max_row)))
+    
+    dimensions = worksheet.row_dimensions
+    for index in sorted((i for i in list(dimensions.keys()) if i >= starts[0]), reverse=True):
+        dimension = dimensions.pop(index)
+        dimension.index = index + offset(index)
+        dimensions[dimension.index] = dimension
+    return [start_row + totals[i] for i, start_row in enumerate(starts)]
+
+def delete_sheet_rows(worksheet, start_row, count):
+    """Delete count rows at start_row, moving merged cells and row heights below them up"""
+    if count <= 0:
+        return
+    worksheet.delete_rows(start_row, count)
+    
+    # Ranges below move up, ranges overlapping the deleted rows shrink and
+    # ranges inside them are dropped
+    end_row = start_row + count
+    def move_rows(min_row, max_row):
+        if start_row <= min_row and max_row < end_row:
+            return None
+        return (min_row if min_row < start_row else max(min_row - count, start_row),
+                max_row if max_row < start_row else max(max_row - count, start_row - 1))
+    move_merged_ranges(worksheet, move_rows)
+    
+    dimensions = worksheet.row_dimensions
+    for index in sorted(i for i in list(dimensions.keys()) if i >= start_row):
+        dimension = dimensions.pop(index)
+        if index >= start_row + count:
+            dimension.index = index - count
+            dimensions[index - count] = dimension
+
+def write_rows(worksheet, start_row, rows, style_row=None, job=None, mapping=None):
+    """Write rows starting at start_row, copying the formatting of style_row
+    
+    mapping (a column_mapping.ColumnMapping) places each field in its sheet
+    column; without it fields go to columns 1..n.
+    """
+    if mapping is None:
+        mapping = positional_mapping([""] * max((len(row) for row in rows), default=0))
+    styles = None
+    height = None
+    if style_row is not None:
+        styles = [copy(worksheet.cell(row=style_row, column=column)._style)
+                  for column in range(1, mapping.last_column + 1)]
+        height = worksheet.row_dimensions[style_row].height
+    
+    for i, row in enumerate(rows):
+        # Allow cancellation between chunks
+        if job and i and i % PROGRESS_CHUNK == 0:
+            job.report(i, len(rows))
+        
+        current_row = start_row + i
+        for column, cell_value in mapping.sheet_cells(row):
+            cell = worksheet.cell(row=current_row, column=column, value=cell_value)
+            if styles:
+                cell._style = copy(styles[column - 1])
+        if height is not None:
+            worksheet.row_dimensions[current_row].height = height
+
+def save_workbook_atomic(workbook, file_path):
+    """Save to a temporary file next to the target and move it into place"""
+    with atomic_write(file_path) as temp_path:
+        with tracer.span("xlsx_save", summary="saved workbook in {ms:.0f} ms") as span:
+            workbook.save(temp_path)
+            span.add(bytes=os.path.getsize(temp_path))
+
+class WorkbookInsertionSession:
+    """Keep one workbook loaded and apply several generated batches with one shift and one save.
+    
+    Batches may come from different templates; they are inserted in the order
+    they were added, as one contiguous block before 'Actuator End'.
+    """
+    
+    def __init__(self, excel_generator, file_path, sheet_name=None):
+        self.excel_generator = excel_generator
+        self.file_path = file_path
+        self.sheet_name = sheet_name
+        self.workbook = None
+        self.worksheet = None
+        self.pending_rows = []
+        self.batch_count = 0
+    
+    def __enter__(self):
+        self.open()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+    
+    def open(self):
+        """Load the workbook (once per session)"""
+        if self.workbook is None:
+            with tracer.span("xlsx_load", summary="loaded workbook in {ms:.0f} ms",
+                             bytes=os.path.getsize(self.file_path)):
+                self.workbook = open_workbook(self.file_path)
+            self.worksheet = get_worksheet(self.workbook, self.sheet_name)
+        return self.worksheet
+    
+    def add(self, actuators_data, job=None):
+        """Queue the rows of one generated batch; returns the number of rows queued"""
+        rows = self.excel_generator.generate_excel_rows(actuators_data, job)
+        self.pending_rows.extend(rows)
+        self.batch_count += 1
+        return len(rows)
+    
+    def apply(self, job=None, mode=INSERT_APPEND, order=ORDER_END, remove=None):
+        """Insert every queued row in one pass and save the workbook once
+        
+        mode and order work as in ExcelGenerator.insert_into_excel. remove is
+        a set of (Actuator, Name) row keys to delete from the block first,
+        except those the queued rows still generate.
+        """
+        try:
+            if not self.pending_rows and not remove:
+                return False, "No rows to insert."
+            
+            worksheet = self.open()
+            get_value = column_a_reader(worksheet)
+            actuator_row = find_actuator_row(get_value)
+            if actuator_row is None:
+                return False, "Could not find 'Actuator' in the first column. Please make sure your Excel file has the correct format."
+            
+            # Match the generated columns against the sheet's header row
+            header_values = read_block(worksheet, actuator_row, actuator_row,
+                                       max(worksheet.max_column, len(self.excel_generator.column_headers)))[0]
+            mapping = build_column_mapping(self.excel_generator.column_headers, header_values)
+            
+            rows = self.pending_rows
+            # Report layout mismatches before anything is written
+            problem = mapping.check(rows)
+            if problem:
+                return False, problem
+            layout_text = f" ({mapping.describe()})" if mapping.describe() else ""
+            
+            insert_row = find_insertion_point(get_value, actuator_row, worksheet.max_row)
+            removed = 0
+            if remove:
+                removed = self._remove_rows(worksheet, actuator_row, insert_row, rows, remove, mapping)
+                if removed:
+                    get_value = column_a_reader(worksheet)
+                    insert_row = find_insertion_point(get_value, actuator_row, worksheet.max_row)
+            # New rows look like the data row above them (never like the header)
+            style_row = insert_row - 1 if insert_row - 1 > actuator_row else None
+            
+            plan = None
+            if mode != INSERT_APPEND:
+                # Read the existing block once and keep only new (or changed) rows
+                existing_rows = [mapping.from_sheet(row) for row in
+                                 read_block(worksheet, actuator_row + 1, insert_row - 1, mapping.last_column)]
+                plan = plan_upsert(build_row_index(existing_rows, actuator_row + 1), rows, mode)
+                plan['removed'] = removed
+                for sheet_row, row in plan['updates']:
+                    for column, cell_value in mapping.sheet_cells(row):
+                        worksheet.cell(row=sheet_row, column=column, value=cell_value)
+                rows = plan['new_rows']
+                
+                if not rows and not plan['updates'] and not removed:
+                    self.pending_rows = []
+                    self.batch_count = 0
+                    return True, f"Nothing new to insert into {os.path.basename(self.file_path)} ({describe_upsert(plan)}){layout_text}."
+            
+            if rows and order != ORDER_END:
+                self._insert_sorted(worksheet, get_value, actuator_row, insert_row, rows, mapping, job)
+            elif rows:
+                with tracer.span("xlsx_insert_rows", summary="inserted {rows:,} rows in {ms:.0f} ms",
+                                 rows=len(rows)):
+                    shift_rows_down(worksheet, insert_row, len(rows))
+                    write_rows(worksheet, insert_row, rows, style_row, job, mapping)
+            
+            if job:
+                job.check_cancelled()
+            save_workbook_atomic(self.workbook, self.file_path)
+            
+            batches = self.batch_count
+            self.pending_rows = []
+            self.batch_count = 0
+            batch_text = f" from {batches} batches" if batches > 1 else ""
+            if plan is not None:
+                return True, f"Updated '{worksheet.title}' of {os.path.basename(self.file_path)}{batch_text}: {describe_upsert(plan)}{layout_text}."
+            if order != ORDER_END:
+                return True, f"Successfully inserted {len(rows)} rows{batch_text} into '{worksheet.title}' of {os.path.basename(self.file_path)} sorted by actuator number{layout_text}."
+            return True, f"Successfully inserted {len(rows)} rows{batch_text} into '{worksheet.title}' of {os.path.basename(self.file_path)} at row {insert_row}{layout_text}."
+        
+        except JobCancelled:
+            # The workbook was modified in memory only; reload it on the next apply
+            self.close()
+            raise
+        except Exception as e:
+            self.close()
+            return False, f"Error inserting into workbook: {str(e)}"
+    
+    def _remove_rows(self, worksheet, actuator_row, insert_row, rows, remove, mapping):
+        """Delete the block rows whose key is in remove and not generated by rows; returns the count"""
+        remove = set(remove) - {row_key(row) for row in rows}
+        existing_rows = read_block(worksheet, actuator_row + 1, insert_row - 1, mapping.last_column)
+        sheet_rows = [actuator_row + 1 + offset for offset, row in enumerate(existing_rows)
+                      if row_key(mapping.from_sheet(row)) in remove]
+        
+        # Bottom-up in runs of adjacent rows, so the rows above keep their numbers
+        with tracer.span("xlsx_delete_rows", summary="deleted {rows:,} rows in {ms:.0f} ms",
+                         rows=len(sheet_rows)):
+            end = len(sheet_rows)
+            while end:
+                start = end - 1
+                while start and sheet_rows[start - 1] == sheet_rows[start] - 1:
+                    start -= 1
+                delete_sheet_rows(worksheet, sheet_rows[start], end - start)
+                end = start
+        return len(sheet_rows)
+    
+    def _insert_sorted(self, worksheet, get_value, actuator_row, insert_row, rows, mapping, job=None):
+        """Insert actuator groups at their actuator-number positions in the block
+        
+        get_value is the column A reader the insertion point was found with.
+        """
+        existing_values = [get_value(row) for row in range(actuator_row + 1, insert_row)]
+        plan = plan_sorted_insertion(existing_values, actuator_row + 1, rows)
+        
+        # One pass moves the existing rows to their final places, then the gaps are filled
+        with tracer.span("xlsx_insert_rows", summary="inserted {rows:,} rows in {ms:.0f} ms") as span:
+            gap_rows = open_row_gaps(worksheet, [(sheet_row, len(block_rows)) for sheet_row, block_rows in plan])
+            written = 0
+            for gap_row, (sheet_row, block_rows) in zip(gap_rows, plan):
+                if job:
+                    job.report(written, len(rows))
+                style_row = gap_row - 1 if gap_row - 1 > actuator_row else None
+                write_rows(worksheet, gap_row, block_rows, style_row, mapping=mapping)
+                written += len(block_rows)
+                span.add(rows=len(block_rows), blocks=1)
+    
+    def close(self):
+        """Release the workbook"""
+        if self.workbook is not None:
+            self.workbook.close()
+        self.workbook = None
+        self.worksheet = None
+
+class OfflineWorkbookInserter:
+    """Insert generated rows into an .xlsx/.xlsm file with openpyxl (no Excel/COM needed)"""
+    
+    def __init__(self, excel_generator):
+        self.excel_generator = excel_generator
+    
+    def insert_into_workbook(self, actuators_data, file_path, sheet_name=None, job=None,
+                             mode=INSERT_APPEND, order=ORDER_END):
+        """Insert rows before 'Actuator End' (same rules as insert_into_excel) and save atomically"""
+        return self.insert_batches([actuators_data], file_path, sheet_name, job, mode, order)
+    
+    def insert_batches(self, batches, file_path, sheet_name=None, job=None,
+                       mode=INSERT_APPEND, order=ORDER_END, remove=None):
+        """Insert several generated batches with one load, one row shift and one save"""
+        try:
+            with WorkbookInsertionSession(self.excel_generator, file_path, sheet_name) as session:
+                for actuators_data in batches:
+                    session.add(actuators_data, job)
+                return session.apply(job, mode, order, remove)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            return False, f"Error inserting into workbook: {str(e)}"
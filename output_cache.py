@@ -0,0 +1,94 @@
+"""Make-style skipping of generated files whose inputs have not changed.
+
+Generated files are deterministic (stable row order, fixed document and
+archive timestamps), so the same inputs always give the same bytes. A
+sidecar next to each file (axes.xlsx -> axes.xlsx.inputs.json) records the
+hash of the inputs it was built from - actuator numbers and names, template
+content hashes, column layout and generator versions - and the hash of the
+file as written. A batch build skips a file when both still match, and a
+file edited or deleted since is rebuilt.
+"""
+import hashlib
+import json
+import os
+import re
+import zipfile
+from atomic_file import atomic_write
+from template_manager import components_hash
+
+SIDECAR_SUFFIX = ".inputs.json"
+SIDECAR_VERSION = 1
+
+# Bump when generated files change for the same inputs
+OUTPUT_FORMAT = 1
+
+# Timestamps written into generated files instead of the time of the build
+ZIP_TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+DOCUMENT_TIMESTAMP = "2000-01-01T00:00:00Z"
+
+# Office document properties holding the created/modified times (docProps/core.xml)
+CORE_PROPERTIES = "docProps/core.xml"
+CORE_TIME = re.compile(rb"(<dcterms:(?:created|modified)\b[^>]*>)[^<]*(</dcterms:)")
+
+# What a build did with one file
+BUILD_WRITTEN = "written"
+BUILD_SKIPPED = "skipped"
+BUILD_FAILED = "failed"
+
+def sidecar_path(file_path):
+    return file_path + SIDECAR_SUFFIX
+
+def inputs_hash(actuators_data, *identity):
+    """Hash of everything a generated file depends on
+    
+    identity adds the layout and generator details of the output format
+    (column headers, library versions, ...).
+    """
+    actuators = [[str(actuator_data['actuator_number']), str(actuator_data['actuator_name']),
+                  actuator_data.get('template_hash') or components_hash(actuator_data['actuators'])]
+                 for actuator_data in actuators_data]
+    payload = json.dumps({"format": OUTPUT_FORMAT, "identity": identity, "actuators": actuators},
+                         ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def file_hash(file_path):
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def is_up_to_date(file_path, inputs):
+    """True when file_path was built from inputs and has not been changed since"""
+    try:
+        with open(sidecar_path(file_path), "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        return (sidecar.get("version") == SIDECAR_VERSION and sidecar.get("inputs") == inputs
+                and os.path.exists(file_path) and file_hash(file_path) == sidecar.get("output"))
+    except (OSError, ValueError):
+        return False
+
+def record_output(file_path, inputs):
+    """Write the sidecar of a file just built from inputs (atomically, so it is never half written)"""
+    output = file_hash(file_path)
+    with atomic_write(sidecar_path(file_path)) as temp_path:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": SIDECAR_VERSION, "inputs": inputs, "output": output}, f)
+
+def write_reproducible_zip(data, file_path):
+    """Write a zip archive (an Office file) to file_path atomically with fixed timestamps
+    
+    data is a path or file object of the archive. Entries keep their names,
+    order and compression; only the entry times and the document's
+    created/modified properties are replaced.
+    """
+    with atomic_write(file_path) as temp_path:
+        with zipfile.ZipFile(data) as source, zipfile.ZipFile(temp_path, "w") as target:
+            for info in source.infolist():
+                entry = zipfile.ZipInfo(info.filename, date_time=ZIP_TIMESTAMP)
+                entry.compress_type = info.compress_type
+                entry.external_attr = info.external_attr
+                content = source.read(info)
+                if info.filename == CORE_PROPERTIES:
+                    content = CORE_TIME.sub(rb"\g<1>" + DOCUMENT_TIMESTAMP.encode() + rb"\g<2>", content)
+                target.writestr(entry, content)
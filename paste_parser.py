@@ -0,0 +1,91 @@
+import re
+from schema import STANDARD_LAYOUT, keys_of_kind
+
+ACTUATOR_LINE_PATTERN = re.compile(r'^_\d+')
+MULTI_SPACE_PATTERN = re.compile(r'\s{2,}')
+AXIS_NAME_PATTERN = re.compile(r'Axis[A-Z][a-z0-9]*')
+
+DESCRIPTION_FIELDS = keys_of_kind("description")
+
+def reconstruct_lines(pasted_data):
+    """Join pasted lines so that each _XXX line and its continuations form one row"""
+    # Reconstruct lines: only lines starting with _XXX are new rows
+    # Everything else gets appended to the previous line
+    reconstructed_lines = []
+    current_line = ""
+    
+    for line in pasted_data.split('\n'):
+        line = line.strip()
+        if not line:  # Skip empty lines
+            continue
+        
+        # Check if line starts with _XXX pattern (underscore + digits)
+        if ACTUATOR_LINE_PATTERN.match(line):
+            # This is a new actuator line
+            if current_line:  # Save previous line if exists
+                reconstructed_lines.append(current_line)
+            current_line = line  # Start new line
+        else:
+            # This is a continuation of the previous line
+            if current_line:
+                current_line += " " + line  # Add to current line with space
+            else:
+                current_line = line  # First line doesn't start with _XXX
+    
+    # Add the last line
+    if current_line:
+        reconstructed_lines.append(current_line)
+    
+    return reconstructed_lines
+
+def parse_pasted_actuators(pasted_data, layout=STANDARD_LAYOUT):
+    """Parse pasted (Excel-like) rows in the given layout into template actuator components"""
+    imported_actuators = []
+    
+    for line in reconstruct_lines(pasted_data):
+        if not line.strip():
+            continue
+        
+        # Split by multiple spaces or tabs
+        # First normalize multiple spaces to single tabs
+        line = MULTI_SPACE_PATTERN.sub('\t', line)
+        
+        # Split by tabs
+        if '\t' in line:
+            parts = line.split('\t')
+        else:
+            # Fallback: split by single space
+            parts = line.split(' ')
+        
+        # Clean empty parts and strip whitespace
+        parts = [p.strip() for p in parts if p.strip()]
+        
+        if not parts:
+            continue
+        
+        # Create actuator data mapping to our fields
+        parts = parts[1:]  # Skip the first column (actuator number)
+        actuator = layout.parse(parts)
+        
+        # Apply smart placeholder replacement
+        value = actuator.get('name', '')
+        if AXIS_NAME_PATTERN.search(value):
+            # Replace specific axis names with placeholder
+            # Keep suffixes like _MotionCfg, _NotHomed etc.
+            if '_' in value:
+                base_name = value.split('_')[0]
+                suffix = value[len(base_name):]
+                actuator['name'] = f"{{ActuatorName}}{suffix}"
+            else:
+                actuator['name'] = "{ActuatorName}"
+        
+        # Handle alarm descriptions - replace axis names with placeholder
+        for field_key in DESCRIPTION_FIELDS:
+            if actuator.get(field_key):
+                actuator[field_key] = AXIS_NAME_PATTERN.sub('{ActuatorName}', actuator[field_key])
+        
+        # Only add if we have both actuator number and name
+        if actuator.get('name', '').strip() and len(parts) > 1:
+            imported_actuators.append(actuator)
+    
+    return imported_actuators
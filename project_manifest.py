@@ -0,0 +1,286 @@
+"""Project manifest: which template each actuator of a project was generated from.
+
+Instead of the expanded rows, the manifest stores one binding per actuator
+number: the template, the actuator name and the target workbook and sheet,
+plus what was last built into the target (template version and content
+hash, name, target). A template saved since then makes its bindings stale,
+and a rebuild regenerates only those actuators and patches their rows in
+the workbook: changed rows are updated in place, new rows inserted at the
+actuator's position and rows of removed components deleted. The rows of
+the last build are regenerated from the template history, so nothing but
+the bindings is stored. The project can also be exported as one generated
+file per target workbook, skipping the files whose inputs are unchanged.
+"""
+import json
+import os
+import threading
+from atomic_file import atomic_write
+from actuator_batch import build_actuator_entry
+from actuator_block import row_key, INSERT_UPSERT, ORDER_SORTED
+from actuator_validation import normalize_number
+from template_manager import components_hash
+from output_cache import BUILD_WRITTEN, BUILD_SKIPPED, BUILD_FAILED
+
+MANIFEST_VERSION = 1
+
+# State of a binding against the current templates
+STATE_BUILT = "up to date"
+STATE_NEW = "not built"
+STATE_CHANGED = "template changed"
+STATE_REBOUND = "binding changed"
+STATE_MISSING = "template missing"
+
+def make_target(workbook, sheet=None):
+    """Target of a binding: the absolute workbook path and the sheet (None for the active one)"""
+    return {"workbook": os.path.abspath(workbook), "sheet": sheet or None}
+
+def target_key(target):
+    return target["workbook"], target["sheet"]
+
+def describe_target(target):
+    name = os.path.basename(target["workbook"])
+    return f"{name} [{target['sheet']}]" if target["sheet"] else name
+
+class ProjectManifest:
+    """Actuator bindings of a project, persisted as JSON"""
+    
+    def __init__(self, file_path=os.path.join("templates", "project.json")):
+        self.file_path = file_path
+        # actuator number -> {"number", "name", "template", "target", "built"}
+        self.bindings = {}
+        self._lock = threading.Lock()
+        self.load()
+    
+    def load(self):
+        """Load the saved manifest (an unreadable or outdated file starts an empty project)"""
+        if not os.path.exists(self.file_path):
+            return
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                return
+            self.bindings = data["bindings"]
+        except Exception as e:
+            print(f"Error loading project manifest: {e}")
+    
+    def save(self):
+        """Write the manifest atomically"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.file_path)), exist_ok=True)
+        with atomic_write(self.file_path) as temp_path:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "bindings": self.bindings}, f,
+                          ensure_ascii=False, indent=2)
+    
+    def describe(self):
+        """Counts for messages"""
+        targets = {target_key(binding["target"]) for binding in self.bindings.values()}
+        return f"{len(self.bindings)} actuators in {len(targets)} workbook target(s)"
+    
+    def bind(self, template_name, actuators, workbook, sheet=None, save=True):
+        """Bind (number, name) pairs to a template and target; a number already bound is rebound
+        
+        The last build of a rebound actuator is kept, so the next rebuild
+        replaces its old rows.
+        """
+        target = make_target(workbook, sheet)
+        with self._lock:
+            for number, name in actuators:
+                number = normalize_number(number)
+                if number is None:
+                    continue
+                built = self.bindings.get(number, {}).get("built")
+                self.bindings[number] = {"number": number, "name": name, "template": template_name,
+                                         "target": target, "built": built}
+            if save:
+                self.save()
+    
+    def record_built(self, actuators_data, template_manager, workbook, sheet=None, save=True):
+        """Bind generated actuators that were just written to a workbook, marked as built"""
+        target = make_target(workbook, sheet)
+        history = template_manager.history
+        with self._lock:
+            for actuator_data in actuators_data:
+                number = normalize_number(actuator_data['actuator_number'])
+                if number is None:
+                    continue
+                template_name = actuator_data['template_name']
+                built = {"name": actuator_data['actuator_name'], "template": template_name,
+                         "template_version": history.latest_version(template_name),
+                         "template_hash": actuator_data['template_hash'], "target": target}
+                self.bindings[number] = {"number": number, "name": actuator_data['actuator_name'],
+                                         "template": template_name, "target": target, "built": built}
+            if save:
+                self.save()
+    
+    def remove(self, numbers, save=True):
+        """Forget bindings by number (their rows stay in the workbook); returns how many were bound"""
+        with self._lock:
+            removed = sum(1 for number in numbers
+                          if self.bindings.pop(normalize_number(number), None) is not None)
+            if removed and save:
+                self.save()
+        return removed
+    
+    def state(self, binding, template_manager):
+        """STATE_* of a binding against the current template"""
+        template_hash = template_manager.get_template_hash(binding["template"])
+        if template_hash is None:
+            return STATE_MISSING
+        built = binding["built"]
+        if built is None:
+            return STATE_NEW
+        if (built["template"], built["name"], built["target"]) != (
+                binding["template"], binding["name"], binding["target"]):
+            return STATE_REBOUND
+        if built["template_hash"] != template_hash:
+            return STATE_CHANGED
+        return STATE_BUILT
+    
+    def status(self, template_manager):
+        """[(binding, state)] sorted by actuator number"""
+        with self._lock:
+            bindings = sorted(self.bindings.values(), key=lambda binding: int(binding["number"]))
+        return [(binding, self.state(binding, template_manager)) for binding in bindings]
+    
+    def stale_bindings(self, template_manager):
+        """Bindings whose rows differ from what the current templates generate"""
+        return [binding for binding, state in self.status(template_manager) if state != STATE_BUILT]
+    
+    def built_rows(self, binding, template_manager, excel_generator):
+        """Row keys the last build of a binding wrote, or None when that version is unknown
+        
+        The template is rebuilt from its history at the built version (a
+        template first saved after the build has the built content as its
+        baseline, the version after it) and accepted only if its hash matches.
+        """
+        built = binding["built"]
+        if built is None:
+            return None
+        template_name = built["template"]
+        template_data = None
+        current = template_manager.get_template(template_name)
+        if current is not None and components_hash(current.get("actuators", [])) == built["template_hash"]:
+            template_data = current
+        else:
+            for version in (built["template_version"], built["template_version"] + 1):
+                try:
+                    candidate = template_manager.history.get_version(template_name, version) if version else None
+                except ValueError:
+                    candidate = None
+                if candidate is not None and components_hash(candidate.get("actuators", [])) == built["template_hash"]:
+                    template_data = candidate
+                    break
+        if template_data is None:
+            return None
+        entry = build_actuator_entry(template_name, template_data, built["template_hash"],
+                                     binding["number"], built["name"])
+        return {row_key(row) for row in excel_generator.generate_excel_rows([entry])}
+    
+    def rebuild(self, template_manager, inserter, job=None, rebuild_all=False, symbol_index=None,
+                order=ORDER_SORTED):
+        """Regenerate the stale (or all) bindings and patch their rows in each target workbook
+        
+        inserter is an offline_excel.OfflineWorkbookInserter. Each target is
+        loaded and saved once; the manifest is saved after each target, so a
+        failure keeps the targets already rebuilt. Returns (success, message).
+        """
+        bindings = list(self.bindings.values()) if rebuild_all else self.stale_bindings(template_manager)
+        if not bindings:
+            return True, f"Project is up to date ({self.describe()})."
+        
+        # target -> [target, generated entries, row keys of the last builds]
+        targets = {}
+        missing = []
+        for binding in bindings:
+            template_name = binding["template"]
+            template_data = template_manager.get_template(template_name)
+            if template_data is None:
+                missing.append(f"_{binding['number']} ({template_name})")
+                continue
+            template_hash = template_manager.get_template_hash(template_name)
+            entry = build_actuator_entry(template_name, template_data, template_hash,
+                                         binding["number"], binding["name"])
+            targets.setdefault(target_key(binding["target"]), [binding["target"], [], set()])[1].append(entry)
+            
+            old_rows = self.built_rows(binding, template_manager, inserter.excel_generator)
+            if old_rows:
+                targets.setdefault(target_key(binding["built"]["target"]),
+                                   [binding["built"]["target"], [], set()])[2].update(old_rows)
+        
+        messages = []
+        if missing:
+            messages.append(f"Skipped actuators with missing templates: {', '.join(missing)}")
+        if not targets:
+            return False, "\n".join(messages)
+        for target, entries, old_rows in targets.values():
+            if job:
+                job.check_cancelled()
+            success, message = inserter.insert_batches([entries], target["workbook"], target["sheet"], job,
+                                                       INSERT_UPSERT, order, remove=old_rows)
+            if not success:
+                return False, "\n".join(messages + [f"{describe_target(target)}: {message}"])
+            messages.append(message)
+            self.record_built(entries, template_manager, target["workbook"], target["sheet"])
+            if symbol_index is not None:
+                symbol_index.register(entries)
+        
+        rebuilt = sum(len(entries) for target, entries, old_rows in targets.values())
+        return True, "\n".join([f"Rebuilt {rebuilt} actuator(s):"] + messages)
+    
+    def export_files(self, template_manager, excel_generator, directory, job=None, force=False):
+        """Generate one Excel file per target workbook into directory, skipping unchanged files
+        
+        Each file holds the target's actuators sorted by number; a file whose
+        sidecar matches its inputs is left as it is (see output_cache.py)
+        unless force is set. Returns (success, message).
+        """
+        with self._lock:
+            bindings = sorted(self.bindings.values(), key=lambda binding: int(binding["number"]))
+        if not bindings:
+            return False, "No actuators are bound to workbooks yet."
+        
+        # target -> generated entries, in actuator number order
+        targets = {}
+        missing = []
+        for binding in bindings:
+            template_name = binding["template"]
+            template_data = template_manager.get_template(template_name)
+            if template_data is None:
+                missing.append(f"_{binding['number']} ({template_name})")
+                continue
+            entry = build_actuator_entry(template_name, template_data,
+                                         template_manager.get_template_hash(template_name),
+                                         binding["number"], binding["name"])
+            targets.setdefault(target_key(binding["target"]), []).append(entry)
+        
+        os.makedirs(directory, exist_ok=True)
+        counts = {BUILD_WRITTEN: 0, BUILD_SKIPPED: 0}
+        failed = []
+        used_names = set()
+        for key in sorted(targets, key=lambda key: (key[0], key[1] or "")):
+            workbook, sheet = key
+            stem = os.path.splitext(os.path.basename(workbook))[0] + (f"_{sheet}" if sheet else "")
+            # Same-named workbooks of different folders get a numbered file each
+            name, number = stem, 1
+            while name.lower() in used_names:
+                number += 1
+                name = f"{stem}_{number}"
+            used_names.add(name.lower())
+            file_path = os.path.join(directory, name + ".xlsx")
+            
+            if job:
+                job.check_cancelled()
+            status = excel_generator.build_excel_file(targets[key], file_path, job, force)
+            if status == BUILD_FAILED:
+                failed.append(os.path.basename(file_path))
+            else:
+                counts[status] += 1
+        
+        messages = [f"Built {counts[BUILD_WRITTEN]} file(s), skipped {counts[BUILD_SKIPPED]} unchanged "
+                    f"in {directory}."]
+        if missing:
+            messages.append(f"Skipped actuators with missing templates: {', '.join(missing)}")
+        if failed:
+            messages.append(f"Failed: {', '.join(failed)}")
+        return not failed, "\n".join(messages)
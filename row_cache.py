@@ -0,0 +1,84 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+class RowCache:
+    """Bounded LRU cache of generated Excel rows.
+    
+    Entries are keyed by (template content hash, actuator number, actuator name)
+    so a changed template can never hit a stale entry. Entries are also tracked
+    per template name so saving a template drops its rows right away. Rows
+    are stored and returned as tuples, so callers cannot change a cached entry.
+    """
+    
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._keys_by_template = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def hash_components(components):
+        """Hash a template component list by content"""
+        payload = json.dumps(components, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    def make_key(self, actuator_data):
+        """Build the cache key for one generated actuator entry"""
+        content_hash = actuator_data.get('template_hash')
+        if not content_hash:
+            content_hash = self.hash_components(actuator_data['actuators'])
+        return (content_hash,
+                str(actuator_data['actuator_number']),
+                actuator_data['actuator_name'])
+    
+    def get(self, key):
+        """Return the cached rows (a tuple of row tuples) for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key, rows, template_name=None):
+        """Store rows for key, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (tuple(tuple(row) for row in rows), template_name)
+            self._entries.move_to_end(key)
+            if template_name:
+                self._keys_by_template.setdefault(template_name, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                evicted_key, (_, evicted_template) = self._entries.popitem(last=False)
+                keys = self._keys_by_template.get(evicted_template)
+                if keys is not None:
+                    keys.discard(evicted_key)
+                    if not keys:
+                        del self._keys_by_template[evicted_template]
+    
+    def invalidate_template(self, template_name):
+        """Drop every entry generated from the given template"""
+        with self._lock:
+            for key in self._keys_by_template.pop(template_name, ()):
+                self._entries.pop(key, None)
+    
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_template.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def stats_text(self):
+        """Short summary for the status bar"""
+        return f"row cache: {self.hits} hits / {self.misses} misses"
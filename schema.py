@@ -0,0 +1,130 @@
+"""Single definition of the actuator component fields and the output layouts.
+
+Every field of a template component is declared once in FIELDS. Layouts pick
+and order the output columns; for each layout a row projector is compiled
+once at import time so generating a row is one function call without
+per-field lookups in the schema.
+"""
+from collections import namedtuple
+
+PLACEHOLDER = "{ActuatorName}"
+
+# Column filled from the actuator number instead of a component field
+ACTUATOR_KEY = "actuator"
+ACTUATOR_HEADER = "Actuator"
+
+# kind: "text", "number", "description" (alarm texts) or "multiline"
+Field = namedtuple("Field", "key header placeholders kind")
+
+FIELDS = (
+    Field("name", "Name", True, "text"),
+    Field("index", "Index", False, "number"),
+    Field("datatype", "DataType", False, "text"),
+    Field("prefix", "Prefix", False, "text"),
+    Field("output", "Output", False, "text"),
+    Field("out_descr", "Out.Descr.", False, "text"),
+    Field("input", "Input", True, "text"),
+    Field("inp_descr", "Inp.Descr.", True, "text"),
+    Field("alm0", "Alm 0", False, "number"),
+    Field("alm1", "Alm 1", False, "number"),
+    Field("alm0_descr_lang1", "Alm 0 Descr. Language1", True, "description"),
+    Field("alm0_descr_lang2", "Alm 0 Descr. Language2", True, "description"),
+    Field("alm0_descr_lang3", "Alm 0 Descr. Language3", True, "description"),
+    Field("alm1_descr_lang1", "Alm 1 Descr.Language1", True, "description"),
+    Field("alm1_descr_lang2", "Alm 1 Descr.Language2", True, "description"),
+    Field("alm1_descr_lang3", "Alm 1 Descr.Language3", True, "description"),
+    Field("alm0_procedure", "Alm0 Procedure", False, "text"),
+    Field("alm1_procedure", "Alm1 Procedure", False, "text"),
+    Field("alm0_bad", "Alm0 BAD", False, "text"),
+    Field("alm1_bad", "Alm1 BAD", False, "text"),
+    Field("alm0_cause", "Alm0 Cause", False, "multiline"),
+    Field("alm1_cause", "Alm1 Cause", False, "multiline"),
+    Field("alm0_action", "Alm0 Action", False, "multiline"),
+    Field("alm1_action", "Alm1 Action", False, "multiline"),
+)
+
+FIELDS_BY_KEY = {field.key: field for field in FIELDS}
+FIELD_KEYS = tuple(field.key for field in FIELDS)
+# (key, label) pairs in editing order, as used by the template dialog
+FIELD_LABELS = tuple((field.key, field.header) for field in FIELDS)
+
+def keys_of_kind(kind):
+    """Keys of the fields of one kind (e.g. "description")"""
+    return tuple(field.key for field in FIELDS if field.kind == kind)
+
+def empty_component():
+    """A component with every field empty"""
+    return {key: "" for key in FIELD_KEYS}
+
+def replace_placeholders(text, actuator_name):
+    """Replace {ActuatorName} in text"""
+    if not text:
+        return text
+    return text.replace(PLACEHOLDER, actuator_name)
+
+def _compile_projector(keys):
+    """Build project(component, actuator_number, actuator_name) -> row for the given columns"""
+    # Generated once per layout, e.g.
+    #   return [f"_{actuator_number}", replace(get('name', ''), actuator_name), get('index', ''), ...]
+    cells = []
+    for key in keys:
+        if key == ACTUATOR_KEY:
+            cells.append('f"_{actuator_number}"')
+        elif FIELDS_BY_KEY[key].placeholders:
+            cells.append(f"replace(get({key!r}, ''), actuator_name)")
+        else:
+            cells.append(f"get({key!r}, '')")
+    source = ("def project(component, actuator_number, actuator_name):\n"
+              "    get = component.get\n"
+              f"    return [{', '.join(cells)}]\n")
+    namespace = {"replace": replace_placeholders}
+    exec(compile(source, "<schema projector>", "exec"), namespace)
+    return namespace["project"]
+
+def _compile_parser(keys):
+    """Build parse(cells) -> component for cells in the given field order (missing cells are "")"""
+    count = len(keys)
+    def parse(cells):
+        cells = list(cells[:count])
+        cells.extend([""] * (count - len(cells)))
+        return dict(zip(keys, cells))
+    return parse
+
+class Layout:
+    """Ordered output columns with a compiled row projector"""
+    
+    def __init__(self, name, keys, description=""):
+        unknown = [key for key in keys if key != ACTUATOR_KEY and key not in FIELDS_BY_KEY]
+        if unknown:
+            raise ValueError(f"Unknown fields in layout '{name}': {', '.join(unknown)}")
+        self.name = name
+        self.keys = tuple(keys)
+        self.description = description
+        self.headers = tuple(ACTUATOR_HEADER if key == ACTUATOR_KEY else FIELDS_BY_KEY[key].header
+                             for key in self.keys)
+        self.field_keys = tuple(key for key in self.keys if key != ACTUATOR_KEY)
+        self.project = _compile_projector(self.keys)
+        # Parses the component cells of a row (the cells after the Actuator column)
+        self.parse = _compile_parser(self.field_keys)
+
+LAYOUTS = {}
+
+def register_layout(name, keys, description=""):
+    """Register a named output layout (compiled immediately)"""
+    layout = Layout(name, keys, description)
+    LAYOUTS[name] = layout
+    return layout
+
+def get_layout(name=None):
+    """The named layout, or the standard one"""
+    if name is None:
+        return STANDARD_LAYOUT
+    if name not in LAYOUTS:
+        raise ValueError(f"Unknown layout '{name}'. Available layouts: {', '.join(LAYOUTS)}")
+    return LAYOUTS[name]
+
+# The 25-column sheet layout ("Actuator" followed by every field)
+STANDARD_LAYOUT = register_layout("standard", (ACTUATOR_KEY,) + FIELD_KEYS,
+                                  "All columns of the actuator sheet")
+register_layout("io_list", (ACTUATOR_KEY, "name", "datatype", "output", "out_descr", "input", "inp_descr"),
+                "Tags with their I/O addresses and descriptions")
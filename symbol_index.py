@@ -0,0 +1,185 @@
+"""Project-wide index of the tag names, I/O addresses and actuator numbers already generated.
+
+Every batch that is exported or inserted is registered, so later batches can
+be checked against the whole project: a tag name or an input/output address
+used by another actuator number is a conflict. The lookups are plain dicts
+(tag name -> actuator number, address -> owner), registering replaces the
+entries of the same actuator numbers, and the index is saved next to the
+templates so it is loaded as-is on the next start.
+"""
+import json
+import os
+import threading
+from atomic_file import atomic_write
+from actuator_validation import (ExistingSymbols, ValidationIssue, ValidationResult,
+                                 normalize_number, ERROR)
+from schema import register_layout, ACTUATOR_KEY
+from tracing import tracer
+
+INDEX_VERSION = 1
+
+# Columns the index records, projected with the schema's compiled projector
+SYMBOL_LAYOUT = register_layout("symbols", (ACTUATOR_KEY, "name", "input", "output"),
+                                "Tag names and I/O addresses (symbol index)")
+ADDRESS_FIELDS = ("input", "output")
+
+def symbol_key(value):
+    """Index key of a tag name or address (Logix names are case-insensitive)"""
+    return str(value).strip().lower()
+
+def iter_symbols(actuator_data):
+    """Yield (tag name, input address, output address) of one generated actuator"""
+    project = SYMBOL_LAYOUT.project
+    number = actuator_data['actuator_number']
+    name = actuator_data['actuator_name']
+    for component in actuator_data['actuators']:
+        _, tag_name, input_address, output_address = project(component, number, name)
+        tag_name = str(tag_name).strip()
+        if tag_name:
+            yield tag_name, str(input_address).strip(), str(output_address).strip()
+
+class SymbolIndex(ExistingSymbols):
+    """Tags, addresses and actuator numbers of a project, persisted as JSON"""
+    
+    def __init__(self, file_path=os.path.join("templates", "symbol_index.json"), source="the project"):
+        super().__init__(source)
+        self.file_path = file_path
+        # address key -> [actuator number, tag name, field]
+        self.addresses = {}
+        # actuator number -> {"tags": [tag keys], "addresses": [address keys]}, for replacing
+        self.actuators = {}
+        self._lock = threading.Lock()
+        self.load()
+    
+    def load(self):
+        """Load the saved index (an unreadable or outdated file starts an empty index)"""
+        if not os.path.exists(self.file_path):
+            return
+        try:
+            with tracer.span("symbol_index_load", summary="loaded symbol index in {ms:.0f} ms",
+                             bytes=os.path.getsize(self.file_path)):
+                with open(self.file_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            if data.get("version") != INDEX_VERSION:
+                return
+            self.tags = data["tags"]
+            self.addresses = data["addresses"]
+            self.actuators = data["actuators"]
+            self.numbers = set(self.actuators)
+        except Exception as e:
+            print(f"Error loading symbol index: {e}")
+    
+    def save(self):
+        """Write the index atomically"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.file_path)), exist_ok=True)
+        with atomic_write(self.file_path) as temp_path:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "tags": self.tags, "addresses": self.addresses,
+                           "actuators": self.actuators}, f, ensure_ascii=False, separators=(",", ":"))
+    
+    def symbols(self):
+        """A copy of the tag names and actuator numbers, for validating new entries against"""
+        with self._lock:
+            return ExistingSymbols(self.source).update(self)
+    
+    def entries(self):
+        """[(actuator number, tag names, address count)] sorted by number, for listing"""
+        with self._lock:
+            return sorted(((number, list(entry["tags"]), len(entry["addresses"]))
+                           for number, entry in self.actuators.items()), key=lambda item: int(item[0]))
+    
+    def describe(self):
+        """Counts for messages"""
+        return (f"{len(self.actuators)} actuators, {len(self.tags)} tags, "
+                f"{len(self.addresses)} I/O addresses")
+    
+    def check(self, actuators_data):
+        """Conflicts of a batch with the index and within itself; returns a ValidationResult
+        
+        Rows of the issues are the positions of the actuators in actuators_data.
+        """
+        issues = []
+        batch_tags = {}
+        batch_addresses = {}
+        with self._lock:
+            for row, actuator_data in enumerate(actuators_data):
+                number = normalize_number(actuator_data['actuator_number'])
+                for tag_name, input_address, output_address in iter_symbols(actuator_data):
+                    key = symbol_key(tag_name)
+                    owner = self.tags.get(key)
+                    if owner is not None and owner != number:
+                        issues.append(ValidationIssue(row, "tag", ERROR,
+                                                      f"Tag {tag_name} already exists for actuator _{owner} in {self.source}"))
+                    other = batch_tags.setdefault(key, number)
+                    if other != number:
+                        issues.append(ValidationIssue(row, "tag", ERROR,
+                                                      f"Tag {tag_name} is also generated by actuator _{other}"))
+                    
+                    for field, address in zip(ADDRESS_FIELDS, (input_address, output_address)):
+                        if not address:
+                            continue
+                        address_key = symbol_key(address)
+                        used_by = self.addresses.get(address_key)
+                        if used_by is not None and used_by[0] != number:
+                            issues.append(ValidationIssue(row, field, ERROR,
+                                                          f"{tag_name}: {address} is already used by {used_by[1]} (_{used_by[0]}) in {self.source}"))
+                        used_by = batch_addresses.setdefault(address_key, (number, tag_name))
+                        if used_by[0] != number:
+                            issues.append(ValidationIssue(row, field, ERROR,
+                                                          f"{tag_name}: {address} is also used by {used_by[1]} (_{used_by[0]})"))
+        return ValidationResult(issues, len(actuators_data))
+    
+    def register(self, actuators_data, save=True):
+        """Record the symbols of exported actuators, replacing earlier entries of the same numbers"""
+        with self._lock:
+            for actuator_data in actuators_data:
+                number = normalize_number(actuator_data['actuator_number'])
+                if number is None:
+                    continue
+                self._remove(number)
+                tag_keys = []
+                address_keys = []
+                for tag_name, input_address, output_address in iter_symbols(actuator_data):
+                    key = symbol_key(tag_name)
+                    self.tags.setdefault(key, number)
+                    tag_keys.append(key)
+                    for field, address in zip(ADDRESS_FIELDS, (input_address, output_address)):
+                        if address:
+                            address_key = symbol_key(address)
+                            self.addresses.setdefault(address_key, [number, tag_name, field])
+                            address_keys.append(address_key)
+                self.actuators[number] = {"tags": tag_keys, "addresses": address_keys}
+                self.numbers.add(number)
+            if save:
+                self.save()
+    
+    def remove(self, numbers, save=True):
+        """Forget actuators by number; returns how many were in the index"""
+        with self._lock:
+            removed = sum(1 for number in numbers if self._remove(normalize_number(number)))
+            if removed and save:
+                self.save()
+        return removed
+    
+    def clear(self, save=True):
+        """Forget every actuator"""
+        with self._lock:
+            self.tags = {}
+            self.addresses = {}
+            self.actuators = {}
+            self.numbers = set()
+            if save:
+                self.save()
+    
+    def _remove(self, number):
+        entry = self.actuators.pop(number, None)
+        if entry is None:
+            return False
+        for key in entry["tags"]:
+            if self.tags.get(key) == number:
+                del self.tags[key]
+        for key in entry["addresses"]:
+            if self.addresses.get(key, [None])[0] == number:
+                del self.addresses[key]
+        self.numbers.discard(number)
+        return True
@@ -0,0 +1,105 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+# Tag names shown per actuator in the list
+SHOWN_TAGS = 4
+
+class SymbolIndexDialog:
+    """Actuators in the project symbol index, and removing the stale ones"""
+    
+    def __init__(self, parent, symbol_index):
+        self.parent = parent
+        self.symbol_index = symbol_index
+        # Number of actuators removed from the index
+        self.result = 0
+        
+        # Create dialog window
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Project Symbol Index")
+        self.dialog.geometry("800x500")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        # Center the dialog
+        self.dialog.update_idletasks()
+        x = (self.dialog.winfo_screenwidth() // 2) - (400)
+        y = (self.dialog.winfo_screenheight() // 2) - (250)
+        self.dialog.geometry(f"800x500+{x}+{y}")
+        
+        self.create_widgets()
+        self.load_entries()
+        
+        # Wait for dialog to close
+        self.dialog.wait_window()
+    
+    def create_widgets(self):
+        # Main frame
+        main_frame = ttk.Frame(self.dialog, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Dialog buttons - fixed at bottom
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=(10, 0))
+        
+        ttk.Button(button_frame, text="Close",
+                  command=self.dialog.destroy).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="Clear Index",
+                  command=self.clear_index).pack(side=tk.RIGHT, padx=(0, 10))
+        self.remove_btn = ttk.Button(button_frame, text="Remove Selected",
+                                    command=self.remove_selected, state=tk.DISABLED)
+        self.remove_btn.pack(side=tk.RIGHT, padx=(0, 10))
+        self.summary_label = ttk.Label(button_frame, text="", foreground="gray")
+        self.summary_label.pack(side=tk.LEFT)
+        
+        # Actuators list
+        list_frame = ttk.LabelFrame(main_frame, text="Exported Actuators (remove the ones that no longer exist)",
+                                    padding="10")
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.entries_tree = ttk.Treeview(list_frame, columns=("number", "tags", "addresses"),
+                                         show="headings", selectmode="extended")
+        self.entries_tree.heading("number", text="Actuator")
+        self.entries_tree.heading("tags", text="Tags")
+        self.entries_tree.heading("addresses", text="I/O Addresses")
+        self.entries_tree.column("number", width=90)
+        self.entries_tree.column("tags", width=520)
+        self.entries_tree.column("addresses", width=100)
+        
+        entries_scroll = ttk.Scrollbar(list_frame, orient="vertical", command=self.entries_tree.yview)
+        self.entries_tree.configure(yscrollcommand=entries_scroll.set)
+        self.entries_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        entries_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.entries_tree.bind("<<TreeviewSelect>>", self.on_select)
+    
+    def load_entries(self):
+        """Fill the list from the index, sorted by actuator number"""
+        self.entries_tree.delete(*self.entries_tree.get_children())
+        for number, tag_names, address_count in self.symbol_index.entries():
+            tags_text = ", ".join(tag_names[:SHOWN_TAGS])
+            if len(tag_names) > SHOWN_TAGS:
+                tags_text += f" (+{len(tag_names) - SHOWN_TAGS})"
+            self.entries_tree.insert("", "end", iid=number, values=(f"_{number}", tags_text, address_count))
+        self.summary_label.config(text=self.symbol_index.describe())
+        self.on_select()
+    
+    def on_select(self, event=None):
+        self.remove_btn.config(state=tk.NORMAL if self.entries_tree.selection() else tk.DISABLED)
+    
+    def remove_selected(self):
+        """Forget the selected actuators (their tags and addresses become free again)"""
+        numbers = list(self.entries_tree.selection())
+        if not numbers:
+            return
+        if not messagebox.askyesno("Remove Actuators",
+                                   f"Remove {len(numbers)} actuator(s) from the symbol index?"):
+            return
+        self.result += self.symbol_index.remove(numbers)
+        self.load_entries()
+    
+    def clear_index(self):
+        """Forget every actuator"""
+        if not messagebox.askyesno("Clear Index", "Remove every actuator from the symbol index?"):
+            return
+        self.result += len(self.symbol_index.entries())
+        self.symbol_index.clear()
+        self.load_entries()
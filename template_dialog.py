@@ -1,7 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import copy
-import re
+from component_history import ComponentHistory
+from paste_parser import parse_pasted_actuators
+from schema import FIELD_LABELS, FIELDS_BY_KEY
 
 class TemplateDialog:
     def __init__(self, parent, title, template_data=None):
@@ -29,36 +30,20 @@ class TemplateDialog:
         }
         
         # All available fields for actuators
-        self.actuator_fields = [
-            ("name", "Name"),
-            ("index", "Index"),
-            ("datatype", "DataType"),
-            ("prefix", "Prefix"),
-            ("output", "Output"),
-            ("out_descr", "Out.Descr."),
-            ("input", "Input"),
-            ("inp_descr", "Inp.Descr."),
-            ("alm0", "Alm 0"),
-            ("alm1", "Alm 1"),
-            ("alm0_descr_lang1", "Alm 0 Descr. Language1"),
-            ("alm0_descr_lang2", "Alm 0 Descr. Language2"),
-            ("alm0_descr_lang3", "Alm 0 Descr. Language3"),
-            ("alm1_descr_lang1", "Alm 1 Descr.Language1"),
-            ("alm1_descr_lang2", "Alm 1 Descr.Language2"),
-            ("alm1_descr_lang3", "Alm 1 Descr.Language3"),
-            ("alm0_procedure", "Alm0 Procedure"),
-            ("alm1_procedure", "Alm1 Procedure"),
-            ("alm0_bad", "Alm0 BAD"),
-            ("alm1_bad", "Alm1 BAD"),
-            ("alm0_cause", "Alm0 Cause"),
-            ("alm1_cause", "Alm1 Cause"),
-            ("alm0_action", "Alm0 Action"),
-            ("alm1_action", "Alm1 Action")
-        ]
+        # Actuator field definitions (see schema.py)
+        self.actuator_fields = list(FIELD_LABELS)
+        
+        # Every edit of the component list is a step that can be undone; the
+        # caller's template_data is left untouched until the template is saved
+        self.history = ComponentHistory(self.template_data["actuators"])
         
         self.create_widgets()
         self.load_template_data()
         
+        self.dialog.bind("<Control-z>", self.on_undo_key)
+        self.dialog.bind("<Control-y>", self.on_redo_key)
+        self.dialog.bind("<Control-Z>", self.on_redo_key)
+        
         # Wait for dialog to close
         self.dialog.wait_window()
     
@@ -112,6 +97,11 @@ class TemplateDialog:
         ttk.Button(button_frame, text="Cancel", 
                   command=self.cancel).pack(side=tk.RIGHT)
         
+        self.undo_btn = ttk.Button(button_frame, text="↶ Undo", command=self.undo, state=tk.DISABLED)
+        self.undo_btn.pack(side=tk.LEFT)
+        self.redo_btn = ttk.Button(button_frame, text="↷ Redo", command=self.redo, state=tk.DISABLED)
+        self.redo_btn.pack(side=tk.LEFT, padx=(5, 0))
+    
     def setup_list_view(self, parent):
         """Setup the list view tab"""
         list_frame = ttk.Frame(parent)
@@ -171,7 +161,7 @@ class TemplateDialog:
                 row=row, column=0, sticky=tk.W, padx=(0, 10), pady=(2, 2)
             )
             
-            if field_key in ["alm0_cause", "alm1_cause", "alm0_action", "alm1_action"]:
+            if FIELDS_BY_KEY[field_key].kind == "multiline":
                 # Multi-line text for cause and action fields
                 var = tk.StringVar()
                 text_widget = tk.Text(scrollable_frame, height=3, width=40, wrap=tk.WORD)
@@ -271,109 +261,14 @@ Expected format: *ActuatorNum Name Index DataType Prefix Output Out.Descr Input
                 messagebox.showwarning("Warning", "Please paste some data first.")
                 return
             
-            # Split into lines
-            raw_lines = pasted_data.split('\n')
-            
-            # Reconstruct lines: only lines starting with _XXX are new rows
-            # Everything else gets appended to the previous line
-            reconstructed_lines = []
-            current_line = ""
-            
-            for line in raw_lines:
-                line = line.strip()
-                if not line:  # Skip empty lines
-                    continue
-                
-                # Check if line starts with _XXX pattern (underscore + digits)
-                if re.match(r'^_\d+', line):
-                    # This is a new actuator line
-                    if current_line:  # Save previous line if exists
-                        reconstructed_lines.append(current_line)
-                    current_line = line  # Start new line
-                else:
-                    # This is a continuation of the previous line
-                    if current_line:
-                        current_line += " " + line  # Add to current line with space
-                    else:
-                        current_line = line  # First line doesn't start with _XXX
-            
-            # Add the last line
-            if current_line:
-                reconstructed_lines.append(current_line)
-            
-            if not reconstructed_lines:
-                messagebox.showwarning("Warning", "No valid actuator data found. Please check the format.")
-                return
-            
-            imported_actuators = []
-            
-            for line in reconstructed_lines:
-                if not line.strip():
-                    continue
-                
-                # Split by multiple spaces or tabs
-                # First normalize multiple spaces to single tabs
-                line = re.sub(r'\s{2,}', '\t', line)
-                
-                # Split by tabs
-                if '\t' in line:
-                    parts = line.split('\t')
-                else:
-                    # Fallback: split by single space
-                    parts = line.split(' ')
-                
-                # Clean empty parts and strip whitespace
-                parts = [p.strip() for p in parts if p.strip()]
-                
-                if not parts:
-                    continue
-                
-                # Remove _ from actuator number if present (first part should be _XXX)
-                if parts[0].startswith('_'):
-                    parts[0] = parts[0][1:]  # Remove the underscore
-                
-                # Create actuator data mapping to our fields
-                actuator = {}
-                parts = parts[1:]  # Skip the first column (actuator number)
-                for i, (field_key, _) in enumerate(self.actuator_fields):
-                        if i < len(parts):
-                                value = parts[i].strip()
-                                
-                                # Apply smart placeholder replacement
-                                if field_key == "name" and i == 0:  # Name is now first field
-                                        # Replace specific axis names with placeholder
-                                        if re.search(r'Axis[A-Z][a-z0-9]*', value):
-                                                # Keep suffixes like _MotionCfg, _NotHomed etc.
-                                                if '_' in value:
-                                                        base_name = value.split('_')[0]
-                                                        suffix = value[len(base_name):]
-                                                        value = f"{{ActuatorName}}{suffix}"
-                                                else:
-                                                        value = "{ActuatorName}"
-                                
-                                # Handle alarm descriptions - replace axis names with placeholder
-                                elif field_key in ["alm0_descr_lang1", "alm0_descr_lang2", "alm0_descr_lang3", 
-                                                                    "alm1_descr_lang1", "alm1_descr_lang2", "alm1_descr_lang3"]:
-                                        # Replace specific axis names in descriptions
-                                        value = re.sub(r'Axis[A-Z][a-z0-9]*', '{ActuatorName}', value)
-                                
-                                actuator[field_key] = value
-                        else:
-                                actuator[field_key] = ""
-                
-                # Only add if we have both actuator number and name
-                if actuator.get('name', '').strip() and len(parts) > 1:
-                    imported_actuators.append(actuator)
+            imported_actuators = parse_pasted_actuators(pasted_data)
             
             if not imported_actuators:
                 messagebox.showwarning("Warning", "No valid actuator data found. Please check the format.\n\nMake sure your data has lines starting with _XXX (like _138, _30, etc.)")
                 return
             
             # Add imported actuators to template
-            self.template_data["actuators"].extend(imported_actuators)
-            
-            # Refresh views
-            self.refresh_actuators_list()
+            self.apply_change("Paste Import", self.history.current.extend(imported_actuators))
             
             messagebox.showinfo("Success", f"Imported {len(imported_actuators)} actuator components!\n\nSwitching to List View to review the imported data.")
             
@@ -392,16 +287,65 @@ Expected format: *ActuatorNum Name Index DataType Prefix Output Out.Descr Input
         """Refresh the actuators listbox"""
         self.actuators_listbox.delete(0, tk.END)
         
-        for i, actuator in enumerate(self.template_data["actuators"]):
+        for i, actuator in enumerate(self.history.current):
             display_text = f"{i+1}. {actuator.get('name', 'Unnamed')} (Index: {actuator.get('index', 'N/A')})"
             self.actuators_listbox.insert(tk.END, display_text)
     
+    def selected_index(self):
+        """Index of the selected actuator, or None"""
+        selection = self.actuators_listbox.curselection()
+        return selection[0] if selection else None
+    
+    def apply_change(self, label, components, selection=None):
+        """Make an edited component list current as one undoable step"""
+        self.history.apply(label, components, selection, before=self.selected_index())
+        self.show_components(selection)
+    
+    def show_components(self, selection=None):
+        """Redraw the list of the current version and select an actuator"""
+        self.refresh_actuators_list()
+        if selection is not None and selection < len(self.history.current):
+            self.actuators_listbox.selection_set(selection)
+            self.actuators_listbox.see(selection)
+            self.load_actuator_into_fields(self.history.current[selection])
+        else:
+            self.clear_actuator_fields()
+        self.refresh_history_buttons()
+    
+    def refresh_history_buttons(self):
+        """Enable Undo / Redo and name the step they would revert or repeat"""
+        label = self.history.undo_label
+        self.undo_btn.config(text=f"↶ Undo {label}" if label else "↶ Undo",
+                             state=tk.NORMAL if label else tk.DISABLED)
+        label = self.history.redo_label
+        self.redo_btn.config(text=f"↷ Redo {label}" if label else "↷ Redo",
+                             state=tk.NORMAL if label else tk.DISABLED)
+    
+    def undo(self):
+        """Revert the last change of the component list"""
+        if self.history.undo() is not None:
+            self.show_components(self.history.selection)
+    
+    def redo(self):
+        """Repeat the last undone change"""
+        if self.history.redo() is not None:
+            self.show_components(self.history.selection)
+    
+    def on_undo_key(self, event):
+        # Text widgets keep their own keys
+        if not isinstance(event.widget, tk.Text):
+            self.undo()
+    
+    def on_redo_key(self, event):
+        if not isinstance(event.widget, tk.Text):
+            self.redo()
+    
     def on_actuator_select(self, event):
         """Handle actuator selection"""
         selection = self.actuators_listbox.curselection()
         if selection:
             index = selection[0]
-            actuator = self.template_data["actuators"][index]
+            actuator = self.history.current[index]
             self.load_actuator_into_fields(actuator)
     
     def load_actuator_into_fields(self, actuator):
@@ -434,7 +378,8 @@ Expected format: *ActuatorNum Name Index DataType Prefix Output Out.Descr Input
             return
         
         index = selection[0]
-        actuator = self.template_data["actuators"][index]
+        # Components are shared with earlier versions, so the edit is a new dict
+        actuator = dict(self.history.current[index])
         
         # Update actuator with field values
         for field_key, field_data in self.field_vars.items():
@@ -445,11 +390,8 @@ Expected format: *ActuatorNum Name Index DataType Prefix Output Out.Descr Input
             
             actuator[field_key] = value
         
-        # Refresh the list display
-        self.refresh_actuators_list()
-        
-        # Re-select the actuator
-        self.actuators_listbox.selection_set(index)
+        if actuator != self.history.current[index]:
+            self.apply_change("Edit", self.history.current.set(index, actuator), index)
         
         messagebox.showinfo("Success", "Actuator changes saved!")
     
@@ -459,13 +401,8 @@ Expected format: *ActuatorNum Name Index DataType Prefix Output Out.Descr Input
         for field_key, _ in self.actuator_fields:
             new_actuator[field_key] = ""
         
-        self.template_data["actuators"].append(new_actuator)
-        self.refresh_actuators_list()
-        
         # Select the new actuator
-        new_index = len(self.template_data["actuators"]) - 1
-        self.actuators_listbox.selection_set(new_index)
-        self.load_actuator_into_fields(new_actuator)
+        self.apply_change("Add", self.history.current.append(new_actuator), len(self.history.current))
     
     def copy_actuator(self):
         """Copy the selected actuator"""
@@ -475,23 +412,19 @@ Expected format: *ActuatorNum Name Index DataType Prefix Output Out.Descr Input
             return
         
         index = selection[0]
-        original_actuator = self.template_data["actuators"][index]
+        original_actuator = self.history.current[index]
         
-        # Create a deep copy
-        copied_actuator = copy.deepcopy(original_actuator)
+        # Field values are strings and components are never changed in place,
+        # so a shallow copy is enough
+        copied_actuator = dict(original_actuator)
         
         # Modify the name to indicate it's a copy
         original_name = copied_actuator.get('name', '')
         if not original_name.endswith('_Copy'):
             copied_actuator['name'] = original_name + '_Copy'
         
-        self.template_data["actuators"].append(copied_actuator)
-        self.refresh_actuators_list()
-        
         # Select the new copy
-        new_index = len(self.template_data["actuators"]) - 1
-        self.actuators_listbox.selection_set(new_index)
-        self.load_actuator_into_fields(copied_actuator)
+        self.apply_change("Copy", self.history.current.append(copied_actuator), len(self.history.current))
     
     def delete_actuator(self):
         """Delete the selected actuator"""
@@ -502,9 +435,7 @@ Expected format: *ActuatorNum Name Index DataType Prefix Output Out.Descr Input
         
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this actuator?"):
             index = selection[0]
-            del self.template_data["actuators"][index]
-            self.refresh_actuators_list()
-            self.clear_actuator_fields()
+            self.apply_change("Delete", self.history.current.delete(index))
     
     def move_up(self):
         """Move selected actuator up in the list"""
@@ -514,25 +445,17 @@ Expected format: *ActuatorNum Name Index DataType Prefix Output Out.Descr Input
         
         index = selection[0]
         # Swap with previous
-        self.template_data["actuators"][index], self.template_data["actuators"][index-1] = \
-            self.template_data["actuators"][index-1], self.template_data["actuators"][index]
-        
-        self.refresh_actuators_list()
-        self.actuators_listbox.selection_set(index-1)
+        self.apply_change("Move Up", self.history.current.swap(index, index-1), index-1)
     
     def move_down(self):
         """Move selected actuator down in the list"""
         selection = self.actuators_listbox.curselection()
-        if not selection or selection[0] >= len(self.template_data["actuators"]) - 1:
+        if not selection or selection[0] >= len(self.history.current) - 1:
             return
         
         index = selection[0]
         # Swap with next
-        self.template_data["actuators"][index], self.template_data["actuators"][index+1] = \
-            self.template_data["actuators"][index+1], self.template_data["actuators"][index]
-        
-        self.refresh_actuators_list()
-        self.actuators_listbox.selection_set(index+1)
+        self.apply_change("Move Down", self.history.current.swap(index, index+1), index+1)
     
     def save_template(self):
         """Save the template and close dialog"""
@@ -546,7 +469,7 @@ Expected format: *ActuatorNum Name Index DataType Prefix Output Out.Descr Input
         self.result = {
             "name": name,
             "description": description,
-            "actuators": self.template_data["actuators"]
+            "actuators": self.history.current.to_list()
         }
         
         self.dialog.destroy()
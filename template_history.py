@@ -0,0 +1,364 @@
+"""Append-only version history of templates, stored as per-component deltas.
+
+Every save appends one JSON line to templates/history/<template>.jsonl.
+A line is either a full copy of the template (the first version, after a
+deletion or an edit made outside the application, and every
+KEYFRAME_INTERVAL versions) or a delta against the previous version:
+
+    {"version": 4, "time": ..., "action": "save", "hash": ...,
+     "fields": {"set": {"description": ...}, "del": []},
+     "components": [["copy", 0, 12], ["patch", 12, {"set": {"input": "I:3/1"}, "del": []}],
+                    ["new", [{...}]], ["copy", 14, 30]]}
+
+The component segments rebuild the new list from the old one: "copy"
+takes a range of old components, "patch" changes fields of one old
+component and "new" inserts components. Storage therefore grows with the
+size of the edits. A version is rebuilt from the nearest full copy before
+it and checked against its recorded hash.
+"""
+import difflib
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+HISTORY_SUFFIX = ".jsonl"
+# A full copy after this many deltas bounds the work of rebuilding a version
+KEYFRAME_INTERVAL = 500
+
+ACTION_SAVE = "save"
+ACTION_BASELINE = "baseline"
+ACTION_DELETE = "delete"
+
+# Summary of one recorded version for lists; changes is e.g. "+2 -1 ~3 components"
+VersionInfo = namedtuple("VersionInfo", "version time action changes")
+
+def template_hash(template_data):
+    """Content hash of a whole template (fields and components)"""
+    payload = json.dumps(template_data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def dict_patch(old, new):
+    """{"set": changed or added keys, "del": removed keys} turning dict old into new"""
+    return {"set": {key: value for key, value in new.items() if old.get(key, object()) != value},
+            "del": [key for key in old if key not in new]}
+
+def apply_patch(old, patch):
+    """New dict with a dict_patch applied"""
+    new = {key: value for key, value in old.items() if key not in patch["del"]}
+    new.update(patch["set"])
+    return new
+
+def component_key(component):
+    return json.dumps(component, sort_keys=True, ensure_ascii=False, default=str)
+
+def component_changes(old_components, new_components):
+    """Changes from one component list to another, in the order of the new list
+    
+    Yields ("keep", i1, i2) for unchanged runs of old components, ("move", i)
+    for an old component found unchanged at another place, ("patch", i,
+    dict_patch) for an edited component and ("new", component) otherwise.
+    Components removed are those of old_components never referred to.
+    """
+    old_keys = [component_key(component) for component in old_components]
+    new_keys = [component_key(component) for component in new_components]
+    old_positions = {}
+    for index, key in enumerate(old_keys):
+        old_positions.setdefault(key, index)
+    new_key_set = set(new_keys)
+    
+    matcher = difflib.SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            yield ("keep", i1, i2)
+            continue
+        for offset, j in enumerate(range(j1, j2)):
+            if new_keys[j] in old_positions:
+                yield ("move", old_positions[new_keys[j]])
+                continue
+            # An edit pairs with the old component at the same place, unless that one moved
+            i = i1 + offset
+            if i < i2 and old_keys[i] not in new_key_set:
+                yield ("patch", i, dict_patch(old_components[i], new_components[j]))
+            else:
+                yield ("new", new_components[j])
+
+def component_delta(old_components, new_components):
+    """Segments rebuilding new_components from old_components"""
+    segments = []
+    for change in component_changes(old_components, new_components):
+        if change[0] == "keep":
+            segments.append(["copy", change[1], change[2]])
+        elif change[0] == "move":
+            segments.append(["copy", change[1], change[1] + 1])
+        elif change[0] == "patch":
+            segments.append(["patch", change[1], change[2]])
+        elif segments and segments[-1][0] == "new":
+            segments[-1][1].append(change[1])
+        else:
+            segments.append(["new", [change[1]]])
+    return segments
+
+def apply_component_delta(old_components, segments):
+    """New component list from an old one and its segments"""
+    components = []
+    for segment in segments:
+        kind = segment[0]
+        if kind == "copy":
+            components.extend(old_components[segment[1]:segment[2]])
+        elif kind == "patch":
+            components.append(apply_patch(old_components[segment[1]], segment[2]))
+        else:
+            components.extend(segment[1])
+    return components
+
+def delta_changes(record, old_count):
+    """(added, removed, changed, reordered, new count) of a delta record
+    
+    The new count is that of the rebuilt list. An old component copied
+    more than once counts as added for each extra copy.
+    """
+    used = set()
+    patched = new_count = 0
+    reordered = False
+    last_end = 0
+    for segment in record["components"]:
+        if segment[0] == "copy":
+            copied = range(segment[1], segment[2])
+            # Copying an old component again duplicates it rather than moving it
+            reordered = reordered or not used.issuperset(range(segment[1], min(segment[2], last_end)))
+            used.update(copied)
+            new_count += len(copied)
+            last_end = max(last_end, segment[2])
+        elif segment[0] == "patch":
+            used.add(segment[1])
+            patched += 1
+            new_count += 1
+        else:
+            new_count += len(segment[1])
+    return new_count - len(used), max(old_count - len(used), 0), patched, reordered, new_count
+
+def diff_templates(old, new):
+    """Readable lines describing how template old became new ("+", "-", "~" or ">" first)"""
+    lines = []
+    old = old or {}
+    new = new or {}
+    for key in sorted(set(old) | set(new)):
+        if key in ("actuators", "last_modified") or old.get(key) == new.get(key):
+            continue
+        lines.append(f"~ {key}: {old.get(key, '')!r} -> {new.get(key, '')!r}")
+    
+    old_components = old.get("actuators", [])
+    used = set()
+    for change in component_changes(old_components, new.get("actuators", [])):
+        kind = change[0]
+        if kind == "keep":
+            used.update(range(change[1], change[2]))
+        elif kind == "move":
+            used.add(change[1])
+            lines.append(f"> {old_components[change[1]].get('name', 'Unnamed')} (moved)")
+        elif kind == "patch":
+            component = old_components[change[1]]
+            used.add(change[1])
+            lines.append(f"~ {component.get('name', 'Unnamed')}")
+            for key, value in change[2]["set"].items():
+                lines.append(f"    {key}: {component.get(key, '')!r} -> {value!r}")
+            for key in change[2]["del"]:
+                lines.append(f"    {key}: removed")
+        else:
+            lines.append(f"+ {change[1].get('name', 'Unnamed')}")
+    lines.extend(f"- {component.get('name', 'Unnamed')}"
+                 for index, component in enumerate(old_components) if index not in used)
+    return lines
+
+class TemplateHistory:
+    """Version history of every template, one append-only JSON-lines file each"""
+    
+    def __init__(self, directory=os.path.join("templates", "history")):
+        self.directory = os.path.abspath(directory)
+        # template name -> (last version, its hash or None when deleted, deltas since the last full copy)
+        self._heads = {}
+        self._lock = threading.Lock()
+    
+    def history_path(self, template_name):
+        """File of a template; names that are not plain file names get a hash suffix"""
+        safe_name = re.sub(r"[^\w.-]", "_", template_name)
+        if safe_name != template_name:
+            safe_name += "_" + hashlib.sha1(template_name.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.directory, safe_name + HISTORY_SUFFIX)
+    
+    def _read_records(self, template_name, last_version=None):
+        """Records of a template in order, up to last_version"""
+        path = self.history_path(template_name)
+        if not os.path.exists(path):
+            return []
+        records = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash; the next save writes a full copy
+                    continue
+                records.append(record)
+                if last_version is not None and record["version"] >= last_version:
+                    break
+        return records
+    
+    def _head(self, template_name):
+        """(last version, hash, deltas since the last full copy), read once per template"""
+        head = self._heads.get(template_name)
+        if head is None:
+            version, last_hash, deltas = 0, None, 0
+            for record in self._read_records(template_name):
+                version = record["version"]
+                last_hash = record.get("hash")
+                deltas = deltas + 1 if "components" in record else 0
+            head = self._heads[template_name] = (version, last_hash, deltas)
+        return head
+    
+    def _append(self, template_name, record):
+        os.makedirs(self.directory, exist_ok=True)
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        path = self.history_path(template_name)
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # Keep a line cut short by a crash separate from the new record
+                    line = "\n" + line
+        with open(path, "ab") as f:
+            f.write(line.encode("utf-8"))
+    
+    def record(self, template_name, previous, template_data):
+        """Append the saved template_data as a new version; previous is the version it replaced
+        
+        Returns the new version number, or None when the history could not be written.
+        """
+        try:
+            with self._lock:
+                version, last_hash, deltas = self._head(template_name)
+                time = datetime.now().isoformat()
+                if previous is not None and last_hash is None:
+                    # First save of a template created before the history existed
+                    version += 1
+                    last_hash = template_hash(previous)
+                    self._append(template_name, {"version": version, "time": time, "action": ACTION_BASELINE,
+                                                 "hash": last_hash, "template": previous})
+                    deltas = 0
+                
+                version += 1
+                new_hash = template_hash(template_data)
+                record = {"version": version, "time": time, "action": ACTION_SAVE, "hash": new_hash}
+                if (previous is None or deltas >= KEYFRAME_INTERVAL - 1
+                        or template_hash(previous) != last_hash):
+                    # New, due for a full copy, or changed outside the application
+                    record["template"] = template_data
+                    deltas = 0
+                else:
+                    old_fields = {key: value for key, value in previous.items() if key != "actuators"}
+                    new_fields = {key: value for key, value in template_data.items() if key != "actuators"}
+                    record["fields"] = dict_patch(old_fields, new_fields)
+                    record["components"] = component_delta(previous.get("actuators", []),
+                                                           template_data.get("actuators", []))
+                    deltas += 1
+                self._append(template_name, record)
+                self._heads[template_name] = (version, new_hash, deltas)
+                return version
+        except Exception as e:
+            print(f"Error recording template history: {e}")
+            return None
+    
+    def record_delete(self, template_name, template_data=None):
+        """Append a deletion marker; the versions before it stay readable
+        
+        template_data is the deleted template. A template without a history
+        (created before it existed) or changed outside the application gets
+        a full copy first, so the delete can be undone.
+        """
+        try:
+            with self._lock:
+                version, last_hash, deltas = self._head(template_name)
+                time = datetime.now().isoformat()
+                if template_data is not None and template_hash(template_data) != last_hash:
+                    version += 1
+                    self._append(template_name, {"version": version, "time": time, "action": ACTION_BASELINE,
+                                                 "hash": template_hash(template_data), "template": template_data})
+                if not version:
+                    return None
+                version += 1
+                self._append(template_name, {"version": version, "time": time, "action": ACTION_DELETE})
+                self._heads[template_name] = (version, None, 0)
+                return version
+        except Exception as e:
+            print(f"Error recording template history: {e}")
+            return None
+    
+    def latest_version(self, template_name):
+        """Number of the newest recorded version (0 when there is no history)"""
+        with self._lock:
+            return self._head(template_name)[0]
+    
+    def versions(self, template_name):
+        """VersionInfo of every recorded version, oldest first"""
+        infos = []
+        count = 0
+        for record in self._read_records(template_name):
+            if record["action"] == ACTION_DELETE:
+                changes = "deleted"
+                count = 0
+            elif "template" in record:
+                count = len(record["template"].get("actuators", []))
+                changes = f"{count} components (full copy)"
+            else:
+                added, removed, changed, reordered, count = delta_changes(record, count)
+                parts = [f"+{added}" if added else "", f"-{removed}" if removed else "",
+                         f"~{changed}" if changed else ""]
+                parts = [part for part in parts if part]
+                changes = f"{' '.join(parts)} components" if parts else "no component changes"
+                if reordered:
+                    changes += ", reordered"
+                fields = [key for key in list(record["fields"]["set"]) + record["fields"]["del"]
+                          if key != "last_modified"]
+                if fields:
+                    changes += f", {', '.join(fields)} changed"
+            infos.append(VersionInfo(record["version"], record["time"], record["action"], changes))
+        return infos
+    
+    def get_version(self, template_name, version):
+        """The template as saved in version, or None if that version is a deletion or unknown"""
+        records = self._read_records(template_name, version)
+        if not records or records[-1]["version"] != version:
+            return None
+        # Only the records from the last full copy or deletion on are applied
+        start = max((index for index, record in enumerate(records) if "components" not in record), default=0)
+        template_data = None
+        for record in records[start:]:
+            if record["action"] == ACTION_DELETE:
+                template_data = None
+            elif "template" in record:
+                template_data = record["template"]
+            elif template_data is not None:
+                fields = apply_patch({key: value for key, value in template_data.items() if key != "actuators"},
+                                     record["fields"])
+                fields["actuators"] = apply_component_delta(template_data.get("actuators", []),
+                                                            record["components"])
+                template_data = fields
+            else:
+                raise ValueError(f"History of '{template_name}' has a delta without a base at version {record['version']}")
+        
+        if template_data is None:
+            return None
+        if template_hash(template_data) != record["hash"]:
+            raise ValueError(f"History of '{template_name}' is damaged at version {version}")
+        return template_data
+    
+    def diff(self, template_name, version):
+        """diff_templates lines of a version against the one before it"""
+        previous = self.get_version(template_name, version - 1) if version > 1 else None
+        return diff_templates(previous, self.get_version(template_name, version))
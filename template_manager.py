@@ -1,57 +1,218 @@
 import json
 import os
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime
-import tkinter.messagebox as messagebox
+from tracing import tracer
+from template_history import TemplateHistory
+from template_snapshot import (load_snapshot_index, read_template, write_snapshot, write_store,
+                               file_key, content_hash, index_entry)
+
+# Full templates kept in memory; the others are read from the snapshot when used
+RESIDENT_TEMPLATES = 32
+
+def components_hash(components):
+    """Content hash of a component list (the template hash of generated actuators)"""
+    payload = json.dumps(components, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
 
 class TemplateManager:
-    def __init__(self):
+    def __init__(self, resident_templates=RESIDENT_TEMPLATES, load=True):
         self.templates_dir = "templates"
         self.templates_file = "templates.json"
+        self.resident_templates = resident_templates
+        self._change_listeners = []
+        self._template_hashes = {}
+        # Least recently used first
+        self._resident = OrderedDict()
+        # Templates changed since the last successful save
+        self._modified = {}
+        # The whole store, only while no snapshot could be written
+        self._store = None
+        self._sha1 = None
+        self._lock = threading.RLock()
         self.ensure_templates_directory()
-        self.templates = self.load_templates()
+        # Absolute, since templates are read long after start-up
+        self.templates_path = os.path.abspath(os.path.join(self.templates_dir, self.templates_file))
+        # Every saved version, as deltas against the one before
+        self.history = TemplateHistory(os.path.join(self.templates_dir, "history"))
+        self.index = {}
+        # False until load() ran (the GUI loads the store on a worker thread)
+        self.loaded = False
+        if load:
+            self.load()
+    
+    def load(self):
+        """Load the template index; safe to call from a worker thread"""
+        with self._lock:
+            self.index = self.load_templates()
+            self.loaded = True
+        return self.index
     
     def ensure_templates_directory(self):
         """Ensure templates directory exists"""
         if not os.path.exists(self.templates_dir):
             os.makedirs(self.templates_dir)
     
-    def load_templates(self):
-        """Load templates from JSON file"""
-        templates_path = os.path.join(self.templates_dir, self.templates_file)
+    def load_templates(self, use_snapshot=True):
+        """Load the template index (name -> IndexEntry) from the JSON file
+        
+        Only the index is read from an unchanged store's snapshot; full
+        templates are read from it on demand by get_template.
+        """
+        templates_path = self.templates_path
+        self._resident.clear()
+        self._modified.clear()
+        self._store = None
+        self._sha1 = None
         if os.path.exists(templates_path):
+            if use_snapshot:
+                with tracer.span("template_snapshot_load", summary="loaded template index in {ms:.0f} ms"):
+                    snapshot = load_snapshot_index(templates_path)
+                if snapshot is not None:
+                    index, self._sha1 = snapshot
+                    return index
+            
             try:
-                with open(templates_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with tracer.span("template_load", summary="loaded templates in {ms:.0f} ms",
+                                 bytes=os.path.getsize(templates_path)):
+                    key = file_key(templates_path)
+                    with open(templates_path, 'rb') as f:
+                        data = f.read()
+                    templates = json.loads(data.decode('utf-8'))
+                index = write_snapshot(templates_path, templates, data, key)
+                if index is None:
+                    # Nothing to read templates from later: keep the whole store in memory
+                    self._store = templates
+                    return {name: index_entry(template_data) for name, template_data in templates.items()}
+                self._sha1 = content_hash(data)
+                return index
             except Exception as e:
                 print(f"Error loading templates: {e}")
                 return {}
         return {}
     
     def save_templates(self):
-        """Save templates to JSON file"""
-        templates_path = os.path.join(self.templates_dir, self.templates_file)
-        try:
-            with open(templates_path, 'w', encoding='utf-8') as f:
-                json.dump(self.templates, f, indent=2, ensure_ascii=False)
+        """Save templates to JSON file (and rebuild the snapshot in the same pass)"""
+        templates_path = self.templates_path
+        with self._lock:
+            try:
+                with tracer.span("template_save", summary="saved templates in {ms:.0f} ms",
+                                 templates=len(self.index)) as span:
+                    templates = ((name, self._read_template(name)) for name in self.index)
+                    index, sha1 = write_store(templates_path, templates)
+                    span.add(bytes=os.path.getsize(templates_path))
+            except Exception as e:
+                print(f"Error saving templates: {e}")
+                return False
+            
+            self.index = index
+            self._sha1 = sha1
+            self._store = None
+            for template_name, template_data in self._modified.items():
+                self._make_resident(template_name, template_data)
+            self._modified.clear()
             return True
-        except Exception as e:
-            print(f"Error saving templates: {e}")
-            return False
+    
+    def get_template_index(self):
+        """Name -> IndexEntry (description, count, last_modified) of every template, without loading them"""
+        return self.index
     
     def get_all_templates(self):
-        """Get all templates"""
-        return self.templates
+        """Get all templates (reads every template; list views use get_template_index)"""
+        with self._lock:
+            return {name: self._read_template(name) for name in self.index}
     
     def get_template(self, template_name):
-        """Get specific template by name"""
-        return self.templates.get(template_name)
+        """Get specific template by name, reading it from the snapshot if it is not resident"""
+        with self._lock:
+            template_data = self._modified.get(template_name)
+            if template_data is not None:
+                return template_data
+            template_data = self._resident.get(template_name)
+            if template_data is not None:
+                self._resident.move_to_end(template_name)
+                return template_data
+            if template_name not in self.index:
+                return None
+            
+            try:
+                template_data = self._read_template(template_name)
+            except Exception as e:
+                # The snapshot was replaced or damaged: rebuild the index from the JSON once
+                print(f"Error reading template '{template_name}': {e}")
+                modified = dict(self._modified)
+                self.index = self.load_templates(use_snapshot=False)
+                for name, data in modified.items():
+                    self._put_template(name, data)
+                if template_name not in self.index:
+                    return None
+                template_data = self._read_template(template_name)
+            
+            if self._store is None:
+                self._make_resident(template_name, template_data)
+            return template_data
+    
+    def _read_template(self, template_name):
+        """A template from memory or the snapshot, leaving the resident set unchanged"""
+        template_data = self._modified.get(template_name) or self._resident.get(template_name)
+        if template_data is not None:
+            return template_data
+        if self._store is not None:
+            return self._store.get(template_name)
+        template_data = read_template(self.templates_path, self.index[template_name], self._sha1)
+        if template_data is None:
+            raise ValueError("the template snapshot changed since it was loaded")
+        return template_data
+    
+    def _make_resident(self, template_name, template_data):
+        """Keep a template in memory, dropping the least recently used beyond resident_templates"""
+        self._resident[template_name] = template_data
+        self._resident.move_to_end(template_name)
+        while len(self._resident) > self.resident_templates:
+            self._resident.popitem(last=False)
+    
+    def _put_template(self, template_name, template_data):
+        """Add or replace a template in memory until the next save"""
+        with self._lock:
+            self._modified[template_name] = template_data
+            self._resident.pop(template_name, None)
+            self.index[template_name] = index_entry(template_data)
+        self._notify_template_changed(template_name)
+    
+    def get_template_hash(self, template_name):
+        """Get a content hash of a template's components (cached until it changes)"""
+        if template_name not in self._template_hashes:
+            template_data = self.get_template(template_name)
+            if template_data is None:
+                return None
+            self._template_hashes[template_name] = components_hash(template_data.get("actuators", []))
+        return self._template_hashes[template_name]
+    
+    def add_change_listener(self, callback):
+        """Register a callback called with the template name whenever a template changes"""
+        self._change_listeners.append(callback)
+    
+    def _notify_template_changed(self, template_name):
+        """Drop cached data for a template and notify listeners"""
+        self._template_hashes.pop(template_name, None)
+        for callback in self._change_listeners:
+            try:
+                callback(template_name)
+            except Exception as e:
+                print(f"Error in template change listener: {e}")
     
     def save_template(self, template_name, template_data):
         """Save or update a template"""
         try:
+            previous = self.get_template(template_name)
             template_data["last_modified"] = datetime.now().isoformat()
-            self.templates[template_name] = template_data
-            return self.save_templates()
+            self._put_template(template_name, template_data)
+            if not self.save_templates():
+                return False
+            self.history.record(template_name, previous, template_data)
+            return True
         except Exception as e:
             print(f"Error saving template: {e}")
             return False
@@ -59,9 +220,20 @@ class TemplateManager:
     def delete_template(self, template_name):
         """Delete a template"""
         try:
-            if template_name in self.templates:
-                del self.templates[template_name]
-                return self.save_templates()
+            if template_name in self.index:
+                # Read before it is dropped, so the history can restore it
+                template_data = self.get_template(template_name)
+                with self._lock:
+                    del self.index[template_name]
+                    self._modified.pop(template_name, None)
+                    self._resident.pop(template_name, None)
+                    if self._store is not None:
+                        self._store.pop(template_name, None)
+                self._notify_template_changed(template_name)
+                if not self.save_templates():
+                    return False
+                self.history.record_delete(template_name, template_data)
+                return True
             return False
         except Exception as e:
             print(f"Error deleting template: {e}")
@@ -74,25 +246,43 @@ class TemplateManager:
                 imported_data = json.load(f)
             
             # Check if it's a single template or multiple templates
+            imported = {}
             if isinstance(imported_data, dict):
                 if "name" in imported_data:
                     # Single template
-                    template_name = imported_data["name"]
-                    self.templates[template_name] = imported_data
+                    imported = {imported_data["name"]: imported_data}
                 else:
                     # Multiple templates
-                    self.templates.update(imported_data)
+                    imported = imported_data
             
-            return self.save_templates()
+            previous = {template_name: self.get_template(template_name) for template_name in imported}
+            for template_name, template_data in imported.items():
+                self._put_template(template_name, template_data)
+            if not self.save_templates():
+                return False
+            for template_name, template_data in imported.items():
+                self.history.record(template_name, previous[template_name], template_data)
+            return True
         except Exception as e:
             print(f"Error importing template: {e}")
             return False
     
+    def restore_version(self, template_name, version):
+        """Save a recorded version of a template as its newest version"""
+        try:
+            template_data = self.history.get_version(template_name, version)
+            if template_data is None:
+                return False
+            return self.save_template(template_name, template_data)
+        except Exception as e:
+            print(f"Error restoring template version: {e}")
+            return False
+    
     def export_template(self, template_name, file_path):
         """Export template to JSON file"""
         try:
-            if template_name in self.templates:
-                template_data = self.templates[template_name]
+            template_data = self.get_template(template_name)
+            if template_data is not None:
                 with open(file_path, 'w', encoding='utf-8') as f:
                     json.dump(template_data, f, indent=2, ensure_ascii=False)
                 return True
@@ -0,0 +1,198 @@
+"""Binary snapshot of the template store for fast, index-only start-up.
+
+templates.json stays the source of truth; the snapshot written next to it
+is used only while it matches the JSON's size, mtime and content hash. It
+holds every template as a separate compact JSON record followed by an
+index (name, description, component count, last_modified and the position
+of each template), so start-up reads the fixed-size header and the index
+and a template's components are read only when it is used. Records are
+JSON rather than pickles: the templates folder may be shared, and loading
+a pickle someone else wrote could run arbitrary code.
+
+    header | template records ... | index record
+"""
+import hashlib
+import json
+import os
+import struct
+from collections import namedtuple
+from atomic_file import create_temp_file, replace_file, discard_temp_file
+
+# Bump when the snapshot layout or the template structure changes
+SNAPSHOT_VERSION = 3
+SNAPSHOT_SUFFIX = ".snapshot"
+SNAPSHOT_MAGIC = b"ATMS"
+
+# magic, version, JSON size, JSON mtime_ns, JSON sha1, index offset
+HEADER = struct.Struct("<4sIQq20sQ")
+
+# offset and length locate the template's record; both are None while it is only in memory
+IndexEntry = namedtuple("IndexEntry", "description count last_modified offset length")
+
+def snapshot_path(json_path):
+    """The snapshot written next to a JSON store (templates.json -> templates.json.snapshot)"""
+    return json_path + SNAPSHOT_SUFFIX
+
+def file_key(json_path):
+    """(size, mtime) of the JSON store, compared before anything else is read"""
+    stat = os.stat(json_path)
+    return stat.st_size, stat.st_mtime_ns
+
+def content_hash(data):
+    return hashlib.sha1(data).digest()
+
+def encode_record(value):
+    """Compact UTF-8 JSON of a template or the index"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def index_entry(template_data, offset=None, length=None):
+    """Index entry of a template"""
+    return IndexEntry(template_data.get("description", "No description"),
+                      len(template_data.get("actuators", [])),
+                      template_data.get("last_modified"), offset, length)
+
+def read_header(f):
+    """(version, size, mtime_ns, sha1, index offset) of an open snapshot, or None"""
+    data = f.read(HEADER.size)
+    if len(data) != HEADER.size:
+        return None
+    magic, *header = HEADER.unpack(data)
+    if magic != SNAPSHOT_MAGIC:
+        return None
+    return header
+
+def load_snapshot_index(json_path):
+    """(index, sha1) from the snapshot if it matches the JSON store, else None
+    
+    Only the header and the index are read. A stale snapshot is rejected
+    after reading the header; when only the mtime differs (the store was
+    touched or copied), the JSON content hash decides and the header is
+    updated in place.
+    """
+    path = snapshot_path(json_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            header = read_header(f)
+            if header is None or header[0] != SNAPSHOT_VERSION:
+                return None
+            version, size, mtime_ns, sha1, index_offset = header
+            key = file_key(json_path)
+            if size != key[0]:
+                return None
+            stale_key = mtime_ns != key[1]
+            if stale_key:
+                with open(json_path, "rb") as json_file:
+                    if content_hash(json_file.read()) != sha1:
+                        return None
+            f.seek(index_offset)
+            index = {name: IndexEntry(*fields) for name, fields in json.loads(f.read()).items()}
+        if stale_key:
+            # Same content: record the new mtime so the next start skips the hash
+            with open(path, "r+b") as f:
+                f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, key[0], key[1], sha1, index_offset))
+        return index, sha1
+    except Exception as e:
+        # Corrupt or unreadable: the caller rebuilds it from the JSON
+        print(f"Ignoring template snapshot: {e}")
+        return None
+
+def read_template(json_path, entry, sha1):
+    """One template from the snapshot, or None when the snapshot no longer has content sha1"""
+    with open(snapshot_path(json_path), "rb") as f:
+        header = read_header(f)
+        if header is None or header[0] != SNAPSHOT_VERSION or header[3] != sha1:
+            return None
+        f.seek(entry.offset)
+        return json.loads(f.read(entry.length))
+
+class SnapshotWriter:
+    """Write a snapshot to a temporary file, one template at a time"""
+    
+    def __init__(self, json_path):
+        self.path = snapshot_path(json_path)
+        fd, self.temp_path = create_temp_file(self.path)
+        self.file = os.fdopen(fd, "wb")
+        self.file.write(bytes(HEADER.size))
+        self.index = {}
+    
+    def add(self, template_name, template_data):
+        """Append a template's record and its index entry"""
+        data = encode_record(template_data)
+        self.index[template_name] = index_entry(template_data, self.file.tell(), len(data))
+        self.file.write(data)
+    
+    def commit(self, key, sha1):
+        """Write the index and the header of the JSON (key, sha1) and replace the snapshot"""
+        index_offset = self.file.tell()
+        self.file.write(encode_record(self.index))
+        self.file.seek(0)
+        self.file.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, key[0], key[1], sha1, index_offset))
+        self.file.close()
+        replace_file(self.temp_path, self.path)
+        return self.index
+    
+    def discard(self):
+        self.file.close()
+        discard_temp_file(self.temp_path)
+
+def write_snapshot(json_path, templates, data, key):
+    """Write the snapshot of a parsed JSON store atomically; returns its index, or None on failure
+    
+    data (the JSON bytes) and key (file_key taken before reading them) are
+    those the caller has just loaded templates from.
+    """
+    try:
+        writer = SnapshotWriter(json_path)
+    except Exception as e:
+        print(f"Error writing template snapshot: {e}")
+        return None
+    try:
+        for template_name, template_data in templates.items():
+            writer.add(template_name, template_data)
+        return writer.commit(key, content_hash(data))
+    except Exception as e:
+        writer.discard()
+        print(f"Error writing template snapshot: {e}")
+        return None
+
+def write_store(json_path, templates):
+    """Write the JSON store and its snapshot in one pass; returns (index, sha1)
+    
+    templates yields (name, template data) pairs and is consumed once, so
+    templates that are not in memory are read, written and dropped one at a
+    time. The JSON is formatted like json.dump(..., indent=2) and is
+    replaced only when the snapshot was written too: the snapshot is
+    committed first with the key of the new JSON (a rename keeps the size
+    and mtime), and a snapshot left without its JSON fails the key check.
+    """
+    fd, temp_path = create_temp_file(json_path)
+    writer = None
+    try:
+        with os.fdopen(fd, "wb") as f:
+            writer = SnapshotWriter(json_path)
+            digest = hashlib.sha1()
+            
+            def write(text):
+                data = text.encode("utf-8")
+                digest.update(data)
+                f.write(data)
+            
+            separator = "{\n"
+            for template_name, template_data in templates:
+                value = json.dumps(template_data, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+                write(f"{separator}  {json.dumps(template_name, ensure_ascii=False)}: {value}")
+                separator = ",\n"
+                writer.add(template_name, template_data)
+            write("{}" if separator == "{\n" else "\n}")
+        
+        sha1 = digest.digest()
+        index = writer.commit(file_key(temp_path), sha1)
+        replace_file(temp_path, json_path)
+        return index, sha1
+    except Exception:
+        if writer is not None:
+            writer.discard()
+        discard_temp_file(temp_path)
+        raise
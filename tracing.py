@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+import time
+
+class _NullSpan:
+    """Span used while tracing is disabled; every operation is a no-op"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+    
+    def add(self, **counters):
+        pass
+
+NULL_SPAN = _NullSpan()
+
+# Spans kept for the status bar summary
+MAX_RECENT_SPANS = 200
+
+class Span:
+    """A timed pipeline stage with row/byte counters"""
+    
+    def __init__(self, tracer, name, summary, counters):
+        self.tracer = tracer
+        self.name = name
+        self.summary = summary
+        self.counters = counters
+        self.parent = None
+        self.start = 0.0
+        self.duration_ms = 0.0
+    
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.duration_ms = (time.perf_counter() - self.start) * 1000
+        self.tracer._stack().pop()
+        if exc_type is not None:
+            self.counters["error"] = exc_type.__name__
+        self.tracer._finish(self)
+        return False
+    
+    def add(self, **counters):
+        """Add to the span's counters (e.g. rows=10, bytes=2048)"""
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+    
+    def summary_text(self):
+        """Human readable summary for the status bar, or None"""
+        if not self.summary:
+            return None
+        try:
+            return self.summary.format(ms=self.duration_ms, **self.counters)
+        except (KeyError, ValueError):
+            return f"{self.name} in {self.duration_ms:.0f} ms"
+
+class Tracer:
+    """Opt-in stage tracing emitted to a JSON-lines log"""
+    
+    def __init__(self):
+        self.enabled = False
+        self.log_path = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._recent = []
+    
+    def enable(self, log_path=None):
+        """Start tracing, optionally appending every span to a JSON-lines file"""
+        self.log_path = log_path
+        self.enabled = True
+    
+    def enable_from_environment(self, variable="ATM_TRACE"):
+        """Enable tracing when the environment variable names a log file"""
+        log_path = os.environ.get(variable)
+        if log_path:
+            self.enable(log_path)
+        return self.enabled
+    
+    def disable(self):
+        """Stop tracing"""
+        self.enabled = False
+    
+    def span(self, name, summary=None, **counters):
+        """Return a context manager timing one stage (a no-op while disabled)"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, summary, counters)
+    
+    def begin_action(self):
+        """Forget the spans of the previous user action"""
+        with self._lock:
+            self._recent = []
+    
+    def summary_text(self):
+        """Summarize the spans finished since begin_action, e.g. for the status bar"""
+        with self._lock:
+            spans = list(self._recent)
+        parts = [text for text in (span.summary_text() for span in spans) if text]
+        return ", ".join(parts)
+    
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+    
+    def _finish(self, span):
+        record = {
+            "ts": time.time(),
+            "span": span.name,
+            "parent": span.parent,
+            "ms": round(span.duration_ms, 3),
+            "thread": threading.current_thread().name,
+        }
+        record.update(span.counters)
+        with self._lock:
+            self._recent.append(span)
+            if len(self._recent) > MAX_RECENT_SPANS:
+                del self._recent[0]
+            if self.log_path:
+                try:
+                    with open(self.log_path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(record, default=str) + "\n")
+                except OSError as e:
+                    print(f"Error writing trace log: {e}")
+
+# Shared tracer used by the whole application
+tracer = Tracer()